@@ -1,10 +1,11 @@
 import unittest
-import os, sys
+import io, os, sys, pickle, tempfile
 
 # Permet à python de trouver model.py même si on lance le test depuis ailleurs
 sys.path.append(os.path.dirname(__file__))
 
 from model import PetriNet
+from storage import SQLiteStateStore
 
 class TestReachability(unittest.TestCase):
     
@@ -39,13 +40,13 @@ class TestReachability(unittest.TestCase):
         # Le graphe doit contenir au moins 2 états (État initial -> État final)
         self.assertGreaterEqual(len(net.id_to_marking), 2)
 
-        # L'état initial doit être présent : P1=('Rouge',), P2=()
-        # Note : tes marquages sont des tuples de tuples triés
-        initial_marking = (('Rouge',), ())
+        # L'état initial doit être présent : P1=['Rouge'], P2=[]
+        # Note : les marquages sont encodés en multiensembles compacts
+        initial_marking = net.encode_marking({"p1": ["Rouge"]})
         self.assertIn(initial_marking, net.marking_to_id)
 
-        # L'état final doit être présent : P1=(), P2=('Rouge',)
-        final_marking = ((), ('Rouge',))
+        # L'état final doit être présent : P1=[], P2=['Rouge']
+        final_marking = net.encode_marking({"p2": ["Rouge"]})
         self.assertIn(final_marking, net.marking_to_id)
 
 
@@ -71,11 +72,723 @@ class TestReachability(unittest.TestCase):
             print(f"État {s} --{t}--> État {d}")
 
         # On vérifie l'état final où tout est arrivé dans "End"
-        # Les tuples étant triés dans ta fonction get_marking_tuple :
-        # Start = (), End = ('A', 'B')
-        final_state = ((), ('A', 'B'))
+        # L'ordre des jetons n'a pas d'importance dans le multiensemble :
+        # Start = [], End = ['B', 'A']
+        final_state = net.encode_marking({"End": ["B", "A"]})
         
         self.assertIn(final_state, net.marking_to_id)
 
+    def test_compiled_view_invalidation(self):
+        """
+        La vue compilée doit être reconstruite après un ajout d'arc
+        ou une suppression de nœud.
+        """
+        net = PetriNet()
+        net.add_place("p1", ["A"])
+        net.add_place("p2", [])
+        net.add_transition("t1")
+        net.add_arc("p1", "t1", "x")
+
+        view = net.compiled()
+        self.assertIs(view, net.compiled())
+        self.assertEqual(len(view.output_arcs("t1")), 0)
+
+        net.add_arc("t1", "p2", "x")
+        self.assertIsNot(view, net.compiled())
+        self.assertEqual(len(net.compiled().output_arcs("t1")), 1)
+
+        net.remove_node("p2")
+        self.assertEqual(net.compiled().place_names, ["p1"])
+        self.assertEqual(len(net.get_output_arcs(net.transitions["t1"])), 0)
+
+    def test_exploration_keeps_live_net(self):
+        """
+        L'exploration passe par successors() : les jetons de l'éditeur
+        (valeurs d'origine, ordre d'origine) ne doivent pas bouger.
+        """
+        net = PetriNet()
+        net.add_place("p1", ["B", "A"])
+        net.add_place("p2", [])
+        net.add_transition("t1")
+        net.add_arc("p1", "t1", "x")
+        net.add_arc("t1", "p2", "x")
+
+        start = net.encode_marking({"p1": ["A", "B"]})
+        succ = list(net.successors(start))
+        self.assertEqual(succ, [("t1", net.encode_marking({"p1": ["B"], "p2": ["A"]})),
+                                ("t1", net.encode_marking({"p1": ["A"], "p2": ["B"]}))])
+        # Même résultat (et même ordre) quel que soit l'ordre d'apparition des couleurs
+        other = PetriNet()
+        other.add_place("p1", ["B", "A"])
+        other.add_place("p2", [])
+        other.add_transition("t1")
+        other.add_arc("p1", "t1", "x")
+        other.add_arc("t1", "p2", "x")
+        succ = list(other.successors(other.get_marking_tuple()))
+        self.assertEqual(succ, [("t1", other.encode_marking({"p1": ["B"], "p2": ["A"]})),
+                                ("t1", other.encode_marking({"p1": ["A"], "p2": ["B"]}))])
+
+        net.build_reachability_graph()
+        self.assertEqual(len(net.id_to_marking), 4)
+        self.assertEqual(net.places["p1"].tokens, ["B", "A"])
+        self.assertEqual(net.places["p2"].tokens, [])
+
+    def test_compact_marking_encoding(self):
+        """
+        Multiensemble (couleur, nombre) : 1 et "1" sont distincts et les
+        sous-marquages identiques sont partagés entre états.
+        """
+        net = PetriNet()
+        net.add_place("p1", ["Rouge"] * 100 + [1, "1"])
+        net.add_place("p2", ["Rouge"] * 100 + [1, "1"])
+
+        marking = net.get_marking_tuple()
+        self.assertEqual(len(marking[0]), 3)
+        self.assertEqual(sum(count for _, count in marking[0]), 102)
+        self.assertIs(marking[0], marking[1])
+        self.assertEqual(net.decode_marking(marking)["p1"][-2:], [1, "1"])
+        self.assertIn("100 Rouge", net.format_marking(marking))
+
+    def test_budget_timeout(self):
+        """Une échéance dépassée rend un graphe partiel marqué incomplet."""
+        net = PetriNet()
+        net.add_place("p1", ["A"])
+        net.add_transition("gen")
+        net.add_arc("gen", "p1", "A")
+
+        self.assertFalse(net.build_reachability_graph(timeout=0))
+        self.assertEqual(net.stop_reason, "timeout")
+        self.assertEqual(net.frontier, [0])
+
+        self.assertFalse(net.build_reachability_graph(max_memory=10_000))
+        self.assertEqual(net.stop_reason, "max_memory")
+        self.assertEqual(len(net.frontier), 1)
+
+    def test_iter_state_space_early_stop(self):
+        """Le générateur peut être interrompu dès qu'un état intéressant apparaît."""
+        net = PetriNet()
+        net.add_place("p1", ["A"])
+        net.add_transition("gen")
+        net.add_arc("gen", "p1", "A")  # non borné : le BFS ne finirait jamais
+
+        target = net.encode_marking({"p1": ["A"] * 4})
+        seen = []
+        for event in net.iter_state_space():
+            if event[0] == "state":
+                seen.append(event[1])
+                if event[2] == target:
+                    break
+        self.assertEqual(seen, [0, 1, 2, 3])
+
+    def test_disk_store_reopen(self):
+        """
+        Graphe écrit dans SQLite (cache minuscule pour forcer les lectures
+        disque), puis rouvert sans ré-exploration.
+        """
+        def make_net():
+            net = PetriNet()
+            net.add_place("Start", ["A", "B", "C"])
+            net.add_place("End", [])
+            net.add_transition("T")
+            net.add_arc("Start", "T", "v")
+            net.add_arc("T", "End", "v")
+            return net
+
+        expected = make_net()
+        expected.build_reachability_graph()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "graph.db")
+            store = SQLiteStateStore(path, cache_size=2, batch_size=3)
+            net = make_net()
+            net.build_reachability_graph(store=store)
+            self.assertEqual(len(net.id_to_marking), len(expected.id_to_marking))
+            store.close()
+
+            reopened = SQLiteStateStore(path)
+            other = make_net()
+            other.load_state_space(reopened)
+            self.assertEqual(sorted(other.edges), sorted(expected.edges))
+            self.assertEqual(dict(other.id_to_marking.items()), dict(expected.id_to_marking.items()))
+            self.assertIn(other.encode_marking({"End": ["C", "A", "B"]}), other.marking_to_id)
+            self.assertEqual(list(other.edges.successors(0)), [e for e in expected.edges if e[0] == 0])
+
+            # Une métadonnée pickle (fichier non fiable) est refusée, jamais exécutée
+            reopened._db.execute("UPDATE meta SET value = ? WHERE key = 'colours'",
+                                 (pickle.dumps(["A", "B"]),))
+            with self.assertRaises(ValueError):
+                other.load_state_space(reopened)
+            reopened.close()
+
+    def test_parallel_matches_sequential(self):
+        """Exploration sur 2 processus : même graphe à la numérotation près."""
+        def make_net():
+            net = PetriNet()
+            net.add_place("a", ["Rouge", "Bleu"])
+            net.add_place("b", [])
+            net.add_transition("t")
+            net.add_transition("u")
+            net.add_arc("a", "t", "x")
+            net.add_arc("t", "b", "x")
+            net.add_arc("b", "u", "y")
+            net.add_arc("u", "a", "Vert")
+            return net
+
+        def as_set(net):
+            return sorted((net.export_marking(net.id_to_marking[s]),
+                           net.export_marking(net.id_to_marking[d]), t) for s, d, t in net.edges)
+
+        sequential = make_net()
+        sequential.build_reachability_graph()
+        parallel = make_net()
+        parallel.build_reachability_graph_parallel(workers=2, batch_size=2)
+
+        self.assertEqual(len(parallel.id_to_marking), len(sequential.id_to_marking))
+        self.assertEqual(as_set(parallel), as_set(sequential))
+        self.assertEqual(parallel.id_to_marking[0], parallel.get_marking_tuple())
+
+        # Réseau non borné : arrêt sur max_states, le dernier niveau est la frontière
+        counter = PetriNet()
+        counter.add_place("a", [0])
+        counter.add_transition("t")
+        counter.add_arc("a", "t", "x")
+        counter.add_arc("t", "a", "x + 1")
+        self.assertFalse(counter.build_reachability_graph_parallel(workers=2, max_states=20))
+        self.assertEqual(counter.stop_reason, "max_states")
+        self.assertEqual(len(counter.id_to_marking), 20)
+        self.assertEqual(counter.frontier, [19])
+
+        # Erreur dans un worker : relevée chez l'appelant au lieu de bloquer
+        broken = PetriNet()
+        broken.add_place("a", ["Rouge"])
+        broken.add_transition("t")
+        broken.add_arc("a", "t", "x")
+        broken.add_arc("t", "a", "x + 1")
+        with self.assertRaises(ValueError):
+            broken.build_reachability_graph_parallel(workers=2)
+
+    def test_stubborn_reduction(self):
+        """Branches indépendantes : 2^k états complets, k+1 avec la réduction,
+        et le blocage final est conservé."""
+        def make_net(k):
+            net = PetriNet()
+            for i in range(k):
+                net.add_place(f"in{i}", ["A"])
+                net.add_place(f"out{i}", [])
+                net.add_transition(f"t{i}")
+                net.add_arc(f"in{i}", f"t{i}", "x")
+                net.add_arc(f"t{i}", f"out{i}", "x")
+            return net
+
+        def deadlocks(net):
+            sources = {s for s, _, _ in net.edges}
+            return {net.export_marking(m) for i, m in net.id_to_marking.items() if i not in sources}
+
+        k = 5
+        full = make_net(k)
+        full.build_reachability_graph()
+        reduced = make_net(k)
+        reduced.build_reachability_graph(stubborn=True)
+
+        self.assertEqual(len(full.id_to_marking), 2 ** k)
+        self.assertEqual(len(reduced.id_to_marking), k + 1)
+        self.assertEqual(deadlocks(reduced), deadlocks(full))
+
+        # Place observée : toutes ses valeurs restent atteignables
+        visible = make_net(k)
+        visible.build_reachability_graph(stubborn=True, visible_places=["out0"])
+        index = visible.compiled().place_index["out0"]
+        seen = {visible.export_marking(m)[index] for m in visible.id_to_marking.values()}
+        self.assertEqual(seen, {full.export_marking(m)[index] for m in full.id_to_marking.values()})
+
+    def test_colour_symmetry(self):
+        """Couleurs interchangeables : un état par orbite, redéployable."""
+        def make_net(colours):
+            net = PetriNet()
+            net.add_place("p", list(colours))
+            net.add_place("q", [])
+            net.add_transition("t")
+            net.add_transition("u")
+            net.add_arc("p", "t", "x")
+            net.add_arc("t", "q", "x")
+            net.add_arc("q", "u", "y")
+            net.add_arc("u", "p", "y")
+            return net
+
+        colours = ["Rouge", "Bleu", "Vert"]
+        full = make_net(colours)
+        full.build_reachability_graph()
+        reduced = make_net(colours)
+        reduced.add_symmetry_class(colours)
+        reduced.build_reachability_graph(symmetry=True)
+
+        # Orbites = nombre de jetons dans q (0 à 3)
+        self.assertEqual(len(full.id_to_marking), 8)
+        self.assertEqual(len(reduced.id_to_marking), 4)
+        concrete = {reduced.export_marking(m) for _, m in reduced.iter_concrete_states()}
+        self.assertEqual(concrete, {full.export_marking(m) for m in full.id_to_marking.values()})
+
+        # Une couleur écrite en constante par un arc casse la symétrie
+        net = make_net(colours)
+        net.add_transition("v")
+        net.add_arc("p", "v", "x")
+        net.add_arc("v", "q", "Rouge")
+        with self.assertRaises(ValueError):
+            net.add_symmetry_class(colours)
+        self.assertEqual(net.symmetry_classes, [])
+
+        # Jetons n-uplets : les couleurs internes ne seraient pas renommées
+        net = PetriNet()
+        net.add_place("a", ["R", "B"])
+        for name in ("b", "c", "done"):
+            net.add_place(name, [])
+        net.add_transition("tag")
+        net.add_transition("join")
+        net.add_arc("a", "tag", "x")
+        net.add_arc("tag", "b", "(x, 1)")
+        net.add_arc("tag", "c", "x")
+        net.add_arc("c", "join", "y")
+        net.add_arc("b", "join", "(y, 1)")
+        net.add_arc("join", "done", "y")
+        with self.assertRaises(ValueError):
+            net.add_symmetry_class(["R", "B"])
+        self.assertEqual(net.symmetry_classes, [])
+
+        # Garde d'ordre : x < y distingue R de B (seul b: [B] est accessible)
+        def make_pair(guard):
+            net = PetriNet()
+            net.add_place("a", ["R", "B"])
+            net.add_place("b", [])
+            net.add_transition("t", guard)
+            net.add_arc("a", "t", "x")
+            net.add_arc("a", "t", "y")
+            net.add_arc("t", "b", "x")
+            return net
+
+        with self.assertRaises(ValueError):
+            make_pair("x < y").add_symmetry_class(["R", "B"])
+        full = make_pair("x != y")
+        full.build_reachability_graph()
+        reduced = make_pair("x != y")
+        reduced.add_symmetry_class(["R", "B"])
+        reduced.build_reachability_graph(symmetry=True)
+        self.assertEqual(len(reduced.id_to_marking), 2)
+        concrete = {reduced.export_marking(m) for _, m in reduced.iter_concrete_states()}
+        self.assertEqual(concrete, {full.export_marking(m) for m in full.id_to_marking.values()})
+
+    def test_binding_enumeration(self):
+        """Toutes les liaisons sont explorées ; une variable répétée lie la même couleur."""
+        net = PetriNet()
+        net.add_place("a", ["Rouge", "Bleu", "Vert"])
+        net.add_place("b", ["Vert", "Rouge", "Rouge"])
+        net.add_place("c", [])
+        net.add_transition("t")
+        net.add_arc("a", "t", "x")
+        net.add_arc("b", "t", "x")
+        net.add_arc("b", "t", "y")
+        net.add_arc("t", "c", "y")
+
+        start = net.get_marking_tuple()
+        bindings = net.bindings("t", start)
+        # x doit être dans a et b ; y prend un autre jeton de b
+        self.assertEqual(bindings, [{"x": "Rouge", "y": "Rouge"}, {"x": "Rouge", "y": "Vert"},
+                                    {"x": "Vert", "y": "Rouge"}])
+        self.assertEqual(len(list(net.successors(start))), 3)
+
+        # Le tir vivant prend la première liaison et ne touche pas aux autres jetons
+        self.assertTrue(net.fire("t"))
+        self.assertEqual(net.places["a"].tokens, ["Bleu", "Vert"])
+        self.assertEqual(net.places["b"].tokens, ["Vert"])
+        self.assertEqual(net.places["c"].tokens, ["Rouge"])
+        self.assertFalse(net.fire("t"))
+
+    def test_guards(self):
+        """Garde compilée : filtre les liaisons, noms libres = texte, picklable."""
+        net = PetriNet()
+        net.add_place("a", ["Rouge", "Bleu", "Vert"])
+        net.add_place("b", ["Rouge", "Bleu"])
+        net.add_place("c", [])
+        net.add_transition("t", "x != y and x != Vert")
+        net.add_arc("a", "t", "x")
+        net.add_arc("b", "t", "y")
+        net.add_arc("t", "c", "x")
+
+        def bindings(n):
+            return [(b["x"], b["y"]) for b in n.bindings("t")]
+
+        self.assertEqual(sorted(bindings(net)), [("Bleu", "Rouge"), ("Rouge", "Bleu")])
+        copy = pickle.loads(pickle.dumps(net))
+        self.assertEqual(bindings(copy), bindings(net))
+
+        # Garde toujours fausse : la transition n'est jamais tirable
+        net.add_transition("never", "1 > 2")
+        net.add_arc("a", "never", "x")
+        self.assertFalse(net.is_enabled("never"))
+
+        # Garde changée depuis l'éditeur : invalide -> inchangée, vide -> aucune
+        with self.assertRaises(ValueError):
+            net.set_guard("never", "x ==")
+        self.assertEqual(net.transitions["never"].guard, "1 > 2")
+        net.set_guard("never", "")
+        self.assertIsNone(net.transitions["never"].compiled_guard)
+        self.assertTrue(net.is_enabled("never"))
+        net.set_guard("never", "1 > 2")
+        self.assertFalse(net.is_enabled("never"))
+
+        with self.assertRaises(ValueError):
+            net.add_transition("bad", "x.__class__")
+        with self.assertRaises(ValueError):
+            net.add_transition("bad", "x ==")
+        with self.assertRaises(ValueError):
+            net.add_transition("bad", "x ** 99 > 1")
+
+        # Erreur à l'évaluation : garde fausse, inscription de sortie -> ValueError
+        net.add_transition("typed", "x + 1 > 2")
+        net.add_arc("a", "typed", "x")
+        self.assertFalse(net.is_enabled("typed"))
+        net.add_transition("produce")
+        net.add_arc("b", "produce", "x")
+        net.add_arc("produce", "c", "x + 1")
+        with self.assertRaisesRegex(ValueError, "produce"):
+            net.fire("produce")
+
+    def test_arc_inscriptions(self):
+        """Inscriptions compilées : multiplicités, n-uplets, ++ et constantes précalculées."""
+        net = PetriNet()
+        net.add_place("a", [("Rouge", 1), ("Bleu", 2)])
+        net.add_place("b", ["Vert", "Vert", "Vert"])
+        net.add_place("c", [])
+        net.add_transition("t")
+        net.add_arc("a", "t", "(x, k)")
+        net.add_arc("b", "t", "2'\"Vert\"")
+        net.add_arc("t", "c", "k'x ++ (x, k + 1) ++ 2'Jaune")
+
+        self.assertEqual(net.bindings("t"), [{"x": "Bleu", "k": 2}, {"x": "Rouge", "k": 1}])
+        # Le terme constant 2'Jaune est déjà un multiensemble d'ids
+        _, constant, terms = net.compiled().outputs[0][0]
+        self.assertEqual(constant, ((net.intern_colour("Jaune"), 2),))
+        self.assertEqual(len(terms), 2)
+
+        succ = dict((net.format_marking(m), t) for t, m in net.successors(net.get_marking_tuple()))
+        self.assertEqual(len(succ), 2)
+        self.assertTrue(net.fire("t"))
+        self.assertEqual(sorted(map(str, net.places["c"].tokens)),
+                         sorted(map(str, ["Jaune", "Jaune", "Bleu", "Bleu", ("Bleu", 3)])))
+        self.assertEqual(net.places["b"].tokens, ["Vert"])
+        self.assertFalse(net.fire("t"))
+
+        for text in ["x ++", "2'", "x.y", 1]:
+            with self.assertRaises(ValueError):
+                net.add_arc("t", "c", text)
+        with self.assertRaises(ValueError):
+            net.add_arc("a", "t", "x + 1")  # un arc d'entrée attend un motif
+
+    def test_enabled_set_incremental(self):
+        """L'ensemble tirable maintenu par fire égale un recalcul complet."""
+        net = PetriNet()
+        net.add_place("a", ["Rouge", "Bleu"])
+        net.add_place("b", [])
+        net.add_place("c", ["Vert"])
+        for name, src, dst, expr in [("t1", "a", "b", "x"), ("t2", "b", "c", "x"),
+                                     ("t3", "c", "a", "x"), ("t4", "b", "a", "Rouge")]:
+            net.add_transition(name, "x != Bleu" if name == "t2" else None)
+            net.add_arc(src, name, "x")
+            net.add_arc(name, dst, expr)
+
+        def recomputed():
+            net_copy = PetriNet()
+            for name, place in net.places.items():
+                net_copy.add_place(name, list(place.tokens))
+            for name, t in net.transitions.items():
+                net_copy.add_transition(name, t.guard)
+            for arc in net.arcs:
+                net_copy.add_arc(arc.source.name, arc.target.name, arc.expression)
+            return [t for t in net_copy.transitions if net_copy.bindings(t)]
+
+        self.assertEqual(net.enabled_transitions(), ["t1", "t3"])
+        for step in range(15):
+            enabled = net.enabled_transitions()
+            self.assertEqual(enabled, recomputed())
+            self.assertTrue(net.fire(enabled[step % len(enabled)]))
+        disabled = [t for t in net.transitions if t not in net.enabled_transitions()]
+        self.assertTrue(all(not net.fire(t) for t in disabled))
+
+        # Modification directe des jetons : refresh_marking() resynchronise
+        net.places["b"].tokens.append("Vert")
+        net.refresh_marking()
+        self.assertIn("t2", net.enabled_transitions())
+
+    def test_live_interning_bounded(self):
+        """Tirs en série : les caches d'interning restent bornés."""
+        import model
+        net = PetriNet()
+        net.add_place("a", [0])
+        net.add_transition("t")
+        net.add_arc("a", "t", "x")
+        net.add_arc("t", "a", "x + 1")
+        limit, model.LIVE_INTERN_LIMIT = model.LIVE_INTERN_LIMIT, 10
+        try:
+            for _ in range(100):
+                self.assertTrue(net.fire("t"))
+            self.assertLessEqual(len(net._submarkings), 11)
+            self.assertLessEqual(len(net._sub_index), 11)
+        finally:
+            model.LIVE_INTERN_LIMIT = limit
+        self.assertEqual(net.places["a"].tokens, [100])
+
+    def test_simulation_workers_independent(self):
+        """Simulation colorée : le résultat ne dépend que de la graine, pas du nombre de processus."""
+        net = PetriNet()
+        net.add_place("a", ["Rouge", "Bleu", "Vert"])
+        net.add_place("b", [])
+        net.add_place("d", [])
+        net.add_transition("t")
+        net.add_transition("u")
+        net.add_transition("k", "x != Rouge")
+        net.add_arc("a", "t", "x")
+        net.add_arc("t", "b", "x")
+        net.add_arc("b", "u", "x")
+        net.add_arc("u", "a", "x")
+        net.add_arc("b", "k", "x")
+        net.add_arc("k", "d", "x")
+
+        single = net.simulate(runs=40, steps=30, seed=3, workers=1)
+        pooled = net.simulate(runs=40, steps=30, seed=3, workers=2)
+        for key in ("firing_counts", "deadlocks", "place_distribution", "colour_mean"):
+            self.assertEqual(single[key], pooled[key])
+        self.assertEqual(single["steps"], 40 * 30)  # Rouge circule toujours : pas de blocage
+        self.assertEqual(single["deadlock_rate"], 0.0)
+        self.assertEqual(net.places["a"].tokens, ["Rouge", "Bleu", "Vert"])
+
+    def test_find_reachable_trace(self):
+        """Requêtes : arrêt au premier témoin, trace la plus courte rejouée."""
+        net = PetriNet()
+        net.add_place("a", ["Rouge", "Bleu", "Vert"])
+        net.add_place("b", [])
+        net.add_place("d", [])
+        net.add_transition("t")
+        net.add_transition("u")
+        net.add_transition("k", "x != Rouge")
+        net.add_arc("a", "t", "x")
+        net.add_arc("t", "b", "x")
+        net.add_arc("b", "u", "x")
+        net.add_arc("u", "a", "x")
+        net.add_arc("b", "k", "x")
+        net.add_arc("k", "d", "x")
+
+        result = net.find_reachable(lambda m: "Bleu" in m["d"])
+        self.assertTrue(result)
+        self.assertEqual(result.trace, ["t", "k"])
+        self.assertEqual([m["d"] for m in result.markings], [[], [], ["Bleu"]])
+        self.assertEqual(sorted(result.marking["a"]), ["Rouge", "Vert"])
+
+        # Rouge circule toujours : aucun blocage, preuve par exploration complète
+        none = net.find_deadlock()
+        self.assertFalse(none)
+        self.assertIsNone(none.stop_reason)
+        self.assertFalse(net.find_reachable(lambda m: False, max_states=3))
+        self.assertEqual(net.find_reachable(lambda m: False, max_states=3).stop_reason, "max_states")
+
+        net.add_place("r", [])
+        net.add_transition("drop", "x == Rouge")
+        net.add_arc("b", "drop", "x")
+        net.add_arc("drop", "r", "x")
+        dead = net.find_deadlock()
+        self.assertTrue(dead)
+        self.assertEqual(len(dead.trace), 6)
+        self.assertEqual(sorted(dead.marking["d"]), ["Bleu", "Vert"])
+        self.assertEqual(dead.marking["r"], ["Rouge"])
+        self.assertEqual(net.places["a"].tokens, ["Rouge", "Bleu", "Vert"])
+
+    def test_streaming_export(self):
+        """Export pendant l'exploration : DOT / GraphML lisibles, binaire relu à l'identique."""
+        import export
+        import xml.etree.ElementTree as ET
+        net = PetriNet()
+        net.add_place("Start", ["A", "B", (1, "x")])
+        net.add_place("End", [])
+        net.add_transition("T")
+        net.add_arc("Start", "T", "v")
+        net.add_arc("T", "End", "v")
+        net.build_reachability_graph()
+
+        dot = io.StringIO()
+        export.export_exploration(net, dot, "dot")
+        self.assertEqual(dot.getvalue().count("->"), len(net.edges))
+
+        graphml = io.StringIO()
+        export.export_exploration(net, graphml, "graphml")
+        root = ET.fromstring(graphml.getvalue())
+        ns = "{http://graphml.graphdrawing.org/xmlns}"
+        self.assertEqual(len(root.findall(f"{ns}graph/{ns}node")), len(net.id_to_marking))
+
+        binary = io.BytesIO()
+        budget = export.export_exploration(net, binary, "binary", max_states=5)
+        self.assertEqual(budget.stop_reason, "max_states")
+        binary = io.BytesIO()
+        export.export_exploration(net, binary, "binary")
+        graph = export.BinaryGraph(binary)
+        self.assertEqual(graph.place_names, ["End", "Start"])
+        self.assertEqual({state_id: marking for state_id, marking in graph.states()},
+                         {state_id: net.export_marking(m) for state_id, m in net.id_to_marking.items()})
+        self.assertEqual(list(graph.edges()), list(net.edges))
+
+    def test_reachability_cache(self):
+        """Cache par empreinte : relu en mémoire puis sur disque, invalidé par une garde."""
+        from cache import ReachabilityCache, fingerprint
+        def make_net(tokens):
+            net = PetriNet()
+            net.add_place("Start", tokens)
+            net.add_place("End", [])
+            net.add_transition("T")
+            net.add_arc("Start", "T", "v")
+            net.add_arc("T", "End", "v")
+            return net
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ReachabilityCache(tmp)
+            net = make_net(["A", "B", "C"])
+            net.build_reachability_graph(cache=cache)
+            expected = (dict(net.id_to_marking), list(net.edges))
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+            # Même réseau, jetons dans un autre ordre : même empreinte
+            other = make_net(["C", "A", "B"])
+            self.assertEqual(fingerprint(other), fingerprint(net))
+            self.assertTrue(other.build_reachability_graph(cache=cache))
+            self.assertEqual(cache.hits, 1)
+            self.assertEqual((dict(other.id_to_marking), list(other.edges)), expected)
+            self.assertEqual(other.marking_to_id[other.id_to_marking[7]], 7)
+
+            # Nouveau processus (cache vide en mémoire) : relu sur disque
+            fresh = ReachabilityCache(tmp)
+            again = make_net(["A", "B", "C"])
+            again.build_reachability_graph(cache=fresh)
+            self.assertEqual(fresh.hits, 1)
+            self.assertEqual(list(again.edges), expected[1])
+
+            # Un fichier pickle déposé à la place d'une entrée n'est jamais exécuté
+            import pickle
+            key = net._cache_key(fresh)
+            self.assertTrue(os.path.exists(fresh._path(key)))
+            with open(fresh._path(key), "wb") as f:
+                f.write(pickle.dumps(os.system))
+            planted = ReachabilityCache(tmp)
+            self.assertIsNone(planted.get(key))
+            self.assertFalse(os.path.exists(planted._path(key)))
+
+            again.transitions["T"].guard = "v != A"
+            again.invalidate()
+            self.assertNotEqual(fingerprint(again), fingerprint(net))
+            self.assertNotEqual(fingerprint(net, stubborn=True), fingerprint(net))
+
+            # Plafond disque minuscule : seule la dernière entrée reste
+            small = ReachabilityCache(os.path.join(tmp, "small"), max_disk=1)
+            make_net(["A"]).build_reachability_graph(cache=small)
+            make_net(["B"]).build_reachability_graph(cache=small)
+            self.assertEqual(len(os.listdir(os.path.join(tmp, "small"))), 0)
+
+    def test_background_analysis(self):
+        """Exploration dans un processus : même graphe, annulation propre, réseau modifié ignoré."""
+        import time
+        from cache import ReachabilityCache
+        from worker import AnalysisJob
+
+        def wait(job):
+            deadline = time.monotonic() + 30
+            while not job.poll():
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+
+        net = PetriNet()
+        net.add_place("Start", ["A", "B", "C"])
+        net.add_place("End", [])
+        net.add_transition("T")
+        net.add_arc("Start", "T", "v")
+        net.add_arc("T", "End", "v")
+        net.build_reachability_graph()
+        expected = (dict(net.id_to_marking), list(net.edges))
+
+        cache = ReachabilityCache()
+        net.init_state_space_structures()
+        job = AnalysisJob(net, cache=cache)
+        wait(job)
+        self.assertIsNone(job.error)
+        self.assertEqual((dict(net.id_to_marking), list(net.edges)), expected)
+        self.assertTrue(AnalysisJob(net, cache=cache).finished)  # relu dans le cache
+
+        # Réseau modifié pendant l'analyse : le résultat n'est pas chargé
+        job = AnalysisJob(net)
+        net.places["Start"].tokens.append("D")
+        wait(job)
+        self.assertIsNotNone(job.error)
+        self.assertEqual(len(net.id_to_marking), len(expected[0]))
+
+        # Réseau non borné : seule l'annulation arrête l'exploration
+        endless = PetriNet()
+        endless.add_place("p", ["A"])
+        endless.add_place("q", [])
+        endless.add_transition("t")
+        endless.add_arc("p", "t", "x")
+        endless.add_arc("t", "p", "x")
+        endless.add_arc("t", "q", "x")
+        job = AnalysisJob(endless)
+        self.assertFalse(job.poll())
+        job.cancel()
+        self.assertTrue(job.cancelled)
+        self.assertFalse(job._process.is_alive())
+        self.assertEqual(endless.id_to_marking, {})
+
+        # Export en arrière-plan : borné par max_states, un export annulé ne laisse rien
+        from worker import ExportJob
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "graphe.dot")
+            job = ExportJob(endless, path, "dot", max_states=50)
+            wait(job)
+            self.assertIsNone(job.error)
+            self.assertEqual(job.stop_reason, "max_states")
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            self.assertTrue(text.startswith("digraph") and text.endswith("}\n"))
+            job = ExportJob(endless, path, "dot")
+            job.cancel()
+            self.assertFalse(os.path.exists(path))
+
+    def test_graph_layout(self):
+        """Disposition par couches BFS (NumPy), mise en cache, partie visible et amas."""
+        import numpy as np
+        import graph_view
+        net = PetriNet()
+        net.add_place("Start", ["A", "B", "C"])
+        net.add_place("End", [])
+        net.add_transition("T")
+        net.add_arc("Start", "T", "v")
+        net.add_arc("T", "End", "v")
+        net.build_reachability_graph()
+
+        n, src, dst = graph_view.edge_arrays(net)
+        depth = graph_view.bfs_depths(n, src, dst)
+        for state_id, marking in net.id_to_marking.items():
+            self.assertEqual(depth[state_id], len(net.decode_marking(marking)["End"]))
+
+        positions = graph_view.layered_layout(n, src, dst)
+        self.assertEqual(positions[:, 1].tolist(), (depth * graph_view.LAYER_SPACING).tolist())
+        self.assertEqual(len({tuple(p) for p in positions.tolist()}), n)  # aucun chevauchement
+        self.assertIs(graph_view.layout_for(net, "layered"), graph_view.layout_for(net, "layered"))
+        self.assertTrue(np.isfinite(graph_view.layout_for(net, "force")).all())
+        # Disposition liée au graphe : une nouvelle construction (autres options,
+        # graphe partiel...) ne réutilise jamais les positions de la précédente
+        layered = graph_view.layout_for(net, "layered")
+        net.build_reachability_graph(stubborn=True)
+        self.assertIsNot(graph_view.layout_for(net, "layered"), layered)
+        self.assertEqual(len(graph_view.layout_for(net, "layered")), len(net.id_to_marking))
+
+        screen = np.array([[5.0, 5.0], [12.0, 8.0], [500.0, 5.0], [-100.0, 50.0]])
+        self.assertEqual(graph_view.visible_mask(screen, 400, 300).tolist(), [True, True, False, False])
+        inverse, centres, counts = graph_view.cluster_points(screen[:3], 40)
+        self.assertEqual(sorted(counts.tolist()), [1, 2])
+        self.assertEqual(inverse[0], inverse[1])
+        self.assertEqual(centres[inverse[0]].tolist(), [8.5, 6.5])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
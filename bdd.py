@@ -0,0 +1,216 @@
+#bdd.py
+# Diagrammes de décision binaires (BDD réduits et ordonnés), en Python pur.
+# Un nœud est un entier : 0 = FAUX, 1 = VRAI, les autres indexent les
+# tableaux var / low / high. La table unique garantit qu'une fonction
+# booléenne n'a qu'un seul nœud ; le cache d'opérations mémorise les
+# résultats de apply / and_exists. Aucune opération n'est récursive.
+# Les variables sont des niveaux 0..n_vars-1 (0 = en haut du diagramme).
+
+FALSE = 0
+TRUE = 1
+
+
+class BDD:
+    def __init__(self, n_vars):
+        self.n_vars = n_vars
+        # Les terminaux sont au niveau n_vars (sous toutes les variables)
+        self._var = [n_vars, n_vars]
+        self._low = [0, 1]
+        self._high = [0, 1]
+        self._unique = {}   # (var, low, high) -> nœud
+        self._cache = {}    # (opération, a, b) -> nœud
+
+    def __len__(self):
+        """Nombre de nœuds (terminaux compris)."""
+        return len(self._var)
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    # --- Construction ---
+
+    def node(self, var, low, high):
+        if low == high:
+            return low
+        key = (var, low, high)
+        n = self._unique.get(key)
+        if n is None:
+            n = len(self._var)
+            self._var.append(var)
+            self._low.append(low)
+            self._high.append(high)
+            self._unique[key] = n
+        return n
+
+    def var(self, level):
+        return self.node(level, FALSE, TRUE)
+
+    def nvar(self, level):
+        return self.node(level, TRUE, FALSE)
+
+    def cube(self, values):
+        """Conjonction de littéraux : values = {niveau: booléen}."""
+        result = TRUE
+        for level in sorted(values, reverse=True):
+            result = self.node(level, FALSE, result) if values[level] else self.node(level, result, FALSE)
+        return result
+
+    def level(self, n):
+        return self._var[n]
+
+    # --- Opérations ---
+    # Parcours itératifs (pile explicite) : la profondeur ne dépend pas de la
+    # limite de récursion de Python, quel que soit le nombre de variables.
+
+    @staticmethod
+    def _terminal(op, a, b):
+        """Résultat immédiat de op sur a, b ; None s'il faut descendre."""
+        if op == "and":
+            if a == FALSE or b == FALSE: return FALSE
+            if a == TRUE: return b
+            if b == TRUE or a == b: return a
+        elif op == "or":
+            if a == TRUE or b == TRUE: return TRUE
+            if a == FALSE: return b
+            if b == FALSE or a == b: return a
+        elif op == "xor":
+            if a == b: return FALSE
+            if a == FALSE: return b
+            if b == FALSE: return a
+        else:  # "diff"
+            if a == FALSE or b == TRUE or a == b: return FALSE
+            if b == FALSE: return a
+        return None
+
+    def apply(self, op, a, b):
+        """op parmi "and", "or", "xor", "diff" (a et non b)."""
+        if op not in ("and", "or", "xor", "diff"):
+            raise ValueError(f"Opération inconnue : {op}")
+        commutative = op != "diff"
+        cache, var, low, high = self._cache, self._var, self._low, self._high
+        # Pile de tâches : (False, a, b) = calculer op(a, b) ;
+        # (True, clé, v) = assembler le nœud avec les deux derniers résultats
+        stack = [(False, a, b)]
+        results = []
+        while stack:
+            build, x, y = stack.pop()
+            if build:
+                hi = results.pop()
+                results[-1] = cache[x] = self.node(y, results[-1], hi)
+                continue
+            result = self._terminal(op, x, y)
+            if result is None:
+                if commutative and x > y:
+                    x, y = y, x  # une seule entrée de cache
+                key = (op, x, y)
+                result = cache.get(key)
+            if result is not None:
+                results.append(result)
+                continue
+            vx, vy = var[x], var[y]
+            v = min(vx, vy)
+            x0, x1 = (low[x], high[x]) if vx == v else (x, x)
+            y0, y1 = (low[y], high[y]) if vy == v else (y, y)
+            stack.append((True, key, v))
+            stack.append((False, x1, y1))
+            stack.append((False, x0, y0))
+        return results[0]
+
+    def neg(self, a):
+        return self.apply("xor", a, TRUE)
+
+    def and_exists(self, f, g, levels):
+        """∃ levels . (f ∧ g), sans construire f ∧ g (produit relationnel)."""
+        if not levels:
+            return self.apply("and", f, g)
+        return self._and_exists(f, g, levels, max(levels))
+
+    def exists(self, f, levels):
+        return self.and_exists(f, TRUE, levels)
+
+    def _and_exists(self, f, g, levels, last):
+        cache, var, low, high = self._cache, self._var, self._low, self._high
+        # Tâches : (0, f, g, _) calculer ; (1, clé, v, (f1, g1)) la branche basse
+        # est calculée, lancer la haute ; (2, clé, v, _) combiner les deux
+        stack = [(0, f, g, None)]
+        results = []
+        while stack:
+            step, x, y, rest = stack.pop()
+            if step == 1:
+                if y in levels and results[-1] == TRUE:
+                    cache[x] = TRUE  # ∃ v : la branche basse suffit
+                    continue
+                stack.append((2, x, y, None))
+                stack.append((0, rest[0], rest[1], None))
+                continue
+            if step == 2:
+                hi = results.pop()
+                lo = results[-1]
+                results[-1] = cache[x] = self.apply("or", lo, hi) if y in levels else self.node(y, lo, hi)
+                continue
+
+            if x == FALSE or y == FALSE:
+                results.append(FALSE)
+                continue
+            if x == TRUE and y == TRUE:
+                results.append(TRUE)
+                continue
+            vx, vy = var[x], var[y]
+            v = min(vx, vy)
+            if v > last:
+                results.append(self.apply("and", x, y))  # plus aucune variable à éliminer
+                continue
+            if x > y:
+                x, y, vx, vy = y, x, vy, vx
+            key = ("and_exists", x, y, levels)
+            result = cache.get(key)
+            if result is not None:
+                results.append(result)
+                continue
+            x0, x1 = (low[x], high[x]) if vx == v else (x, x)
+            y0, y1 = (low[y], high[y]) if vy == v else (y, y)
+            stack.append((1, key, v, (x1, y1)))
+            stack.append((0, x0, y0, None))
+        return results[0]
+
+    # --- Requêtes ---
+
+    def count(self, f):
+        """Nombre d'affectations des n_vars variables qui satisfont f."""
+        var, low, high = self._var, self._low, self._high
+        memo = {FALSE: 0, TRUE: 1}
+        stack = [f]
+        while stack:
+            n = stack[-1]
+            if n in memo:
+                stack.pop()
+                continue
+            lo, hi = low[n], high[n]
+            missing = [c for c in (lo, hi) if c not in memo]
+            if missing:
+                stack.extend(missing)
+                continue
+            v = var[n]
+            memo[n] = (memo[lo] << (var[lo] - v - 1)) + (memo[hi] << (var[hi] - v - 1))
+            stack.pop()
+        return memo[f] << var[f]
+
+    def pick(self, f):
+        """Une affectation {niveau: booléen} qui satisfait f (variables libres à FAUX), None si f = FAUX."""
+        if f == FALSE:
+            return None
+        values = dict.fromkeys(range(self.n_vars), False)
+        while f != TRUE:
+            v = self._var[f]
+            if self._low[f] != FALSE:
+                f = self._low[f]
+            else:
+                values[v] = True
+                f = self._high[f]
+        return values
+
+    def evaluate(self, f, values):
+        """Valeur de f pour une affectation complète {niveau: booléen}."""
+        while f > TRUE:
+            f = self._high[f] if values[self._var[f]] else self._low[f]
+        return f == TRUE
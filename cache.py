@@ -0,0 +1,152 @@
+#cache.py
+# Cache des graphes d'états complets, indexé par l'empreinte du réseau.
+# L'empreinte couvre tout ce qui détermine le graphe (et sa numérotation) :
+# places et marquage initial, transitions et gardes dans leur ordre, arcs et
+# inscriptions dans leur ordre, classes de symétrie, options d'exploration.
+# Deux niveaux, tous deux LRU et plafonnés en octets :
+#   - mémoire : graphes sérialisés, relus sans partage d'objets ;
+#   - disque  : un fichier <empreinte>.bin par graphe dans `directory`,
+#               date de modification = dernier accès.
+# Les valeurs sont des données simples (voir _state_space_payload des réseaux)
+# sérialisées avec marshal, comme storage : relire un fichier du cache
+# n'exécute jamais de code. Un fichier illisible compte comme absent.
+import hashlib
+import marshal
+import os
+from collections import OrderedDict
+
+FINGERPRINT_VERSION = 2
+MARSHAL_VERSION = 4
+SUFFIX = ".bin"
+
+
+def _tokens_key(tokens):
+    """Multiset de jetons indépendant de l'ordre de la liste."""
+    return tuple(sorted((type(v).__name__, repr(v)) for v in tokens))
+
+
+def fingerprint(net, **options):
+    """Empreinte hexadécimale (blake2b) de la structure, du marquage initial et des options."""
+    import model
+    if isinstance(net, model.PetriNet):
+        description = (
+            "coloured",
+            tuple(sorted((name, _tokens_key(place.tokens)) for name, place in net.places.items())),
+            tuple((name, transition.guard) for name, transition in net.transitions.items()),
+            tuple((arc.source.name, arc.target.name, arc.expression) for arc in net.arcs),
+            tuple(_tokens_key(colours) for colours in net.symmetry_classes),
+        )
+    else:
+        description = (
+            "integer",
+            tuple(sorted((name, place.tokens) for name, place in net.places.items())),
+            tuple(net.transitions),
+            tuple((arc.source.name, arc.target.name, arc.weight) for arc in net.arcs),
+        )
+    text = repr((FINGERPRINT_VERSION, description, tuple(sorted(options.items()))))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=20).hexdigest()
+
+
+class ReachabilityCache:
+    """
+    Graphes d'états complets déjà calculés. directory=None : mémoire seulement.
+    max_memory / max_disk : plafonds en octets (sérialisés), les entrées les
+    moins récemment utilisées sont évincées au-delà.
+    """
+    def __init__(self, directory=None, max_memory=64 * 2 ** 20, max_disk=512 * 2 ** 20):
+        self.directory = directory
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self._memory = OrderedDict()  # empreinte -> octets marshal
+        self._memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, net, **options):
+        return fingerprint(net, **options)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, key):
+        """Résultat mis en cache pour key (nouvelle copie à chaque appel), None sinon."""
+        blob = self._memory.get(key)
+        if blob is not None:
+            self._memory.move_to_end(key)
+        elif self.directory is not None:
+            try:
+                with open(self._path(key), "rb") as f:
+                    blob = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                blob = None
+            if blob is not None:
+                self._remember(key, blob)
+        value = None
+        if blob is not None:
+            try:
+                value = marshal.loads(blob)
+            except (EOFError, ValueError, TypeError):
+                self._discard(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """value : données simples (tuples, listes, nombres, chaînes, octets) ; ValueError sinon."""
+        blob = marshal.dumps(value, MARSHAL_VERSION)
+        self._remember(key, blob)
+        if self.directory is not None:
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, self._path(key))  # jamais de fichier à moitié écrit
+            self._evict_disk()
+
+    def _remember(self, key, blob):
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        if len(blob) > self.max_memory:
+            return
+        self._memory[key] = blob
+        self._memory_bytes += len(blob)
+        while self._memory_bytes > self.max_memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _discard(self, key):
+        blob = self._memory.pop(key, None)
+        if blob is not None:
+            self._memory_bytes -= len(blob)
+        if self.directory is not None:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        self._memory.clear()
+        self._memory_bytes = 0
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(SUFFIX):
+                    os.remove(os.path.join(self.directory, name))
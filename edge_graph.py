@@ -0,0 +1,233 @@
+#edge_graph.py
+# Arêtes d'un graphe d'états en mémoire, au format CSR (compressed sparse row) :
+#   offsets[s] .. offsets[s+1] : positions des arêtes sortantes de l'état s,
+#   targets[i]                 : état cible de l'arête i,
+#   labels[i]                  : id de la transition (noms dans transition_names).
+# Environ 8 octets par arête au lieu d'un tuple (src, dst, nom) de 80+ octets.
+# Les ids (états, transitions) tiennent sur 32 bits : au-delà, OverflowError.
+# Une arête dont la source est déjà dépassée (hors ordre BFS) va dans un bloc
+# à part, trié par source (late_src / late_dst / late_tid) : lire une source
+# combine les deux blocs, sans jamais reconstruire le CSR principal.
+# S'utilise comme l'ancienne liste edges (append, itération, in, len) et offre
+# la même méthode successors(state_id) que storage.EdgeLog.
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+MAX_ID = 2 ** 32 - 1
+
+
+def _ids(typecode, values):
+    """array(typecode, values) ; OverflowError explicite si un id dépasse MAX_ID."""
+    try:
+        return array(typecode, values)
+    except OverflowError:
+        raise OverflowError(f"Id supérieur à {MAX_ID} : trop grand pour EdgeGraph") from None
+
+
+class EdgeGraph:
+    def __init__(self):
+        self.transition_names = []   # id de transition -> nom
+        self._transition_ids = {}    # nom -> id
+        self.offsets = array("Q", [0])
+        self.targets = array("I")
+        self.labels = array("I")
+        # Arêtes arrivées hors ordre : tampon, puis bloc trié par source
+        self._late = []
+        self.late_src = array("Q")
+        self.late_dst = array("I")
+        self.late_tid = array("I")
+        self._reverse = None         # index des prédécesseurs, construit à la demande
+
+    def transition_id(self, name):
+        tid = self._transition_ids.get(name)
+        if tid is None:
+            tid = len(self.transition_names)
+            self._transition_ids[name] = tid
+            self.transition_names.append(name)
+        return tid
+
+    # --- Écriture ---
+
+    def append(self, edge):
+        src, dst, name = edge
+        self.add(src, dst, self.transition_id(name))
+
+    def add(self, src, dst, tid):
+        """Ajoute une arête ; rapide si les sources arrivent dans l'ordre (BFS)."""
+        self._reverse = None
+        last = len(self.offsets) - 2
+        if src < last:
+            self._late.append((src, dst, tid))
+            return
+        if not 0 <= dst <= MAX_ID:
+            raise OverflowError(f"Id d'état {dst} hors de [0, {MAX_ID}] : trop grand pour EdgeGraph")
+        if src > last:
+            self.offsets.extend([len(self.targets)] * (src - last))
+        self.targets.append(dst)
+        self.labels.append(tid)
+        self.offsets[-1] += 1
+
+    def _merge(self):
+        """Range le tampon dans le bloc hors ordre (tri stable par source, coût en arêtes hors ordre)."""
+        if not self._late:
+            return
+        edges = list(zip(self.late_src, self.late_dst, self.late_tid))
+        edges.extend(self._late)
+        edges.sort(key=lambda e: e[0])
+        self._late = []
+        self.late_src = _ids("Q", [e[0] for e in edges])
+        self.late_dst = _ids("I", [e[1] for e in edges])
+        self.late_tid = _ids("I", [e[2] for e in edges])
+
+    def _late_range(self, state_id):
+        return bisect_left(self.late_src, state_id), bisect_right(self.late_src, state_id)
+
+    def _compact(self):
+        """Replie le bloc hors ordre dans le CSR principal (avant un accès direct aux tableaux)."""
+        self._merge()
+        if not self.late_src:
+            return
+        offsets, targets, labels = array("Q", [0]), array("I"), array("I")
+        j, n_late = 0, len(self.late_src)
+        for s in range(len(self.offsets) - 1):
+            start, end = self.offsets[s], self.offsets[s + 1]
+            targets.extend(self.targets[start:end])
+            labels.extend(self.labels[start:end])
+            k = j
+            while k < n_late and self.late_src[k] == s:
+                k += 1
+            targets.extend(self.late_dst[j:k])
+            labels.extend(self.late_tid[j:k])
+            j = k
+            offsets.append(len(targets))
+        self.offsets, self.targets, self.labels = offsets, targets, labels
+        self.late_src, self.late_dst, self.late_tid = array("Q"), array("I"), array("I")
+
+    # --- Lecture ---
+
+    def __len__(self):
+        return len(self.targets) + len(self.late_src) + len(self._late)
+
+    def _iter_ids(self):
+        """(src, dst, id_transition) groupées par source, ordre d'ajout conservé par source."""
+        self._merge()
+        targets, labels, offsets = self.targets, self.labels, self.offsets
+        late_src, late_dst, late_tid = self.late_src, self.late_dst, self.late_tid
+        j, n_late = 0, len(late_src)
+        for s in range(len(offsets) - 1):
+            for i in range(offsets[s], offsets[s + 1]):
+                yield (s, targets[i], labels[i])
+            while j < n_late and late_src[j] == s:
+                yield (s, late_dst[j], late_tid[j])
+                j += 1
+
+    def __iter__(self):
+        names = self.transition_names
+        for s, dst, tid in self._iter_ids():
+            yield (s, dst, names[tid])
+
+    def __contains__(self, edge):
+        src, dst, name = edge
+        tid = self._transition_ids.get(name)
+        return tid is not None and (dst, tid) in self.successor_ids(src)
+
+    def successor_ids(self, state_id):
+        """[(cible, id_transition), ...] des arêtes sortantes de state_id."""
+        self._merge()
+        if state_id + 1 >= len(self.offsets):
+            return []
+        start, end = self.offsets[state_id], self.offsets[state_id + 1]
+        result = list(zip(self.targets[start:end], self.labels[start:end]))
+        if self.late_src:
+            lo, hi = self._late_range(state_id)
+            result.extend(zip(self.late_dst[lo:hi], self.late_tid[lo:hi]))
+        return result
+
+    def successors(self, state_id):
+        """Arêtes sortantes (src, dst, transition), comme storage.EdgeLog."""
+        names = self.transition_names
+        return [(state_id, dst, names[tid]) for dst, tid in self.successor_ids(state_id)]
+
+    def out_degree(self, state_id):
+        self._merge()
+        if state_id + 1 >= len(self.offsets):
+            return 0
+        degree = self.offsets[state_id + 1] - self.offsets[state_id]
+        if self.late_src:
+            lo, hi = self._late_range(state_id)
+            degree += hi - lo
+        return degree
+
+    def predecessors(self, state_id):
+        """Arêtes entrantes (src, dst, transition) ; l'index inverse est construit au premier appel."""
+        if self._reverse is None:
+            self._reverse = self._build_reverse()
+        offsets, sources, labels = self._reverse
+        if state_id + 1 >= len(offsets):
+            return []
+        names = self.transition_names
+        return [(sources[k], state_id, names[labels[k]])
+                for k in range(offsets[state_id], offsets[state_id + 1])]
+
+    def _build_reverse(self):
+        """CSR transposé par tri comptage : (offsets, sources, ids de transition)."""
+        self._merge()
+        n = max(len(self.offsets) - 1, max(self.targets, default=-1) + 1,
+                max(self.late_dst, default=-1) + 1)
+        counts = [0] * (n + 1)
+        for _, dst, _ in self._iter_ids():
+            counts[dst + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        offsets = array("Q", counts)
+        position = list(counts[:-1])
+        size = len(self)
+        sources = array("I", bytes(4 * size))
+        labels = array("I", bytes(4 * size))
+        for s, dst, tid in self._iter_ids():
+            k = position[dst]
+            sources[k] = s
+            labels[k] = tid
+            position[dst] += 1
+        return offsets, sources, labels
+
+    def as_numpy(self):
+        """
+        (offsets, targets, labels) en tableaux NumPy, sans copie. Ce sont des
+        vues sur les tableaux vivants : tant qu'elles existent, tout ajout
+        d'arête lève BufferError (copier les tableaux pour continuer à écrire).
+        """
+        import numpy as np
+        self._compact()
+        return (np.frombuffer(self.offsets, dtype=np.uint64),
+                np.frombuffer(self.targets, dtype=np.uint32),
+                np.frombuffer(self.labels, dtype=np.uint32))
+
+    def to_data(self):
+        """Forme en données simples (noms + octets des tableaux CSR), pour marshal : voir from_data."""
+        self._compact()
+        return (list(self.transition_names), self.offsets.tobytes(),
+                self.targets.tobytes(), self.labels.tobytes())
+
+    @classmethod
+    def from_data(cls, data):
+        names, offsets, targets, labels = data
+        graph = cls()
+        for name in names:
+            graph.transition_id(name)
+        graph.offsets = array("Q", offsets)
+        graph.targets = array("I", targets)
+        graph.labels = array("I", labels)
+        return graph
+
+    def memory_bytes(self):
+        """Octets réellement alloués : tableaux (sur-allocation comprise), index inverse, noms."""
+        self._merge()
+        size = sum(sys.getsizeof(a) for a in (self.offsets, self.targets, self.labels,
+                                              self.late_src, self.late_dst, self.late_tid))
+        if self._reverse is not None:
+            size += sum(sys.getsizeof(a) for a in self._reverse)
+        size += sys.getsizeof(self.transition_names) + sys.getsizeof(self._transition_ids)
+        size += sum(sys.getsizeof(name) for name in self.transition_names)
+        return size
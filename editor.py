@@ -2,6 +2,10 @@
 import json
 import tkinter.filedialog as filedialog
 
+# Limites de l'export (écrit au fil de l'exploration, en arrière-plan)
+EXPORT_MAX_STATES = 1_000_000
+EXPORT_TIMEOUT = 600  # secondes
+
 class PetriEditor:
     def __init__(self, model, view):
         self.model = model
@@ -29,6 +33,11 @@ class PetriEditor:
         elif mode == "LOAD":
             self.load_project()
             return
+        elif mode == "EXPORT":
+            self.export_graph()
+            return
+        elif mode == "FIRE":
+            self.view.highlight_enabled()
             
         self.view.update_mode_label(info)
 
@@ -54,6 +63,18 @@ class PetriEditor:
             self.model.add_transition(name)
             self.view.draw_transition_visual(x, y, name)
 
+        # --- MODE GARDE (condition de tir d'une transition) ---
+        elif self.mode == "GUARD":
+            if item_name not in self.model.transitions: return
+            guard = self.view.ask_guard(self.model.transitions[item_name].guard)
+            if guard is None: return
+            try:
+                self.model.set_guard(item_name, guard.strip())
+            except ValueError as e:
+                self.view.show_error("Garde invalide", str(e))
+                return
+            self.view.set_guard_visual(item_name, self.model.transitions[item_name].guard)
+
         # --- MODE ARC (CPN : Avec Variable) ---
         elif self.mode == "ARC":
             if not item_name: return
@@ -74,8 +95,14 @@ class PetriEditor:
                 self.view.update_mode_label("ARC (Source ?)")
                 return
 
-            # Création de l'arc dans le modèle et la vue
-            self.model.add_arc(source, target, var_name)
+            # Création de l'arc dans le modèle et la vue (inscription compilée ici)
+            try:
+                self.model.add_arc(source, target, var_name)
+            except ValueError as e:
+                self.view.show_error("Inscription invalide", str(e))
+                self.selected_source = None
+                self.view.update_mode_label("ARC (Source ?)")
+                return
             self.view.draw_arc_visual(source, target, var_name)
 
             # Reset pour le prochain arc
@@ -86,7 +113,12 @@ class PetriEditor:
         elif self.mode == "FIRE":
             if item_name and item_name.startswith("T"):
                 # Si le tir réussit, on rafraîchit l'affichage des jetons
-                if self.model.fire(item_name):
+                try:
+                    fired = self.model.fire(item_name)
+                except ValueError as e:
+                    self.view.show_error("Tir impossible", str(e))
+                    return
+                if fired:
                     self.view.refresh_tokens()
         
         # --- MODE DÉPLACEMENT ---
@@ -96,10 +128,8 @@ class PetriEditor:
 
         # --- MODE ANALYSE (Reachability) ---
         elif self.mode == "REACH":
-            # Construction et affichage du graphe
-            self.model.build_reachability_graph()
-            text = self.model.get_reachability_as_strings()
-            self.view.show_text_window("Graphe de reachability", text)
+            # Construction (dans un autre processus) et affichage du graphe
+            self.view.show_reachability()
 
         # --- MODE SUPPRESSION ---
         elif self.mode == "DELETE":
@@ -135,7 +165,7 @@ class PetriEditor:
         # Sauvegarde des Transitions
         for name, trans in self.model.transitions.items():
             x, y = self.view.name_to_coords.get(name, (0, 0))
-            data["transitions"].append({"name": name, "x": x, "y": y})
+            data["transitions"].append({"name": name, "x": x, "y": y, "guard": trans.guard})
 
         # Sauvegarde des Arcs (avec variable/expression)
         for arc in self.model.arcs:
@@ -150,6 +180,17 @@ class PetriEditor:
             with open(filename, 'w') as f: json.dump(data, f, indent=4)
             print(f"Sauvegardé : {filename}")
 
+    def export_graph(self):
+        """Exporte le graphe d'états dans un fichier, écrit pendant l'exploration (en arrière-plan)."""
+        import export
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".dot",
+            filetypes=[("Graphviz", "*.dot"), ("GraphML", "*.graphml"), ("Binaire compact", "*.pnrg")])
+        if not filename: return
+
+        self.view.run_export(filename, export.format_for(filename),
+                             max_states=EXPORT_MAX_STATES, timeout=EXPORT_TIMEOUT)
+
     def load_project(self):
         """Chargement d'un projet JSON"""
         filename = filedialog.askopenfilename(filetypes=[("JSON", "*.json")])
@@ -169,12 +210,26 @@ class PetriEditor:
 
         # Chargement Transitions
         for t in data["transitions"]:
-            self.model.add_transition(t["name"])
-            self.view.draw_transition_visual(t["x"], t["y"], t["name"])
+            guard = t.get("guard")
+            try:
+                self.model.add_transition(t["name"], guard)
+            except ValueError as e:
+                # Transition gardée, mais sans sa garde : le reste du projet se charge
+                self.view.show_error("Garde invalide", f"{t['name']} : {e}\nTransition chargée sans garde.")
+                guard = None
+                self.model.add_transition(t["name"])
+            self.view.draw_transition_visual(t["x"], t["y"], t["name"], guard)
 
         # Chargement Arcs
         for a in data["arcs"]:
             # On récupère "expression" (nouveau format) ou "weight" (ancien format fallback)
             expr = a.get("expression", a.get("weight", "x"))
-            self.model.add_arc(a["source"], a["target"], expr)
+            if isinstance(expr, int) and not isinstance(expr, bool):
+                # Ancien poids entier : k jetons quelconques, k'x
+                expr = "x" if expr == 1 else f"{expr}'x"
+            try:
+                self.model.add_arc(a["source"], a["target"], expr)
+            except ValueError as e:
+                self.view.show_error("Inscription invalide", f"{a['source']} -> {a['target']} : {e}")
+                continue
             self.view.draw_arc_visual(a["source"], a["target"], expr)
\ No newline at end of file
@@ -0,0 +1,144 @@
+#exploration.py
+# Limites de ressources et suivi de progression, partagés par les
+# explorateurs de model.py et petri_model.py
+import sys
+import time
+from array import array
+
+# Coût mémoire approximatif d'une entrée dans marking_to_id + id_to_marking,
+# plus sa case dans les offsets de edge_graph.EdgeGraph
+STATE_OVERHEAD = 2 * 104 + 8
+# Coût d'une arête dans EdgeGraph : cible + id de transition (uint32 chacun)
+EDGE_BYTES = 8
+
+
+def approx_size(obj):
+    """Taille (octets) d'un marquage : tuple + sous-tuples, sans dédoublonnage."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, tuple):
+        for item in obj:
+            size += approx_size(item)
+    return size
+
+
+class ExplorationBudget:
+    """
+    Limites d'une exploration : nombre d'états, profondeur BFS, durée
+    (secondes) et mémoire approximative (octets). None = pas de limite.
+    progress(stats) est appelé au plus toutes les progress_interval secondes
+    avec un dict : states, edges, frontier, depth, elapsed, states_per_sec.
+    """
+    def __init__(self, max_states=None, max_depth=None, timeout=None,
+                 max_memory=None, progress=None, progress_interval=0.5):
+        self.max_states = max_states
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.bytes_per_state = STATE_OVERHEAD
+        # Renseignés par l'explorateur quand une limite est atteinte
+        self.stop_reason = None
+        self.frontier = []
+        self.start()
+
+    def start(self, sample_marking=None):
+        """(Re)démarre le chronomètre ; le marquage exemple sert à estimer la mémoire."""
+        now = time.monotonic()
+        self.start_time = now
+        self.deadline = None if self.timeout is None else now + self.timeout
+        self._last_report = now
+        if sample_marking is not None:
+            self.bytes_per_state = approx_size(sample_marking) + STATE_OVERHEAD
+
+    def stop(self, reason, frontier):
+        self.stop_reason = reason
+        self.frontier = frontier
+
+    def memory_estimate(self, n_states, n_edges):
+        return n_states * self.bytes_per_state + n_edges * EDGE_BYTES
+
+    def exceeded(self, n_states, n_edges):
+        """Retourne la raison d'arrêt ('max_states', 'timeout', 'max_memory') ou None."""
+        if self.max_states is not None and n_states >= self.max_states:
+            return "max_states"
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return "timeout"
+        if self.max_memory is not None and self.memory_estimate(n_states, n_edges) >= self.max_memory:
+            return "max_memory"
+        return None
+
+    def report(self, n_states, n_edges, frontier, depth, force=False):
+        if self.progress is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_report < self.progress_interval:
+            return
+        self._last_report = now
+        elapsed = now - self.start_time
+        self.progress({
+            "states": n_states,
+            "edges": n_edges,
+            "frontier": frontier,
+            "depth": depth,
+            "elapsed": elapsed,
+            "states_per_sec": n_states / elapsed if elapsed > 0 else 0.0,
+        })
+
+
+class ParentPointers:
+    """
+    Arbre BFS compact pour reconstruire une trace sans garder les arêtes :
+    pour chaque état (ids consécutifs), id du parent et indice de la
+    transition tirée, dans deux tableaux d'entiers.
+    """
+    def __init__(self):
+        self.parent = array("q", [-1])      # l'état 0 est la racine
+        self.transition = array("l", [-1])
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, parent_id, t_idx):
+        """Enregistre le prochain état ; retourne son id."""
+        self.parent.append(parent_id)
+        self.transition.append(t_idx)
+        return len(self.parent) - 1
+
+    def path(self, state_id):
+        """[(indice_transition, id_état_atteint), ...] depuis la racine."""
+        steps = []
+        while state_id > 0:
+            steps.append((self.transition[state_id], state_id))
+            state_id = self.parent[state_id]
+        steps.reverse()
+        return steps
+
+
+class QueryResult:
+    """
+    Réponse d'une requête d'accessibilité (find_reachable / find_deadlock).
+        found      : un témoin a été trouvé (bool(result) == found) ;
+        trace      : noms des transitions tirées depuis le marquage initial ;
+        markings   : marquages le long de la trace (initial compris) ;
+        marking    : marquage témoin (None si rien trouvé) ;
+        states     : nombre d'états découverts avant l'arrêt ;
+        stop_reason: limite atteinte (voir ExplorationBudget), None si
+                     l'exploration a été menée à son terme ou arrêtée sur le témoin.
+    found False et stop_reason None : aucun marquage accessible ne convient.
+    """
+    def __init__(self, states, trace=None, markings=None, stop_reason=None):
+        self.found = trace is not None
+        self.trace = trace if trace is not None else []
+        self.markings = markings if markings is not None else []
+        self.marking = self.markings[-1] if self.markings else None
+        self.states = states
+        self.stop_reason = stop_reason
+
+    def __bool__(self):
+        return self.found
+
+    def __repr__(self):
+        if self.found:
+            return f"QueryResult(found, {len(self.trace)} tirs, {self.states} états)"
+        return f"QueryResult(non trouvé, {self.states} états, arrêt={self.stop_reason})"
@@ -0,0 +1,325 @@
+#export.py
+# Export des graphes d'états, écrit au fil de l'eau dans un fichier ouvert :
+#   - DOT (Graphviz) et GraphML (yEd, Gephi, networkx) : texte ;
+#   - binaire compact ("PNRG") : marquages et arêtes en entiers varint.
+# La mémoire utilisée ne dépend pas de la taille du graphe : export_graph relit
+# un graphe déjà construit (en RAM ou dans un magasin SQLite), export_exploration
+# écrit les états d'un model.PetriNet au moment où l'exploration les découvre.
+#
+# Format binaire (entiers non signés en varint LEB128, chaînes = longueur + UTF-8) :
+#   en-tête  : b"PNRG", version, type (0 = jetons entiers, 1 = coloré),
+#              noms des places, noms des transitions ;
+#   états    : un enregistrement par état, dans l'ordre des ids ;
+#              entier : pour chaque place, jetons + 1 (0 = ω) ;
+#              coloré : pour chaque place, nombre de couleurs puis (id_couleur, nombre) ;
+#   arêtes   : (écart de source en zigzag, cible, id_transition) ;
+#   couleurs : repr de chaque valeur (type coloré seulement) ;
+#   pied     : 4 entiers de 8 octets (nb états, nb arêtes, position des arêtes,
+#              position des couleurs).
+import ast
+import shutil
+import struct
+import tempfile
+from xml.sax.saxutils import escape
+
+MAGIC = b"PNRG"
+VERSION = 1
+INTEGER, COLOURED = 0, 1
+FOOTER = struct.Struct("<QQQQ")
+BUFFER_SIZE = 1 << 16
+FORMATS = {".dot": "dot", ".gv": "dot", ".graphml": "graphml", ".pnrg": "binary", ".bin": "binary"}
+
+
+def _varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _string(out, text):
+    data = text.encode("utf-8")
+    _varint(out, len(data))
+    out += data
+
+
+def _dot_id(text):
+    return '"' + str(text).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class _Description:
+    """Ce que les écrivains ont besoin de savoir du réseau : noms, type, libellés."""
+    def __init__(self, net):
+        import model
+        view = net.compiled()
+        self.net = net
+        self.place_names = view.place_names
+        self.transition_names = view.transition_names
+        self.kind = COLOURED if isinstance(net, model.PetriNet) else INTEGER
+
+    def label(self, marking):
+        if self.kind == COLOURED:
+            return self.net.format_marking(marking)
+        from petri_model import OMEGA
+        full = self.net.full_marking(marking)
+        return "(" + ", ".join("ω" if m == OMEGA else str(m) for m in full) + ")"
+
+
+class DotWriter:
+    def __init__(self, fh, description):
+        self.fh = fh
+        self.description = description
+        fh.write("digraph reachability {\n  node [shape=box];\n")
+
+    def state(self, state_id, marking):
+        self.fh.write(f"  {state_id} [label={_dot_id(self.description.label(marking))}];\n")
+
+    def edge(self, src, dst, transition):
+        self.fh.write(f"  {src} -> {dst} [label={_dot_id(transition)}];\n")
+
+    def close(self):
+        self.fh.write("}\n")
+
+
+class GraphMLWriter:
+    def __init__(self, fh, description):
+        self.fh = fh
+        self.description = description
+        fh.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                 '  <key id="marking" for="node" attr.name="marking" attr.type="string"/>\n'
+                 '  <key id="transition" for="edge" attr.name="transition" attr.type="string"/>\n'
+                 '  <graph id="reachability" edgedefault="directed">\n')
+
+    def state(self, state_id, marking):
+        label = escape(self.description.label(marking))
+        self.fh.write(f'    <node id="s{state_id}"><data key="marking">{label}</data></node>\n')
+
+    def edge(self, src, dst, transition):
+        self.fh.write(f'    <edge source="s{src}" target="s{dst}">'
+                      f'<data key="transition">{escape(str(transition))}</data></edge>\n')
+
+    def close(self):
+        self.fh.write("  </graph>\n</graphml>\n")
+
+
+class BinaryWriter:
+    """
+    Écrit les états directement dans fh (binaire) ; les arêtes, qui arrivent
+    mêlées aux états, passent par un fichier temporaire recopié à la fin.
+    """
+    def __init__(self, fh, description):
+        self.fh = fh
+        self.description = description
+        self.transition_ids = {name: i for i, name in enumerate(description.transition_names)}
+        self.n_states = 0
+        self.n_edges = 0
+        self._last_src = 0
+        self._edges = tempfile.TemporaryFile()
+        self._states_buffer = bytearray()
+        self._edges_buffer = bytearray()
+
+        header = bytearray(MAGIC)
+        header += bytes((VERSION, description.kind))
+        for names in (description.place_names, description.transition_names):
+            _varint(header, len(names))
+            for name in names:
+                _string(header, name)
+        fh.write(header)
+        self._position = len(header)
+
+    def state(self, state_id, marking):
+        if state_id != self.n_states:
+            raise ValueError(f"Les états doivent être écrits dans l'ordre ({state_id} != {self.n_states})")
+        out = self._states_buffer
+        if self.description.kind == COLOURED:
+            for sub in marking:
+                _varint(out, len(sub))
+                for colour_id, count in sub:
+                    _varint(out, colour_id)
+                    _varint(out, count)
+        else:
+            for tokens in self.description.net.full_marking(marking):
+                _varint(out, 0 if tokens == float("inf") else tokens + 1)
+        self.n_states += 1
+        if len(out) >= BUFFER_SIZE:
+            self._flush_states()
+
+    def edge(self, src, dst, transition):
+        out = self._edges_buffer
+        delta = src - self._last_src
+        _varint(out, delta * 2 if delta >= 0 else -delta * 2 - 1)
+        _varint(out, dst)
+        _varint(out, self.transition_ids[transition])
+        self._last_src = src
+        self.n_edges += 1
+        if len(out) >= BUFFER_SIZE:
+            self._edges.write(out)
+            out.clear()
+
+    def _flush_states(self):
+        self.fh.write(self._states_buffer)
+        self._position += len(self._states_buffer)
+        self._states_buffer.clear()
+
+    def close(self):
+        self._flush_states()
+        edges_at = self._position
+        self._edges.write(self._edges_buffer)
+        self._edges.seek(0)
+        shutil.copyfileobj(self._edges, self.fh, BUFFER_SIZE)
+        self._position += self._edges.tell()
+        self._edges.close()
+
+        colours_at = self._position
+        tail = bytearray()
+        if self.description.kind == COLOURED:
+            colours = self.description.net.colours
+            _varint(tail, len(colours))
+            for value in colours:
+                _string(tail, repr(value))
+        tail += FOOTER.pack(self.n_states, self.n_edges, edges_at, colours_at)
+        self.fh.write(tail)
+
+
+WRITERS = {"dot": DotWriter, "graphml": GraphMLWriter, "binary": BinaryWriter}
+
+
+def format_for(filename, default="dot"):
+    """Format d'export déduit de l'extension du fichier."""
+    lowered = filename.lower()
+    for extension, fmt in FORMATS.items():
+        if lowered.endswith(extension):
+            return fmt
+    return default
+
+
+def export_graph(net, fh, fmt="dot"):
+    """
+    Écrit le graphe déjà construit (id_to_marking / edges) dans fh, ouvert en
+    texte pour "dot" / "graphml" et en binaire pour "binary".
+    """
+    writer = WRITERS[fmt](fh, _Description(net))
+    for state_id, marking in net.id_to_marking.items():
+        writer.state(state_id, marking)
+    for src, dst, transition in net.edges:
+        writer.edge(src, dst, transition)
+    writer.close()
+    return writer
+
+
+def export_exploration(net, fh, fmt="dot", **limits):
+    """
+    Explore un model.PetriNet et écrit chaque état ou arête dès sa découverte,
+    sans garder le graphe (seul l'ensemble visité reste en mémoire).
+    limits : max_states, max_depth, timeout, max_memory, progress (voir
+    exploration.ExplorationBudget), stubborn, visible_places, symmetry.
+    Retourne le budget (stop_reason renseigné si une limite est atteinte).
+    """
+    from exploration import ExplorationBudget
+    options = {key: limits.pop(key) for key in ("stubborn", "visible_places", "symmetry") if key in limits}
+    budget = ExplorationBudget(**limits)
+    writer = WRITERS[fmt](fh, _Description(net))
+    for event in net.iter_state_space(budget, **options):
+        if event[0] == "state":
+            writer.state(event[1], event[2])
+        else:
+            writer.edge(*event[1:])
+    writer.close()
+    return budget
+
+
+# --- Relecture du format binaire ---
+
+class _VarintReader:
+    def __init__(self, fh, start, end):
+        self.fh = fh
+        self.position = start
+        self.end = end
+        self.buffer = b""
+        self.index = 0
+
+    def _fill(self):
+        self.fh.seek(self.position)
+        self.buffer = self.fh.read(min(BUFFER_SIZE, self.end - self.position))
+        self.position += len(self.buffer)
+        self.index = 0
+        if not self.buffer:
+            raise ValueError("Fichier PNRG tronqué")
+
+    def varint(self):
+        result = shift = 0
+        while True:
+            if self.index >= len(self.buffer):
+                self._fill()
+            byte = self.buffer[self.index]
+            self.index += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def string(self):
+        length = self.varint()
+        data = bytearray()
+        while len(data) < length:
+            if self.index >= len(self.buffer):
+                self._fill()
+            chunk = self.buffer[self.index:self.index + length - len(data)]
+            self.index += len(chunk)
+            data += chunk
+        return data.decode("utf-8")
+
+
+class BinaryGraph:
+    """
+    Lecture d'un fichier PNRG (ouvert en binaire, seekable). states() et
+    edges() relisent le fichier à chaque appel, sans tout charger.
+    Marquages : tuple d'entiers (float("inf") pour ω) ou, pour un réseau
+    coloré, tuple de ((couleur, nombre), ...) par place.
+    """
+    def __init__(self, fh):
+        self.fh = fh
+        fh.seek(0, 2)
+        size = fh.tell()
+        fh.seek(size - FOOTER.size)
+        self.n_states, self.n_edges, self._edges_at, self._colours_at = FOOTER.unpack(fh.read(FOOTER.size))
+        self._footer_at = size - FOOTER.size
+
+        fh.seek(0)
+        head = fh.read(len(MAGIC) + 2)
+        if head[:len(MAGIC)] != MAGIC or head[len(MAGIC)] != VERSION:
+            raise ValueError("Ce fichier n'est pas un graphe PNRG lisible")
+        self.kind = head[len(MAGIC) + 1]
+        reader = _VarintReader(fh, len(head), self._edges_at)
+        self.place_names = [reader.string() for _ in range(reader.varint())]
+        self.transition_names = [reader.string() for _ in range(reader.varint())]
+        self._states_at = reader.position - len(reader.buffer) + reader.index
+
+        self.colours = []
+        if self.kind == COLOURED:
+            reader = _VarintReader(fh, self._colours_at, self._footer_at)
+            self.colours = [ast.literal_eval(reader.string()) for _ in range(reader.varint())]
+
+    def states(self):
+        """Itère sur les (id, marquage)."""
+        reader = _VarintReader(self.fh, self._states_at, self._edges_at)
+        n_places = len(self.place_names)
+        for state_id in range(self.n_states):
+            if self.kind == COLOURED:
+                marking = tuple(tuple((self.colours[reader.varint()], reader.varint())
+                                      for _ in range(reader.varint()))
+                                for _ in range(n_places))
+            else:
+                marking = tuple(value - 1 if value else float("inf")
+                                for value in (reader.varint() for _ in range(n_places)))
+            yield state_id, marking
+
+    def edges(self):
+        """Itère sur les (src, dst, transition)."""
+        reader = _VarintReader(self.fh, self._edges_at, self._colours_at)
+        src = 0
+        for _ in range(self.n_edges):
+            zigzag = reader.varint()
+            src += zigzag // 2 if zigzag % 2 == 0 else -(zigzag + 1) // 2
+            yield src, reader.varint(), self.transition_names[reader.varint()]
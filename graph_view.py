@@ -0,0 +1,322 @@
+#graph_view.py
+# Affichage des graphes d'états de grande taille.
+#   - Disposition calculée avec NumPy : par couches BFS (profondeur = ligne,
+#     ordre dans la couche amélioré par barycentres) ou par forces
+#     (Fruchterman-Reingold) pour les petits graphes ; mise en cache avec le
+#     graphe lui-même (net.edges), donc oubliée dès qu'il est recalculé.
+#   - Visionneuse Tk avec déplacement (glisser) et zoom (molette) : seuls les
+#     nœuds et arcs dans la partie visible sont dessinés ; quand il y en a
+#     trop, les nœuds proches à l'écran sont regroupés en amas (niveau de détail).
+import weakref
+
+import numpy as np
+
+LAYER_SPACING = 80.0   # distance entre deux couches BFS (unités du monde)
+NODE_SPACING = 60.0    # distance entre deux nœuds d'une même couche
+FORCE_LIMIT = 500      # au-delà, la disposition par forces (O(n²)) est trop chère
+# net.edges -> {(états, arêtes, méthode): positions} ; l'entrée disparaît avec le graphe
+_LAYOUT_CACHE = weakref.WeakKeyDictionary()
+
+
+# --- Graphe sous forme de tableaux ---
+
+def edge_arrays(net):
+    """(n_états, sources, cibles) des arêtes de net, en tableaux NumPy."""
+    edges = net.edges
+    if hasattr(edges, "as_numpy"):
+        offsets, targets, _ = edges.as_numpy()
+        src = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets).astype(np.int64))
+        dst = targets.astype(np.int64)
+    else:
+        pairs = np.array([(s, d) for s, d, _ in edges], dtype=np.int64).reshape(-1, 2)
+        src, dst = pairs[:, 0], pairs[:, 1]
+    return len(net.id_to_marking), src, dst
+
+
+def bfs_depths(n, src, dst, root=0):
+    """Profondeur BFS de chaque état depuis root (-1 si inaccessible), niveau par niveau."""
+    order = np.argsort(src, kind="stable")
+    targets = dst[order]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+    depth = np.full(n, -1, dtype=np.int64)
+    if n == 0:
+        return depth
+    depth[root] = 0
+    frontier = np.array([root])
+    level = 0
+    while len(frontier):
+        starts, counts = offsets[frontier], offsets[frontier + 1] - offsets[frontier]
+        # Indices de toutes les arêtes sortantes de la frontière, sans boucle Python
+        idx = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        nxt = np.unique(targets[idx])
+        nxt = nxt[depth[nxt] < 0]
+        level += 1
+        depth[nxt] = level
+        frontier = nxt
+    return depth
+
+
+# --- Dispositions ---
+
+def layered_layout(n, src, dst, sweeps=4):
+    """
+    Une couche par profondeur BFS (les états inaccessibles depuis 0 forment une
+    couche finale). Dans une couche, les nœuds sont triés par barycentre de
+    leurs prédécesseurs de la couche précédente, ce qui réduit les croisements.
+    Retourne un tableau (n, 2) de positions.
+    """
+    depth = bfs_depths(n, src, dst)
+    depth[depth < 0] = depth.max(initial=0) + 1
+    forward = depth[dst] == depth[src] + 1
+    f_src, f_dst = src[forward], dst[forward]
+    incoming = np.bincount(f_dst, minlength=n)
+
+    key = np.arange(n, dtype=float)  # ordre initial : numérotation BFS
+    for _ in range(sweeps + 1):
+        order = np.lexsort((key, depth))
+        layer_start = np.searchsorted(depth[order], depth[order], side="left")
+        rank = np.empty(n)
+        rank[order] = np.arange(n) - layer_start
+        sums = np.bincount(f_dst, weights=rank[f_src], minlength=n)
+        key = np.where(incoming > 0, sums / np.maximum(incoming, 1), rank)
+
+    sizes = np.bincount(depth)
+    positions = np.empty((n, 2))
+    positions[:, 0] = (rank - (sizes[depth] - 1) / 2) * NODE_SPACING
+    positions[:, 1] = depth * LAYER_SPACING
+    return positions
+
+
+def force_layout(n, src, dst, iterations=60, initial=None, seed=0):
+    """Fruchterman-Reingold vectorisé (n² paires par itération : petits graphes seulement)."""
+    rng = np.random.default_rng(seed)
+    pos = np.array(initial, dtype=float) if initial is not None else rng.random((n, 2)) * NODE_SPACING * np.sqrt(n)
+    if n < 2:
+        return pos
+    k = NODE_SPACING
+    temperature = NODE_SPACING * np.sqrt(n) / 4
+    for _ in range(iterations):
+        delta = pos[:, None, :] - pos[None, :, :]
+        dist = np.maximum(np.linalg.norm(delta, axis=2), 1e-3)
+        disp = (delta * (k * k / dist ** 2)[:, :, None]).sum(axis=1)      # répulsion
+        d = pos[src] - pos[dst]
+        length = np.maximum(np.linalg.norm(d, axis=1), 1e-3)
+        pull = d * (length / k)[:, None]                                    # attraction
+        np.add.at(disp, src, -pull)
+        np.add.at(disp, dst, pull)
+        norm = np.maximum(np.linalg.norm(disp, axis=1), 1e-3)
+        pos += disp / norm[:, None] * np.minimum(norm, temperature)[:, None]
+        temperature *= 0.95
+    return pos
+
+
+def layout_for(net, method="auto"):
+    """
+    Positions (n, 2) du graphe d'états de net, mises en cache avec ce graphe
+    (l'objet net.edges) : chaque construction, quelles que soient ses options
+    ou sa complétude, crée un nouveau graphe et donc une nouvelle disposition.
+    method : "layered", "force" ou "auto" (forces jusqu'à FORCE_LIMIT états).
+    """
+    n, src, dst = edge_arrays(net)
+    if method == "auto":
+        method = "force" if n <= FORCE_LIMIT else "layered"
+    layouts = _LAYOUT_CACHE.setdefault(net.edges, {})
+    key = (n, len(src), method)  # un graphe sur disque peut grandir sur place
+    positions = layouts.get(key)
+    if positions is None:
+        positions = layered_layout(n, src, dst)
+        if method == "force":
+            positions = force_layout(n, src, dst, initial=positions)
+        layouts.clear()
+        layouts[key] = positions
+    return positions
+
+
+# --- Partie visible et niveau de détail ---
+
+def visible_mask(screen, width, height, margin=20):
+    """Nœuds dont la position écran tombe dans la fenêtre (plus une marge)."""
+    return ((screen[:, 0] >= -margin) & (screen[:, 0] <= width + margin) &
+            (screen[:, 1] >= -margin) & (screen[:, 1] <= height + margin))
+
+
+def cluster_points(screen, cell):
+    """
+    Regroupe des positions écran par case de cell pixels.
+    Retourne (amas de chaque point, centres des amas (k, 2), tailles (k,)).
+    """
+    cells = np.floor(screen / cell).astype(np.int64)
+    _, inverse, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    centres = np.empty((len(counts), 2))
+    for axis in (0, 1):
+        centres[:, axis] = np.bincount(inverse, weights=screen[:, axis]) / counts
+    return inverse, centres, counts
+
+
+# --- Visionneuse Tk ---
+
+class GraphView:
+    MAX_NODES = 300      # au-delà, regroupement en amas
+    MAX_EDGES = 3000     # arcs dessinés au plus
+    CLUSTER_CELL = 40    # taille (pixels) d'une case de regroupement
+    NODE_RADIUS = 14     # rayon d'un nœud à l'échelle 1
+
+    def __init__(self, root, net, method="auto", title="Reachability graph"):
+        import tkinter as tk
+        self.tk = tk
+        self.net = net
+        self.positions = layout_for(net, method)
+        _, self.src, self.dst = edge_arrays(net)
+        self.labels = [t for _, _, t in net.edges] if len(self.src) <= self.MAX_EDGES else None
+        self.scale = 1.0
+        self.offset = np.zeros(2)
+        self._drag_from = None
+        self._dragged = False
+        self._pending = None
+        self._clusters = None    # (centres, tailles) du dernier dessin regroupé
+
+        self.win = tk.Toplevel(root)
+        self.win.title(f"{title} ({len(self.positions)} états, {len(self.src)} arcs)")
+        self.canvas = tk.Canvas(self.win, width=800, height=600, bg="white")
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.status = tk.Label(self.win, anchor="w", text="Glisser : déplacer, molette : zoom, clic : détails")
+        self.status.pack(fill=tk.X)
+
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<MouseWheel>", lambda e: self.zoom(1.2 if e.delta > 0 else 1 / 1.2, e.x, e.y))
+        self.canvas.bind("<Button-4>", lambda e: self.zoom(1.2, e.x, e.y))
+        self.canvas.bind("<Button-5>", lambda e: self.zoom(1 / 1.2, e.x, e.y))
+        self.canvas.bind("<Configure>", self.on_resize)
+        self._fitted = False
+
+    # --- Transformation monde -> écran ---
+
+    def to_screen(self, points):
+        return points * self.scale + self.offset
+
+    def fit(self, width, height):
+        """Cadre tout le graphe dans la fenêtre."""
+        if not len(self.positions):
+            return
+        low, high = self.positions.min(axis=0), self.positions.max(axis=0)
+        span = np.maximum(high - low, 1.0)
+        self.scale = float(min((width - 60) / span[0], (height - 60) / span[1], 2.0))
+        self.offset = np.array([width, height]) / 2 - (low + high) / 2 * self.scale
+
+    def zoom(self, factor, x, y):
+        """Zoom centré sur le point (x, y) de l'écran."""
+        anchor = np.array([x, y], dtype=float)
+        self.offset = anchor - (anchor - self.offset) * factor
+        self.scale *= factor
+        self.schedule_redraw()
+
+    # --- Événements ---
+
+    def on_resize(self, event):
+        if not self._fitted:
+            self.fit(event.width, event.height)
+            self._fitted = True
+        self.schedule_redraw()
+
+    def on_press(self, event):
+        self._drag_from = (event.x, event.y)
+        self._dragged = False
+
+    def on_drag(self, event):
+        if self._drag_from is None:
+            return
+        dx, dy = event.x - self._drag_from[0], event.y - self._drag_from[1]
+        if abs(dx) + abs(dy) > 2:
+            self._dragged = True
+        self.offset = self.offset + (dx, dy)
+        self._drag_from = (event.x, event.y)
+        self.schedule_redraw()
+
+    def on_release(self, event):
+        if not self._dragged:
+            self.select(event.x, event.y)
+        self._drag_from = None
+
+    def select(self, x, y):
+        """Clic : détails d'un nœud, ou zoom sur un amas."""
+        point = np.array([x, y], dtype=float)
+        if self._clusters is not None:
+            centres, counts = self._clusters
+            if len(centres):
+                nearest = int(np.argmin(np.linalg.norm(centres - point, axis=1)))
+                self.status.config(text=f"Amas de {counts[nearest]} états")
+                self.zoom(2.0, *centres[nearest])
+            return
+        if not len(self.positions):
+            return
+        distances = np.linalg.norm(self.to_screen(self.positions) - point, axis=1)
+        state_id = int(np.argmin(distances))
+        if distances[state_id] <= max(self.NODE_RADIUS * self.scale, 6):
+            self.status.config(text=f"État {state_id} : {self.describe(state_id)}")
+
+    def describe(self, state_id):
+        marking = self.net.id_to_marking[state_id]
+        if hasattr(self.net, "format_marking"):
+            return self.net.format_marking(marking)
+        return str(self.net.full_marking(marking))
+
+    # --- Dessin ---
+
+    def schedule_redraw(self):
+        """Regroupe les demandes de dessin (glisser, molette) en un seul dessin."""
+        if self._pending is None:
+            self._pending = self.canvas.after_idle(self.redraw)
+
+    def redraw(self):
+        self._pending = None
+        self.canvas.delete("all")
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        screen = self.to_screen(self.positions)
+        visible = visible_mask(screen, width, height)
+        ids = np.flatnonzero(visible)
+        if len(ids) > self.MAX_NODES:
+            self._draw_clusters(screen, visible, ids)
+        else:
+            self._clusters = None
+            self._draw_nodes(screen, visible, ids)
+
+    def _draw_nodes(self, screen, visible, ids):
+        canvas, tk = self.canvas, self.tk
+        # Arcs dont au moins une extrémité est visible
+        shown = np.flatnonzero(visible[self.src] | visible[self.dst])[:self.MAX_EDGES]
+        with_labels = self.labels is not None and self.scale >= 0.8 and len(shown) <= 200
+        for i in shown.tolist():
+            (x1, y1), (x2, y2) = screen[self.src[i]], screen[self.dst[i]]
+            canvas.create_line(x1, y1, x2, y2, arrow=tk.LAST, fill="#7f8c8d")
+            if with_labels:
+                canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2 - 8, text=self.labels[i], fill="blue")
+        r = max(self.NODE_RADIUS * self.scale, 3)
+        for state_id in ids.tolist():
+            x, y = screen[state_id]
+            canvas.create_oval(x - r, y - r, x + r, y + r, fill="#ecf0f1", outline="#2c3e50")
+            if r >= 8:
+                canvas.create_text(x, y, text=str(state_id))
+
+    def _draw_clusters(self, screen, visible, ids):
+        canvas = self.canvas
+        inverse, centres, counts = cluster_points(screen[ids], self.CLUSTER_CELL)
+        self._clusters = (centres, counts)
+        # Arcs entre amas distincts, une seule ligne par paire
+        cluster_of = np.full(len(screen), -1, dtype=np.int64)
+        cluster_of[ids] = inverse
+        a, b = cluster_of[self.src], cluster_of[self.dst]
+        keep = (a >= 0) & (b >= 0) & (a != b)
+        pairs = np.unique(np.stack([a[keep], b[keep]], axis=1), axis=0)[:self.MAX_EDGES]
+        for i, j in pairs.tolist():
+            (x1, y1), (x2, y2) = centres[i], centres[j]
+            canvas.create_line(x1, y1, x2, y2, fill="#bdc3c7")
+        for (x, y), count in zip(centres.tolist(), counts.tolist()):
+            r = min(6 + 3 * np.sqrt(count), self.CLUSTER_CELL / 2)
+            canvas.create_oval(x - r, y - r, x + r, y + r, fill="#d6eaf8", outline="#2980b9")
+            canvas.create_text(x, y, text=str(count), font=("Arial", 8))
+        self.status.config(text=f"{len(ids)} états visibles regroupés en {len(counts)} amas "
+                                "(zoomer ou cliquer un amas pour détailler)")
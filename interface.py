@@ -1,9 +1,13 @@
 #interface.py
 import tkinter as tk
 from tkinter import simpledialog
+from tkinter import messagebox
 from tkinter import ttk  # Nécessaire pour le menu déroulant (Combobox)
+import os
 from model import PetriNet
 from editor import PetriEditor
+from cache import ReachabilityCache
+from worker import AnalysisJob, ExportJob
 
 class PetriApp:
     def __init__(self, root):
@@ -12,12 +16,19 @@ class PetriApp:
 
         self.petri_net = PetriNet()
         self.editor = PetriEditor(self.petri_net, self)
+        # Graphes déjà calculés, réutilisés tant que le réseau n'a pas changé
+        self.reachability_cache = ReachabilityCache(
+            os.path.join(os.path.expanduser("~"), ".cache", "projet_petri"))
+        self.analysis_job = None  # analyse ou export en cours dans un autre processus
 
         # Données graphiques
         self.canvas_item_to_name = {}    # ID Canvas -> Nom Objet (P1, T1...)
         self.name_to_coords = {}         # Nom Objet -> (x, y)
         self.place_name_to_text_id = {}  # Nom Place -> ID du texte (pour mise à jour)
         self.name_to_ids = {}            # Nom Objet -> Liste [ID_Forme, ID_Texte, ...]
+        self.arc_items = {}              # ID Ligne d'arc -> (source, cible, ID_Texte)
+        self.name_to_arcs = {}           # Nom Objet -> {ID Ligne des arcs qui le touchent}
+        self._pending_drag = None        # dernière position de glissement pas encore appliquée
 
         # --- STYLE UNIQUE ---
         self.STYLE = {
@@ -36,12 +47,14 @@ class PetriApp:
         self.create_styled_btn("Place", "PLACE")
         self.create_styled_btn("Transition", "TRANSITION")
         self.create_styled_btn("Arc", "ARC")
+        self.create_styled_btn("Garde", "GUARD")
         self.create_styled_btn("Tirer", "FIRE", bg_color=self.STYLE["fire_bg"])
         self.create_styled_btn("Déplacer", "MOVE", bg_color="#f39c12")
         self.create_styled_btn("Supprimer", "DELETE", bg_color="#c0392b")
         self.create_styled_btn("Reachability", "REACH", bg_color="#8e44ad")
         self.create_styled_btn("Sauver", "SAVE", bg_color="#27ae60")
         self.create_styled_btn("Charger", "LOAD", bg_color="#16a085")
+        self.create_styled_btn("Exporter", "EXPORT", bg_color="#2980b9")
 
         # Label de mode
         self.lbl_mode = tk.Label(self.toolbar, text="Mode: PLACE",
@@ -85,9 +98,19 @@ class PetriApp:
         self.editor.handle_click(event.x, event.y, item_name)
 
     def on_canvas_drag(self, event):
-        self.editor.handle_drag(event.x, event.y)
+        # Les mouvements sont regroupés : un seul déplacement par image (~60/s)
+        if self._pending_drag is None:
+            self.root.after(16, self.flush_drag)
+        self._pending_drag = (event.x, event.y)
+
+    def flush_drag(self):
+        if self._pending_drag is None: return
+        x, y = self._pending_drag
+        self._pending_drag = None
+        self.editor.handle_drag(x, y)
 
     def on_canvas_release(self, event):
+        self.flush_drag()  # la position finale n'est jamais perdue
         self.editor.handle_release()
 
     # ---------- GESTION DES COULEURS ----------
@@ -152,11 +175,22 @@ class PetriApp:
                                     fill=color, outline="white", width=1, 
                                     tags=f"TOKEN_{name}")
 
-    def draw_transition_visual(self, x, y, name):
+    def draw_transition_visual(self, x, y, name, guard=None):
         w, h = 15, 20
         sid = self.canvas.create_rectangle(x - w, y - h, x + w, y + h, fill="black")
         tid = self.canvas.create_text(x, y - h - 15, text=name, font=("Arial", 10, "bold"))
-        self.register_object(name, x, y, [sid, tid], is_place=False)
+        gid = self.canvas.create_text(x, y + h + 15, text=self.guard_label(guard),
+                                      fill="#2980b9", font=("Arial", 9, "italic"))
+        self.register_object(name, x, y, [sid, tid, gid], is_place=False)
+
+    @staticmethod
+    def guard_label(guard):
+        return f"[{guard}]" if guard else ""
+
+    def set_guard_visual(self, name, guard):
+        ids = self.name_to_ids.get(name)
+        if ids:
+            self.canvas.itemconfig(ids[2], text=self.guard_label(guard))
 
     def register_object(self, name, x, y, ids, is_place):
         for i in ids:
@@ -171,11 +205,33 @@ class PetriApp:
         x2, y2 = self.name_to_coords[target]
         
         # Arc
-        self.canvas.create_line(x1, y1, x2, y2, arrow=tk.LAST, width=2, tags="ARC", fill="#34495e")
+        lid = self.canvas.create_line(x1, y1, x2, y2, arrow=tk.LAST, width=2, tags="ARC", fill="#34495e")
         
         # Label (Variable)
         xm, ym = (x1 + x2) / 2, (y1 + y2) / 2
-        self.canvas.create_text(xm, ym - 10, text=str(label), fill="#e74c3c", font=("Arial", 10, "bold"), tags="ARC")
+        tid = self.canvas.create_text(xm, ym - 10, text=str(label), fill="#e74c3c", font=("Arial", 10, "bold"), tags="ARC")
+
+        # Index pour ne mettre à jour que les arcs d'un objet déplacé
+        self.arc_items[lid] = (source, target, tid)
+        self.name_to_arcs.setdefault(source, set()).add(lid)
+        self.name_to_arcs.setdefault(target, set()).add(lid)
+
+    def update_arc_visual(self, lid):
+        """Replace un arc existant (ligne + texte) sur les positions actuelles de ses extrémités."""
+        source, target, tid = self.arc_items[lid]
+        x1, y1 = self.name_to_coords[source]
+        x2, y2 = self.name_to_coords[target]
+        self.canvas.coords(lid, x1, y1, x2, y2)
+        self.canvas.coords(tid, (x1 + x2) / 2, (y1 + y2) / 2 - 10)
+
+    def delete_arc_visual(self, lid):
+        source, target, tid = self.arc_items.pop(lid)
+        self.canvas.delete(lid)
+        self.canvas.delete(tid)
+        for name in (source, target):
+            arcs = self.name_to_arcs.get(name)
+            if arcs is not None:
+                arcs.discard(lid)
 
     def refresh_tokens(self):
         """Met à jour l'affichage graphique des jetons après un tir."""
@@ -184,31 +240,45 @@ class PetriApp:
                 x, y = self.name_to_coords[name]
                 # On redessine les billes avec le nouvel état
                 self.draw_tokens_inside(name, x, y, place.tokens)
+        self.highlight_enabled()
+
+    def highlight_enabled(self):
+        """Colore en vert les transitions tirables (ensemble tenu à jour par le modèle)."""
+        enabled = set(self.petri_net.enabled_transitions())
+        for name in self.petri_net.transitions:
+            ids = self.name_to_ids.get(name)
+            if ids:
+                self.canvas.itemconfig(ids[0], fill="#27ae60" if name in enabled else "black")
 
     def move_object(self, name, new_x, new_y):
-        self.name_to_coords[name] = (new_x, new_y)
         ids = self.name_to_ids.get(name)
         if not ids: return
+        old_x, old_y = self.name_to_coords[name]
+        self.name_to_coords[name] = (new_x, new_y)
 
         if name.startswith("P"):
             r = 25
             self.canvas.coords(ids[0], new_x - r, new_y - r, new_x + r, new_y + r)
             self.canvas.coords(ids[1], new_x, new_y + 35)
             
-            # DÉPLACEMENT : On redessine les jetons à la nouvelle position
-            place = self.petri_net.places.get(name)
-            if place:
-                self.draw_tokens_inside(name, new_x, new_y, place.tokens)
+            # DÉPLACEMENT : les jetons suivent la place (sans être redessinés)
+            self.canvas.move(f"TOKEN_{name}", new_x - old_x, new_y - old_y)
                 
         elif name.startswith("T"):
             w, h = 15, 20
             self.canvas.coords(ids[0], new_x - w, new_y - h, new_x + w, new_y + h)
             self.canvas.coords(ids[1], new_x, new_y - h - 15)
+            self.canvas.coords(ids[2], new_x, new_y + h + 15)
         
-        self.redraw_arrows()
+        # Seuls les arcs qui touchent l'objet bougent
+        for lid in self.name_to_arcs.get(name, ()):
+            self.update_arc_visual(lid)
 
     def redraw_arrows(self):
+        """Redessine tous les arcs depuis le modèle (après un changement global)."""
         self.canvas.delete("ARC")
+        self.arc_items.clear()
+        self.name_to_arcs.clear()
         for arc in self.petri_net.arcs:
             self.draw_arc_visual(arc.source.name, arc.target.name, arc.expression)
 
@@ -279,7 +349,18 @@ class PetriApp:
         return simpledialog.askstring("Config", "Jetons (ex: 1, 2, A)", initialvalue="1")
 
     def ask_arc_variable(self):
-        return simpledialog.askstring("Config CPN", "Variable d'arc (ex: x, y) :", initialvalue="x")
+        return simpledialog.askstring("Config CPN", "Inscription d'arc (ex: x, 2'x, (x, y), x ++ \"A\") :",
+                                      initialvalue="x")
+
+    def ask_guard(self, current=None):
+        return simpledialog.askstring("Garde", "Garde de la transition (ex: x != y and x == Rouge), vide = aucune :",
+                                      initialvalue=current or "")
+
+    def show_error(self, title, message):
+        messagebox.showerror(title, message)
+
+    def show_info(self, title, message):
+        messagebox.showinfo(title, message)
 
     def show_text_window(self, title, text):
         win = tk.Toplevel(self.root)
@@ -300,52 +381,104 @@ class PetriApp:
             
             del self.name_to_ids[name]
             del self.name_to_coords[name]
-            keys_to_remove = [k for k, v in self.canvas_item_to_name.items() if v == name]
-            for k in keys_to_remove:
-                del self.canvas_item_to_name[k]
+            # Les items de l'objet sont connus : pas de parcours de tout l'index
+            for item_id in ids:
+                self.canvas_item_to_name.pop(item_id, None)
             if name in self.place_name_to_text_id:
                 del self.place_name_to_text_id[name]
-        self.redraw_arrows()
+        # Le modèle a supprimé les arcs de l'objet : on retire seulement les leurs
+        for lid in list(self.name_to_arcs.pop(name, ())):
+            self.delete_arc_visual(lid)
 
     def clear_canvas(self):
         self.canvas.delete("all")
         self.canvas_item_to_name.clear()
+        self.arc_items.clear()
+        self.name_to_arcs.clear()
         self.name_to_coords.clear()
         self.name_to_ids.clear()
         self.place_name_to_text_id.clear()
 
+    # ---------- ANALYSE EN ARRIÈRE-PLAN ----------
+
+    def run_analysis(self, on_done):
+        """
+        Exploration dans un autre processus (worker.AnalysisJob) : la fenêtre
+        de progression est mise à jour par root.after et peut l'annuler.
+        on_done() est appelé une fois le graphe chargé dans le réseau.
+        """
+        if self.analysis_job is not None:
+            return  # une seule analyse à la fois
+        job = AnalysisJob(self.petri_net, cache=self.reachability_cache)
+        if job.finished:  # déjà dans le cache
+            on_done()
+            return
+        self.watch_job(job, "Analyse en cours", "Analyse", on_done)
+
+    def run_export(self, filename, fmt, **limits):
+        """Export du graphe d'états (worker.ExportJob), avec progression et annulation."""
+        if self.analysis_job is not None:
+            return
+        job = ExportJob(self.petri_net, filename, fmt, **limits)
+
+        def done():
+            if job.stop_reason is not None:
+                self.show_error("Export partiel", f"Exploration interrompue : {job.stop_reason}")
+            else:
+                self.show_info("Export", f"Exporté : {filename}")
+
+        self.watch_job(job, "Export en cours", "Export", done)
+
+    def watch_job(self, job, title, error_title, on_done):
+        """Fenêtre de progression d'une tâche worker.BackgroundJob, mise à jour par root.after."""
+        self.analysis_job = job
+
+        win = tk.Toplevel(self.root)
+        win.title(title)
+        lbl = tk.Label(win, text="Exploration...", width=60)
+        lbl.pack(padx=10, pady=5)
+        bar = ttk.Progressbar(win, mode="indeterminate", length=300)
+        bar.pack(padx=10, pady=5)
+        bar.start(50)
+
+        def close():
+            self.analysis_job = None
+            bar.stop()
+            win.destroy()
+
+        def cancel():
+            job.cancel()
+            close()
+
+        def poll():
+            if job.cancelled:
+                return
+            done = job.poll()
+            if job.stats:
+                stats = job.stats
+                lbl.config(text=f"{stats['states']} états, {stats['edges']} arcs, profondeur {stats['depth']}"
+                                f" - {stats['states_per_sec']:.0f} états/s")
+            if not done:
+                self.root.after(100, poll)
+                return
+            close()
+            if job.error:
+                self.show_error(error_title, job.error)
+            else:
+                on_done()
+
+        tk.Button(win, text="Annuler", command=cancel, bg="#c0392b", fg="white").pack(pady=5)
+        win.protocol("WM_DELETE_WINDOW", cancel)
+        self.root.after(100, poll)
+
     def show_reachability(self):
-        self.petri_net.build_reachability_graph()  # ← APPEL MODEL
-        text = self.petri_net.get_reachability_as_strings()
-        self.show_text_window("Graphe de reachability", text)
+        self.run_analysis(lambda: self.show_text_window(
+            "Graphe de reachability", self.petri_net.get_reachability_as_strings()))
 
     def show_reachability_graph(self):
-        self.petri_net.build_reachability_graph()  # ← 1
+        self.run_analysis(self.draw_reachability_graph)
 
-        win = tk.Toplevel(self.root)
-        win.title("Reachability graph")
-        canvas = tk.Canvas(win, width=800, height=600, bg="white")
-        canvas.pack(fill=tk.BOTH, expand=True)
-
-        # Placement nœuds (CERVEAU DU BUG)
-        node_pos = {}
-        n = len(self.petri_net.id_to_marking)  # ← SI n=1 → 1 seul nœud !
-        R = 200
-        cx, cy = 400, 300
-        for idx, (node_id, marking) in enumerate(self.petri_net.id_to_marking.items()):
-            angle = 2 * 3.14159 * idx / max(n, 1)
-            x = cx + R * (0.8 * (1 if n == 1 else 1)) * (float(_import_("math").cos(angle)))
-            y = cy + R * (float(_import_("math").sin(angle)))
-            node_pos[node_id] = (x, y)
-            r = 35
-            canvas.create_oval(x - r, y - r, x + r, y + r, fill="#ecf0f1")
-            label = f"{node_id}: {marking}"
-            canvas.create_text(x, y, text=label)
-
-        # Arcs (disparaissent si edges vide)
-        for src, dst, t_name in self.petri_net.edges:  # ← SI edges=[] → AUCUN ARC !
-            x1, y1 = node_pos[src]
-            x2, y2 = node_pos[dst]
-            canvas.create_line(x1, y1, x2, y2, arrow=tk.LAST)
-            mx, my = (x1 + x2) / 2, (y1 + y2) / 2
-            canvas.create_text(mx, my - 10, text=t_name, fill="blue")
\ No newline at end of file
+    def draw_reachability_graph(self):
+        # Disposition calculée, zoom / déplacement, seule la partie visible est dessinée
+        from graph_view import GraphView  # nécessite NumPy
+        GraphView(self.root, self.petri_net)
\ No newline at end of file
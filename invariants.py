@@ -0,0 +1,166 @@
+#invariants.py
+# Invariants structurels des réseaux à jetons entiers (petri_model), calculés
+# sur la matrice d'incidence sans construire le graphe d'états.
+#   P-invariant : y >= 0 entier avec y.C = 0 -> y.M est constant pour tout
+#                 marquage accessible M (conservation, bornes des places) ;
+#   T-invariant : x >= 0 entier avec C.x = 0 -> une séquence tirant chaque
+#                 transition x[t] fois revient au marquage de départ.
+# Algorithme de Farkas (Fourier-Motzkin) en entiers exacts, avec élagage des
+# supports non minimaux à chaque étape. Le nombre d'invariants minimaux peut
+# être exponentiel dans le pire cas.
+from math import gcd
+
+
+def incidence(net):
+    """
+    Matrice d'incidence C (une ligne par place, une colonne par transition),
+    tirée de net.arcs. Places en ordre alphabétique (comme get_marking_tuple),
+    transitions en ordre d'insertion.
+    """
+    place_names = sorted(net.places.keys())
+    transition_names = list(net.transitions.keys())
+    p_index = {name: i for i, name in enumerate(place_names)}
+    t_index = {name: i for i, name in enumerate(transition_names)}
+    matrix = [[0] * len(transition_names) for _ in place_names]
+    for arc in net.arcs:
+        src, dst = arc.source.name, arc.target.name
+        if src in p_index and dst in t_index:
+            matrix[p_index[src]][t_index[dst]] -= arc.weight
+        elif src in t_index and dst in p_index:
+            matrix[p_index[dst]][t_index[src]] += arc.weight
+    return place_names, transition_names, matrix
+
+
+def _normalize(values):
+    g = 0
+    for v in values:
+        g = gcd(g, v)
+    return [v // g for v in values] if g > 1 else values
+
+
+def _minimal_rows(rows):
+    """Supprime les doublons et les lignes dont le support en contient un autre."""
+    unique = {}
+    for row, y in rows:
+        unique.setdefault((tuple(row), tuple(y)), (row, y))
+    rows = list(unique.values())
+    supports = [frozenset(i for i, v in enumerate(y) if v) for _, y in rows]
+    kept = []
+    for i, (row, y) in enumerate(rows):
+        if not any(supports[j] < supports[i] for j in range(len(rows)) if j != i):
+            kept.append((row, y))
+    return kept
+
+
+def farkas(matrix):
+    """
+    Semi-flots minimaux de matrix (n lignes x m colonnes) : vecteurs y >= 0
+    entiers, de support minimal, avec y.matrix = 0. Retournés triés.
+    """
+    n = len(matrix)
+    m = len(matrix[0]) if n else 0
+    rows = [(list(matrix[i]), [1 if j == i else 0 for j in range(n)]) for i in range(n)]
+    for col in range(m):
+        kept = [(row, y) for row, y in rows if row[col] == 0]
+        positive = [(row, y) for row, y in rows if row[col] > 0]
+        negative = [(row, y) for row, y in rows if row[col] < 0]
+        for row_a, y_a in positive:
+            for row_b, y_b in negative:
+                # Combinaison positive qui annule la colonne
+                k_a, k_b = -row_b[col], row_a[col]
+                combined = _normalize([k_a * a + k_b * b for a, b in zip(row_a + y_a, row_b + y_b)])
+                kept.append((combined[:m], combined[m:]))
+        rows = _minimal_rows(kept)
+    return sorted((tuple(y) for _, y in rows), reverse=True)
+
+
+class ImpliedPlaces:
+    """
+    Places dont le nombre de jetons se déduit des autres par un P-invariant :
+        y_p * M(p) = y.M0 - somme_{q != p} y_q * M(q)
+    project() retire ces places d'un marquage, restore() les recalcule.
+    """
+    def __init__(self, n_places, rules):
+        self.n_places = n_places
+        self.rules = rules  # (place, y_p, y.M0, ((q, y_q), ...)), dans l'ordre de calcul
+        dropped = {rule[0] for rule in rules}
+        self.kept = tuple(i for i in range(n_places) if i not in dropped)
+        self.dropped = tuple(sorted(dropped))
+
+    def project(self, marking):
+        return tuple(marking[i] for i in self.kept)
+
+    def restore(self, reduced):
+        full = [0] * self.n_places
+        for i, value in zip(self.kept, reduced):
+            full[i] = value
+        for place, coef, total, terms in self.rules:
+            full[place] = (total - sum(y * full[q] for q, y in terms)) // coef
+        return tuple(full)
+
+
+class InvariantAnalysis:
+    """P- et T-invariants d'un petri_model.PetriNet, et ce qu'on en déduit."""
+    def __init__(self, net):
+        self.place_names, self.transition_names, self.incidence = incidence(net)
+        self.initial = net.get_marking_tuple()
+        self.max_weight = max((arc.weight for arc in net.arcs), default=0)
+        self.p_invariants = farkas(self.incidence)
+        transposed = [list(col) for col in zip(*self.incidence)] if self.incidence else \
+            [[] for _ in self.transition_names]
+        self.t_invariants = farkas(transposed)
+
+    def weighted_sum(self, invariant, marking=None):
+        """y.M (constant sur tout l'espace d'états) ; M = marquage initial par défaut."""
+        marking = self.initial if marking is None else marking
+        return sum(y * m for y, m in zip(invariant, marking))
+
+    def place_bounds(self):
+        """{place: borne supérieure} ; None si aucun P-invariant ne couvre la place."""
+        bounds = {}
+        for p_idx, name in enumerate(self.place_names):
+            best = None
+            for inv in self.p_invariants:
+                if inv[p_idx]:
+                    bound = self.weighted_sum(inv) // inv[p_idx]
+                    best = bound if best is None else min(best, bound)
+            bounds[name] = best
+        return bounds
+
+    def is_bounded(self):
+        """Borné structurellement pour ce marquage initial : toutes les places sont couvertes."""
+        return all(bound is not None for bound in self.place_bounds().values())
+
+    def marking_dtype(self):
+        """Plus petit entier NumPy qui contient toutes les bornes (et poids d'arcs), None si non borné."""
+        import numpy as np
+        bounds = self.place_bounds().values()
+        if any(bound is None for bound in bounds):
+            return None
+        largest = max(0, self.max_weight, *bounds)
+        for dtype in (np.int8, np.int16, np.int32):
+            if largest <= np.iinfo(dtype).max:
+                return dtype
+        return np.int64
+
+    def implied_places(self):
+        """
+        Choisit des places à retirer des marquages stockés (une par P-invariant
+        au plus). Une place retirée ne sert jamais à recalculer une autre place.
+        """
+        rules = []
+        dropped = set()
+        used = set()  # places lues par les règles déjà choisies
+        for inv in self.p_invariants:
+            support = [i for i, y in enumerate(inv) if y]
+            if dropped & set(support):
+                continue
+            candidates = [i for i in support if i not in used]
+            if not candidates:
+                continue
+            place = candidates[-1]
+            terms = tuple((q, inv[q]) for q in support if q != place)
+            rules.append((place, inv[place], self.weighted_sum(inv), terms))
+            dropped.add(place)
+            used |= {q for q, _ in terms}
+        return ImpliedPlaces(len(self.place_names), rules)
@@ -1,5 +1,10 @@
 #model.py
-from collections import deque, Counter # Counter est pour l'affichage "Multiset"
+import ast
+import itertools
+from collections import deque
+
+from edge_graph import EdgeGraph
+from exploration import ExplorationBudget, ParentPointers, QueryResult
 
 class Place:
     def __init__(self, name, tokens=None):
@@ -15,166 +20,1290 @@ class Place:
     def add_token(self, val):
         self.tokens.append(val)
 
+# Fonctions utilisables dans une garde ou une inscription (aucun autre builtin n'est visible)
+GUARD_FUNCTIONS = {f.__name__: f for f in (abs, min, max, len, int, float, str, bool, round)}
+
+# Nœuds autorisés dans une garde : expressions sans attribut ni affectation
+# (ni puissance : 9 ** 9 ** 9 bloquerait l'exploration)
+_GUARD_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+    ast.Name, ast.Load, ast.Constant, ast.Tuple, ast.List, ast.Set, ast.Call,
+    ast.Subscript, ast.Slice, ast.IfExp,
+)
+
+# Sous-ensemble compatible avec la symétrie des couleurs : tests d'égalité
+# seulement (x < y, min(x, y), len(x)... dépendent des valeurs des couleurs)
+_SYMMETRIC_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not,
+    ast.Compare, ast.Eq, ast.NotEq, ast.In, ast.NotIn,
+    ast.Name, ast.Load, ast.Constant, ast.Tuple, ast.List, ast.Set,
+)
+
+def _is_symmetric(node):
+    return all(isinstance(sub, _SYMMETRIC_NODES) for sub in ast.walk(node))
+
+def _parse_expression(text, what):
+    """Analyse une expression restreinte ; ValueError si elle est invalide ou interdite."""
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"{what} invalide {text!r} : {e.msg}") from None
+    for node in ast.walk(tree):
+        if not isinstance(node, _GUARD_NODES):
+            raise ValueError(f"{what} invalide {text!r} : {type(node).__name__} interdit")
+        if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name)
+                                               and node.func.id in GUARD_FUNCTIONS):
+            raise ValueError(f"{what} invalide {text!r} : appel non autorisé")
+    return tree.body
+
+def _compile_lambda(node, label):
+    """
+    Compile un nœud d'expression en fonction de ses noms libres.
+    Retourne (noms, fonction, constantes littérales).
+    """
+    names = []
+    constants = set()
+    for sub in ast.walk(node):
+        if isinstance(sub, ast.Name) and sub.id not in GUARD_FUNCTIONS and sub.id not in names:
+            names.append(sub.id)
+        elif isinstance(sub, ast.Constant):
+            constants.add(sub.value)
+    args = ast.arguments(posonlyargs=[], args=[ast.arg(arg=n) for n in names],
+                         kwonlyargs=[], kw_defaults=[], defaults=[])
+    lam = ast.Expression(ast.Lambda(args=args, body=node))
+    ast.fix_missing_locations(lam)
+    code = compile(lam, f"<{label}>", "eval")
+    return tuple(names), eval(code, {"__builtins__": GUARD_FUNCTIONS}), constants
+
+def _split_top(text, separator):
+    """Découpe text sur separator hors parenthèses / crochets et hors chaînes "..."."""
+    parts, depth, in_string, start, i = [], 0, False, 0, 0
+    while i < len(text):
+        ch = text[i]
+        if ch == '"':
+            in_string = not in_string
+        elif not in_string:
+            if ch in "([{":
+                depth += 1
+            elif ch in ")]}":
+                depth -= 1
+            elif depth == 0 and text.startswith(separator, i):
+                parts.append(text[start:i])
+                i += len(separator)
+                start = i
+                continue
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+class Guard:
+    """
+    Garde d'une transition (ex: "x != y and x == Rouge"), compilée une fois.
+    Le texte est découpé sur les "and" de premier niveau ; chaque conjonction
+    devient une fonction Python dont les paramètres sont ses noms libres.
+    Un nom qui n'est pas une variable d'entrée vaut son propre texte (Rouge
+    -> "Rouge"), comme une expression d'arc.
+    Seul le texte est sérialisé (pickle), les fonctions sont recompilées.
+    """
+    def __init__(self, text, label="garde"):
+        self.text = text
+        self.label = label
+        self._compile()
+
+    def _compile(self):
+        body = _parse_expression(self.text, "Garde")
+        parts = body.values if isinstance(body, ast.BoolOp) and isinstance(body.op, ast.And) else [body]
+        self.conjuncts = []  # (noms libres, fonction)
+        self.constants = set()
+        self.symmetric = _is_symmetric(body)  # voir PetriNet.add_symmetry_class
+        for part in parts:
+            names, fn, constants = _compile_lambda(part, self.label)
+            self.conjuncts.append((names, fn))
+            self.constants |= constants
+
+    def __getstate__(self):
+        return {"text": self.text, "label": self.label}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compile()
+
+class Inscription:
+    """
+    Inscription d'arc compilée une fois (notation inspirée de CPN Tools) :
+        x              un jeton, la couleur liée à x
+        2'x            deux jetons
+        (x, "A")       un jeton n-uplet
+        x ++ 3'"B"     somme de multiensembles
+    Arc de sortie : chaque terme est une expression restreinte (comme les
+    gardes) des variables liées ; un nom qui n'est pas une variable d'entrée
+    vaut son texte (A -> "A"). Arc d'entrée : chaque terme est un motif,
+    variable, constante (nombre ou "texte") ou n-uplet de motifs, avec une
+    multiplicité constante. Les chaînes s'écrivent entre guillemets doubles,
+    l'apostrophe étant réservée à la multiplicité.
+    """
+    def __init__(self, text, is_input=False, label="arc"):
+        if not isinstance(text, str):
+            raise ValueError(f"Inscription invalide {text!r} : texte attendu")
+        self.text = text
+        self.is_input = is_input
+        self.label = label
+        self._compile()
+
+    def _compile(self):
+        self.terms = []     # sortie : (multiplicité (noms, fn) ou None, valeur (noms, fn), nom seul)
+        self.patterns = []  # entrée : (multiplicité, motif)
+        self.constants = set()
+        # Symétrie des couleurs : sorties qui recopient une variable ou écrivent
+        # une constante, sans n-uplet (ses couleurs internes ne seraient pas renommées)
+        self.symmetric = True
+        for part in _split_top(self.text, "++"):
+            pieces = _split_top(part, "'")
+            if len(pieces) > 2 or not pieces[-1].strip():
+                raise ValueError(f"Inscription invalide {self.text!r}")
+            mult = None
+            if len(pieces) == 2:
+                mult_node = _parse_expression(pieces[0], "Multiplicité")
+                mult = _compile_lambda(mult_node, self.label)
+                self.symmetric &= _is_symmetric(mult_node)
+            node = _parse_expression(pieces[-1], "Inscription")
+
+            if self.is_input:
+                count = 1
+                if mult is not None:
+                    names, fn, _ = mult
+                    count = fn() if not names else None
+                    if not isinstance(count, int) or count < 1:
+                        raise ValueError(f"Multiplicité d'entrée non constante dans {self.text!r}")
+                pattern = self._pattern(node)
+                self.patterns.append((count, pattern))
+                self.symmetric &= pattern[0] != "tuple"
+            else:
+                value = _compile_lambda(node, self.label)
+                bare = node.id if isinstance(node, ast.Name) else None
+                self.terms.append((mult and mult[:2], value[:2], bare))
+                self.symmetric &= bare is not None or (isinstance(node, ast.Constant)
+                                                       and not isinstance(node.value, tuple))
+                self.constants |= value[2]
+
+    def _pattern(self, node):
+        """Motif d'entrée : ("var", nom) | ("const", valeur) | ("tuple", (motifs...))."""
+        if isinstance(node, ast.Name):
+            return ("var", node.id)
+        if isinstance(node, ast.Tuple):
+            return ("tuple", tuple(self._pattern(elt) for elt in node.elts))
+        try:
+            value = ast.literal_eval(node)
+        except ValueError:
+            raise ValueError(f"Motif d'entrée invalide dans {self.text!r}") from None
+        self.constants.add(value)
+        return ("const", value)
+
+    def __getstate__(self):
+        return {"text": self.text, "is_input": self.is_input, "label": self.label}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compile()
+
+def _pattern_names(pattern):
+    kind, content = pattern
+    if kind == "var":
+        return {content}
+    if kind == "tuple":
+        return set().union(*(_pattern_names(sub) for sub in content))
+    return set()
+
 class Transition:
     def __init__(self, name, guard=None):
         self.name = name
-        self.guard = guard 
+        self.guard = guard or None  # texte de la garde (sauvegarde / affichage)
+        self.compiled_guard = Guard(guard, f"garde {name}") if self.guard else None
 
 class Arc:
     def __init__(self, source, target, expression="x"):
         self.source = source
         self.target = target
-        self.expression = expression 
+        self.expression = expression
+        self.inscription = Inscription(expression, is_input=isinstance(source, Place),
+                                       label=f"arc {source.name}->{target.name}")
+
+class CompiledNet:
+    """
+    Vue compilée (lecture seule) de la structure du réseau.
+    Les places sont numérotées dans l'ordre de get_marking_tuple et chaque
+    transition connaît directement ses arcs d'entrée / sortie, ce qui évite
+    de parcourir self.arcs à chaque test de tir.
+    Les inscriptions constantes sont évaluées ici une fois pour toutes, en
+    multiensembles d'ids de couleur (d'où le besoin du réseau, qui les interne).
+    """
+    def __init__(self, net):
+        self.place_names = sorted(net.places.keys())
+        self.place_index = {name: i for i, name in enumerate(self.place_names)}
+        self.transition_names = list(net.transitions.keys())
+        self.transition_index = {name: i for i, name in enumerate(self.transition_names)}
+
+        # Par transition (indice) : tuples de (indice_place, arc)
+        pre = [[] for _ in self.transition_names]
+        post = [[] for _ in self.transition_names]
+        for arc in net.arcs:
+            if isinstance(arc.source, Place) and isinstance(arc.target, Transition):
+                t_idx = self.transition_index.get(arc.target.name)
+                p_idx = self.place_index.get(arc.source.name)
+                if t_idx is not None and p_idx is not None:
+                    pre[t_idx].append((p_idx, arc))
+            elif isinstance(arc.source, Transition) and isinstance(arc.target, Place):
+                t_idx = self.transition_index.get(arc.source.name)
+                p_idx = self.place_index.get(arc.target.name)
+                if t_idx is not None and p_idx is not None:
+                    post[t_idx].append((p_idx, arc))
+        self.pre = [tuple(arcs) for arcs in pre]
+        self.post = [tuple(arcs) for arcs in post]
+
+        # Motifs d'entrée par transition : (motif, ((indice_place, multiplicité), ...)).
+        # Un même motif sur plusieurs arcs désigne la même couleur partout.
+        # Constantes (clés de couleur (type, valeur)) écrites ou lues par les
+        # inscriptions et les gardes : voir la réduction par symétrie.
+        self.inputs = []
+        self.input_names = []
+        self.constants = set()
+        for t_idx in range(len(self.transition_names)):
+            groups = {}
+            for p_idx, arc in self.pre[t_idx]:
+                self.constants |= {PetriNet._colour_key(c) for c in arc.inscription.constants}
+                for count, pattern in arc.inscription.patterns:
+                    per_place = groups.setdefault(pattern, {})
+                    per_place[p_idx] = per_place.get(p_idx, 0) + count
+            units = tuple((pattern, tuple(per_place.items())) for pattern, per_place in groups.items())
+            self.inputs.append(units)
+            self.input_names.append(frozenset().union(*(_pattern_names(p) for p, _ in units)))
+
+        # Dépendances place <-> transitions (réduction par ensembles têtus)
+        self.consumers = [set() for _ in self.place_names]  # p -> transitions qui lisent p
+        self.producers = [set() for _ in self.place_names]  # p -> transitions qui écrivent p
+        self.needed = []  # t -> {p: nombre de jetons consommés dans p}
+        for t_idx in range(len(self.transition_names)):
+            needed = {}
+            for _, places in self.inputs[t_idx]:
+                for p_idx, count in places:
+                    self.consumers[p_idx].add(t_idx)
+                    needed[p_idx] = needed.get(p_idx, 0) + count
+            for p_idx, _ in self.post[t_idx]:
+                self.producers[p_idx].add(t_idx)
+            self.needed.append(needed)
+
+        # Sorties par transition : (indice_place, multiensemble constant, termes)
+        # avec multiensemble constant = ((id_couleur, nombre), ...) déjà calculé
+        # et termes = (multiplicité, valeur) restants, chacun étant None,
+        # ("var", nom) pour une variable seule, ou (arguments, fonction) avec
+        # arguments = ((est_variable, nom), ...).
+        self.outputs = []
+        for t_idx in range(len(self.transition_names)):
+            variables = self.input_names[t_idx]
+            outputs = []
+            for p_idx, arc in self.post[t_idx]:
+                constant = {}
+                terms = []
+                for mult, value, bare in arc.inscription.terms:
+                    names = set(value[0]) | (set(mult[0]) if mult else set())
+                    # Noms non liés = texte : une constante de plus
+                    self.constants |= {(str, n) for n in names if n not in variables}
+                    if not names & variables:
+                        try:
+                            count = 1 if mult is None else mult[1](*mult[0])
+                            colour = value[1](*value[0])
+                        except Exception as e:
+                            raise ValueError(f"Inscription invalide {arc.expression!r} : "
+                                             f"{type(e).__name__}: {e}") from None
+                        self._check_count(count, arc.expression)
+                        if count:
+                            colour_id = net.intern_colour(colour)
+                            constant[colour_id] = constant.get(colour_id, 0) + count
+                            self.constants.add(PetriNet._colour_key(colour))
+                        continue
+                    if bare in variables:
+                        value = ("var", bare)  # variable seule : pas d'appel de fonction au tir
+                    else:
+                        value = self._term(value, variables)
+                    terms.append((self._term(mult, variables), value))
+                outputs.append((p_idx, tuple(constant.items()), tuple(terms)))
+            self.outputs.append(tuple(outputs))
+
+        # Gardes par transition : (variables requises, arguments, fonction)
+        # avec arguments = ((est_variable, nom), ...). Les noms qui ne sont
+        # pas des variables d'entrée sont passés comme texte.
+        self.guards = []
+        for t_idx, t_name in enumerate(self.transition_names):
+            variables = self.input_names[t_idx]
+            guard = net.transitions[t_name].compiled_guard
+            conjuncts = []
+            if guard is not None:
+                self.constants |= {PetriNet._colour_key(c) for c in guard.constants}
+                for names, fn in guard.conjuncts:
+                    self.constants |= {(str, n) for n in names if n not in variables}
+                    conjuncts.append((frozenset(n for n in names if n in variables),
+                                      tuple((n in variables, n) for n in names), fn))
+            self.guards.append(tuple(conjuncts))
+
+    @staticmethod
+    def _term(compiled, variables):
+        if compiled is None:
+            return None
+        names, fn = compiled
+        return tuple((n in variables, n) for n in names), fn
+
+    @staticmethod
+    def _check_count(count, where):
+        if not isinstance(count, int) or count < 0:
+            raise ValueError(f"Multiplicité invalide {count!r} ({where})")
+
+    def input_arcs(self, transition_name):
+        t_idx = self.transition_index.get(transition_name)
+        if t_idx is None: return ()
+        return tuple(arc for _, arc in self.pre[t_idx])
+
+    def output_arcs(self, transition_name):
+        t_idx = self.transition_index.get(transition_name)
+        if t_idx is None: return ()
+        return tuple(arc for _, arc in self.post[t_idx])
+
+# Taille maximale des caches d'interning hors exploration (tir, simulation) :
+# au-delà ils sont vidés, les sous-marquages restent valides (comparés par valeur)
+LIVE_INTERN_LIMIT = 1 << 16
 
 class PetriNet:
     def __init__(self):
         self.places = {}
         self.transitions = {}
         self.arcs = []
+        self._compiled = None  # Vue compilée, reconstruite à la demande
+
+        # Table des couleurs du réseau : id -> valeur, (type, valeur) -> id
+        self.colours = []
+        self.colour_ids = {}
+        self.colour_sort_keys = []  # id -> clé d'ordre canonique (type, repr)
+        # Hash-consing des sous-marquages : un seul objet par contenu
+        self._submarkings = {}
+        # Caches de conversion sous-marquage local <-> forme portable
+        self._export_cache = {}
+        self._import_cache = {}
+        # Index par sous-marquage : ({id_couleur: nombre}, couleurs dans l'ordre canonique)
+        self._sub_index = {}
+        # Marquage vivant encodé (liste de sous-marquages) et indices des
+        # transitions tirables, tenus à jour par fire ; None = à recalculer
+        self._live = None
+        self._enabled = None
+        # Classes de couleurs interchangeables (réduction par symétrie)
+        self.symmetry_classes = []
+        self._symmetry = None  # ids par classe, recalculés à la demande
         
         # Structures pour le graphe d'états (Logique de Mahdi)
         self.marking_to_id = {}
         self.id_to_marking = {}
-        self.edges = []
+        self.edges = EdgeGraph()
+
+    def __getstate__(self):
+        # La vue compilée contient les fonctions des gardes : reconstruite après pickle
+        state = self.__dict__.copy()
+        state["_compiled"] = None
+        return state
 
     def add_place(self, name, tokens_list=None):
         self.places[name] = Place(name, tokens_list)
+        self.invalidate()
 
     def add_transition(self, name, guard=None):
         self.transitions[name] = Transition(name, guard)
+        self.invalidate()
+
+    def set_guard(self, name, guard):
+        """Remplace la garde de la transition name ("" ou None : aucune) ; ValueError si invalide."""
+        transition = self.transitions[name]
+        compiled = Guard(guard, f"garde {name}") if guard else None
+        transition.guard = guard or None
+        transition.compiled_guard = compiled
+        self.invalidate()
 
     def add_arc(self, source_name, target_name, expression="x"):
         source = self.places.get(source_name) or self.transitions.get(source_name)
         target = self.places.get(target_name) or self.transitions.get(target_name)
         if source and target:
             self.arcs.append(Arc(source, target, expression))
+            self.invalidate()
+
+    # --- VUE COMPILÉE ---
+
+    def compiled(self):
+        """Retourne la vue compilée du réseau (construite paresseusement)."""
+        if self._compiled is None:
+            self._compiled = CompiledNet(self)
+        return self._compiled
+
+    def invalidate(self):
+        """À appeler après toute modification structurelle du réseau."""
+        self._compiled = None
+        self._symmetry = None
+        self._live = None
+        self._enabled = None
 
     # --- LOGIQUE DE TIR CPN (La tienne) ---
 
     def get_input_arcs(self, transition):
-        return [arc for arc in self.arcs if arc.target == transition]
+        return list(self.compiled().input_arcs(transition.name))
 
     def get_output_arcs(self, transition):
-        return [arc for arc in self.arcs if arc.source == transition]
+        return list(self.compiled().output_arcs(transition.name))
+
+    # Les transitions tirables du réseau vivant sont calculées une fois, puis
+    # seules celles qui lisent une place modifiée par un tir sont re-testées.
+    # Après une modification directe des jetons (place.tokens), appeler
+    # refresh_marking().
+
+    def _live_marking(self):
+        if self._live is None:
+            view = self.compiled()
+            self._live = list(self.get_marking_tuple())
+            self._enabled = {t_idx for t_idx in range(len(view.transition_names))
+                             if self._enabled_on(view, t_idx, self._live)}
+        return self._live
+
+    def refresh_marking(self):
+        """Oublie le marquage vivant encodé (jetons modifiés hors de fire)."""
+        self._live = None
+        self._enabled = None
+
+    def enabled_transitions(self):
+        """Noms des transitions tirables sur le marquage courant, dans l'ordre du réseau."""
+        self._live_marking()
+        names = self.compiled().transition_names
+        return [names[t_idx] for t_idx in sorted(self._enabled)]
 
     def is_enabled(self, transition_name):
-        transition = self.transitions.get(transition_name)
-        if not transition: return False
-        
-        input_arcs = self.get_input_arcs(transition)
-        for arc in input_arcs:
-            if not arc.source.tokens:
-                return False
-        return True
+        view = self.compiled()
+        t_idx = view.transition_index.get(transition_name)
+        if t_idx is None: return False
+        self._live_marking()
+        return t_idx in self._enabled
 
     def fire(self, transition_name):
-        if not self.is_enabled(transition_name):
+        """
+        Tire la transition sur le réseau vivant avec sa première liaison.
+        Coût proportionnel aux places touchées et aux transitions qui les lisent.
+        """
+        view = self.compiled()
+        t_idx = view.transition_index.get(transition_name)
+        if t_idx is None: return False
+        live = self._live_marking()
+        if t_idx not in self._enabled:
             return False
-            
-        transition = self.transitions[transition_name]
-        input_arcs = self.get_input_arcs(transition)
-        output_arcs = self.get_output_arcs(transition)
-        binding = {} 
-
-        # Consommation
-        for arc in input_arcs:
-            var_name = arc.expression
-            if arc.source.tokens:
-                token_val = arc.source.tokens.pop(0)
-                binding[var_name] = token_val
+        binding = next(self._bindings(view, t_idx, live))
+        produced = list(self._produce(view, t_idx, binding))
+
+        # Consommation : on retire les jetons liés, sans réordonner les autres
+        for places, colour_id in binding[2]:
+            key = self._colour_key(self.colours[colour_id])
+            for _, p_idx, multiplicity in places:
+                tokens = self.places[view.place_names[p_idx]].tokens
+                for _ in range(multiplicity):
+                    pos = next(i for i, token in enumerate(tokens) if self._colour_key(token) == key)
+                    del tokens[pos]
 
         # Production
-        for arc in output_arcs:
-            var_name = arc.expression
-            if var_name in binding:
-                val_to_produce = binding[var_name]
-                arc.target.tokens.append(val_to_produce)
+        for p_idx, colour_id, count in produced:
+            self.places[view.place_names[p_idx]].tokens.extend([self.colours[colour_id]] * count)
+
+        # Mise à jour incrémentale : marquage encodé et transitions dépendantes
+        affected = set()
+        for p_idx, counts in self._changed_counts(live, binding[2], produced).items():
+            live[p_idx] = self._intern_submarking(counts)
+            affected |= view.consumers[p_idx]
+        for u in affected:
+            if self._enabled_on(view, u, live):
+                self._enabled.add(u)
             else:
-                arc.target.tokens.append(var_name)
+                self._enabled.discard(u)
+        self._bound_interning()
         return True
 
+    # --- ENCODAGE COMPACT DES MARQUAGES ---
+    # Un marquage est un tuple (une entrée par place, ordre alphabétique) de
+    # sous-marquages ; un sous-marquage est un tuple trié de paires
+    # (id_couleur, nombre). Ex : 100 jetons "Rouge" -> ((0, 100),)
+
+    @staticmethod
+    def _colour_key(value):
+        if isinstance(value, list):
+            value = tuple(value)
+        return (type(value), value)  # 1 et "1" restent deux couleurs distinctes
+
+    def intern_colour(self, value):
+        """Retourne l'id de la couleur (en la créant si besoin)."""
+        if isinstance(value, list):
+            value = tuple(value)
+        key = self._colour_key(value)
+        colour_id = self.colour_ids.get(key)
+        if colour_id is None:
+            colour_id = len(self.colours)
+            self.colours.append(value)
+            self.colour_ids[key] = colour_id
+            self.colour_sort_keys.append((type(value).__name__, repr(value)))
+        return colour_id
+
+    def _intern_submarking(self, counts):
+        """Construit le sous-marquage canonique (partagé) d'un dict {id_couleur: nombre}."""
+        sub = tuple(sorted((c, n) for c, n in counts.items() if n > 0))
+        return self._submarkings.setdefault(sub, sub)
+
+    def _bound_interning(self):
+        """Vide les caches d'interning s'ils dépassent LIVE_INTERN_LIMIT (tirs en série)."""
+        if max(len(self._submarkings), len(self._sub_index),
+               len(self._export_cache), len(self._import_cache)) > LIVE_INTERN_LIMIT:
+            self._submarkings = {}
+            self._sub_index = {}
+            self._export_cache = {}
+            self._import_cache = {}
+
+    def _encode_tokens(self, tokens):
+        # Si tokens est None ou un entier par erreur, on normalise en liste vide
+        if tokens is None or isinstance(tokens, int):
+            return ()
+        counts = {}
+        for token in tokens:
+            colour_id = self.intern_colour(token)
+            counts[colour_id] = counts.get(colour_id, 0) + 1
+        return self._intern_submarking(counts)
+
+    def _decode_tokens(self, submarking):
+        tokens = []
+        for colour_id, count in submarking:
+            tokens.extend([self.colours[colour_id]] * count)
+        return tokens
+
+    def encode_marking(self, tokens_by_place):
+        """Marquage compact à partir de {nom_place: [jetons]} (places absentes = vides)."""
+        return tuple(self._encode_tokens(tokens_by_place.get(name, []))
+                     for name in self.compiled().place_names)
+
+    def decode_marking(self, marking):
+        """Inverse de encode_marking : {nom_place: [jetons]}."""
+        return {name: self._decode_tokens(sub)
+                for name, sub in zip(self.compiled().place_names, marking)}
+
+    def format_marking(self, marking):
+        """Affichage 'Multiset' d'un marquage (ex: p1: [2 Rouge, 1 Bleu])."""
+        state_desc = []
+        for place_name, sub in zip(self.compiled().place_names, marking):
+            if not sub: continue
+            token_str = ", ".join(f"{cnt} {self.colours[col]}" for col, cnt in sub)
+            state_desc.append(f"{place_name}: [{token_str}]")
+        return " | ".join(state_desc) if state_desc else "Vide"
+
+    def export_marking(self, marking):
+        """
+        Forme "portable" d'un marquage : les ids de couleur (propres à ce
+        processus) sont remplacés par les valeurs, dans un ordre canonique.
+        Sert à échanger des marquages entre processus ou à les mettre en cache.
+        """
+        cache = self._export_cache
+        portable = []
+        for sub in marking:
+            out = cache.get(sub)
+            if out is None:
+                pairs = sorted(sub, key=lambda pair: self.colour_sort_keys[pair[0]])
+                out = cache[sub] = tuple((self.colours[c], n) for c, n in pairs)
+            portable.append(out)
+        return tuple(portable)
+
+    def import_marking(self, portable):
+        """Inverse de export_marking, dans la table de couleurs de ce réseau."""
+        cache = self._import_cache
+        marking = []
+        for out in portable:
+            sub = cache.get(out)
+            if sub is None:
+                sub = cache[out] = self._intern_submarking(
+                    {self.intern_colour(v): n for v, n in out})
+            marking.append(sub)
+        return tuple(marking)
+
+    # --- SYMÉTRIE DES COULEURS ---
+    # Les couleurs d'une classe symétrique sont interchangeables : deux
+    # marquages qui ne diffèrent que par une permutation de ces couleurs
+    # (une orbite) sont représentés par un seul marquage canonique.
+
+    def add_symmetry_class(self, colours):
+        """
+        Déclare des couleurs interchangeables (ex: ["Rouge", "Bleu", "Vert"]).
+        ValueError si le réseau ne serait alors pas symétrique : une couleur
+        déjà dans une classe, écrite par un arc ou citée par une garde comme
+        constante ; une garde qui compare des couleurs autrement que par
+        égalité (x < y, min(x, y)...) ; une sortie calculée (autre qu'une
+        variable ou une constante) ; un jeton ou un motif n-uplet.
+        """
+        self.symmetry_classes.append(tuple(colours))
+        self._symmetry = None
+        try:
+            self._symmetry_groups()
+        except ValueError:
+            self.symmetry_classes.pop()
+            self._symmetry = None
+            raise
+
+    def _symmetry_groups(self):
+        """Ids des couleurs de chaque classe, dans l'ordre canonique."""
+        if self._symmetry is None:
+            constants = self.compiled().constants
+            if self.symmetry_classes:
+                self._check_symmetric()
+            seen = set()
+            groups = []
+            for colours in self.symmetry_classes:
+                for value in colours:
+                    if self._colour_key(value) in constants:
+                        raise ValueError(f"La couleur symétrique {value!r} est une constante du réseau")
+                    if (type(value), value) in seen:
+                        raise ValueError(f"La couleur {value!r} appartient à plusieurs classes")
+                    seen.add((type(value), value))
+                ids = {self.intern_colour(value) for value in colours}
+                if len(ids) > 1:
+                    groups.append(sorted(ids, key=self.colour_sort_keys.__getitem__))
+            self._symmetry = groups
+        return self._symmetry
+
+    def _check_symmetric(self):
+        """ValueError si une garde, une inscription ou un jeton empêche de renommer les couleurs."""
+        for name, transition in self.transitions.items():
+            guard = transition.compiled_guard
+            if guard is not None and not guard.symmetric:
+                raise ValueError(f"Garde de {name} ({guard.text!r}) non symétrique : "
+                                 "seuls ==, !=, in, not in sont permis")
+        for arc in self.arcs:
+            if not arc.inscription.symmetric:
+                raise ValueError(f"Inscription {arc.expression!r} ({arc.inscription.label}) "
+                                 "non symétrique : variables et constantes seulement")
+        for name, place in self.places.items():
+            if any(isinstance(token, (tuple, list)) for token in place.tokens):
+                raise ValueError(f"Jeton n-uplet dans {name} : symétrie non supportée")
+
+    def canonical_marking(self, marking):
+        """
+        Représentant canonique de l'orbite d'un marquage. Dans chaque classe,
+        les couleurs sont triées selon leur signature (nombre de jetons par
+        place) puis renommées dans l'ordre canonique de la classe : deux
+        marquages de la même orbite ont donc le même représentant.
+        """
+        groups = self._symmetry_groups()
+        if not groups:
+            return marking
+        signatures = {c: [] for members in groups for c in members}
+        for p_idx, sub in enumerate(marking):
+            for colour_id, count in sub:
+                if colour_id in signatures:
+                    signatures[colour_id].append((p_idx, count))
+
+        mapping = {}
+        for members in groups:
+            ordered = sorted(members, key=signatures.__getitem__)
+            for old, new in zip(ordered, members):
+                if old != new:
+                    mapping[old] = new
+        return self._rename_colours(marking, mapping)
+
+    def _rename_colours(self, marking, mapping):
+        if not mapping:
+            return marking
+        new_marking = []
+        for sub in marking:
+            if any(colour_id in mapping for colour_id, _ in sub):
+                sub = self._intern_submarking({mapping.get(c, c): n for c, n in sub})
+            new_marking.append(sub)
+        return tuple(new_marking)
+
+    def orbit(self, marking):
+        """Tous les marquages concrets de l'orbite (taille jusqu'au produit des n! des classes)."""
+        groups = self._symmetry_groups()
+        result = {marking}
+        for members in groups:
+            expanded = set()
+            for perm in itertools.permutations(members):
+                mapping = {old: new for old, new in zip(members, perm) if old != new}
+                for m in result:
+                    expanded.add(self._rename_colours(m, mapping))
+            result = expanded
+        return result
+
+    def iter_concrete_states(self):
+        """Développe un graphe réduit par symétrie : (id du représentant, marquage concret)."""
+        for state_id, marking in self.id_to_marking.items():
+            for concrete in self.orbit(marking):
+                yield state_id, concrete
+
     # --- ANALYSE & GRAPHE (Logique de Mahdi ADAPTÉE CPN) ---
     def get_marking_tuple(self):
-            """
-            Génère une signature unique et hashable (tuple) de l'état actuel.
-            Vital pour les clés de dictionnaire dans le graphe de reachability.
-            """
-            place_names = sorted(self.places.keys())
-            marking_list = []
-            
-            for name in place_names:
-                tokens = self.places[name].tokens
-                
-                # Si tokens est None ou un entier par erreur, on normalise en liste vide
-                if tokens is None or isinstance(tokens, int):
-                    safe_tokens = []
-                else:
-                    safe_tokens = tokens
-                    
-                # On convertit tout en string et on trie pour que ["A", "B"] == ["B", "A"]
-                sorted_tokens = tuple(sorted(str(t) for t in safe_tokens))
-                marking_list.append(sorted_tokens)
-            
-        return tuple(marking_list)
+        """
+        Génère une signature unique et hashable (tuple) de l'état actuel.
+        Vital pour les clés de dictionnaire dans le graphe de reachability.
+        """
+        return tuple(self._encode_tokens(self.places[name].tokens)
+                     for name in self.compiled().place_names)
+
     def _load_marking_tuple(self, marking_tuple):
         """Restaure le réseau dans un état précis (Logique Mahdi)."""
-        place_names = sorted(self.places.keys())
-        for name, tokens_tuple in zip(place_names, marking_tuple):
-            # On reconvertit le tuple en liste pour que le CPN puisse travailler
-            self.places[name].tokens = list(tokens_tuple)
+        place_names = self.compiled().place_names
+        for name, sub in zip(place_names, marking_tuple):
+            # On redéplie le multiensemble en liste pour que le CPN puisse travailler
+            self.places[name].tokens = self._decode_tokens(sub)
+        self.refresh_marking()
 
-    def init_state_space_structures(self):
-        self.marking_to_id = {}
-        self.id_to_marking = {}
-        self.edges = []
+    def init_state_space_structures(self, store=None):
+        """
+        Prépare les structures du graphe d'états. Avec store (storage.SQLiteStateStore),
+        elles sont remplacées par les vues sur disque du magasin, vidé au préalable.
+        """
+        if store is None:
+            self.marking_to_id = {}
+            self.id_to_marking = {}
+            self.edges = EdgeGraph()
+        else:
+            store.reset()
+            self.marking_to_id = store.index
+            self.id_to_marking = store.states
+            self.edges = store.edges
+        self._submarkings = {}
+        self._sub_index = {}
+        # Résultat partiel : complete=False si une limite a été atteinte,
+        # frontier = ids des états découverts mais pas encore développés
+        self.complete = True
+        self.stop_reason = None
+        self.frontier = []
+
+    # --- SUCCESSEURS PURS (sans toucher au réseau vivant) ---
 
-    def build_reachability_graph(self):
+    def fire_marking(self, transition_name, marking):
         """
-        ALGORITHME DE MAHDI (BFS)
-        Intégralement conservé, il fonctionne parfaitement une fois
-        que get_marking_tuple est corrigé.
+        Tire une transition sur un marquage (tuple) sans modifier les places.
+        Retourne le nouveau marquage, ou None si la transition n'est pas tirable.
+        Seules les places lues ou écrites par la transition sont recopiées.
         """
-        self.init_state_space_structures()
+        view = self.compiled()
+        t_idx = view.transition_index.get(transition_name)
+        if t_idx is None: return None
+        return self._fire_marking(view, t_idx, marking)
+
+    def _fire_marking(self, view, t_idx, marking):
+        binding = next(self._bindings(view, t_idx, marking), None)
+        if binding is None:
+            return None
+        return self._apply_binding(view, t_idx, marking, binding)
+
+    # --- LIAISONS ---
+    # Une liaison est un triplet (env, ids, consommés) :
+    #   env       {variable: valeur} pour les gardes et les inscriptions ;
+    #   ids       {variable: id_couleur} des variables liées directement à un
+    #             jeton (évite de ré-interner la couleur à la production) ;
+    #   consommés ((places, id_couleur), ...) avec places = ((comptes, p, m), ...).
+
+    def _index_sub(self, sub):
+        """Index d'un sous-marquage (partagé, donc mis en cache par objet)."""
+        index = self._sub_index.get(sub)
+        if index is None:
+            ordered = sorted((c for c, _ in sub), key=self.colour_sort_keys.__getitem__)
+            index = self._sub_index[sub] = (dict(sub), ordered)
+        return index
+
+    def bindings(self, transition_name, marking=None):
+        """Liaisons tirables ({variable: valeur}) sur un marquage (par défaut le courant)."""
+        view = self.compiled()
+        t_idx = view.transition_index.get(transition_name)
+        if t_idx is None: return []
+        if marking is None:
+            marking = self.get_marking_tuple()
+        return [env for env, _, _ in self._bindings(view, t_idx, marking)]
+
+    def _bindings(self, view, t_idx, marking):
+        """
+        Itère sur les liaisons tirables de la transition.
+        Jointure par la plus petite place : les motifs constants sont vérifiés
+        d'abord, puis on lie le motif dont une place contient le moins de
+        couleurs distinctes ; chaque motif ne parcourt que les couleurs de sa
+        plus petite place, vérifiées ensuite par accès direct aux comptes des
+        autres places. L'ordre des liaisons suit l'ordre canonique des
+        couleurs (indépendant des ids du processus).
+        Chaque conjonction de la garde est évaluée dès que ses variables sont
+        liées, ce qui coupe la recherche au plus tôt.
+        """
+        units = view.inputs[t_idx]
+        for _, places in units:
+            for p_idx, _ in places:
+                if not marking[p_idx]:
+                    return
+        guards = view.guards[t_idx]
+        if guards and not self._guard_holds([g for g in guards if not g[0]], {}):
+            return
+        order = sorted(units, key=lambda u: (u[0][0] != "const",
+                                             min(len(marking[p]) for p, _ in u[1])))
+        plan = []
+        bound = set()
+        for pattern, places in order:
+            names = bound | _pattern_names(pattern)
+            checks = [g for g in guards if g[0] <= names and not g[0] <= bound]
+            bound = names
+            if pattern[0] == "const":
+                colour_id = self.colour_ids.get(self._colour_key(pattern[1]))
+                candidates = () if colour_id is None else (colour_id,)
+            else:
+                smallest = min(places, key=lambda pm: len(marking[pm[0]]))[0]
+                candidates = self._index_sub(marking[smallest])[1]
+            plan.append((pattern, candidates,
+                         tuple((self._index_sub(marking[p])[0], p, m) for p, m in places), checks))
+
+        colours = self.colours
+        used = {}      # (place, couleur) -> jetons déjà pris par les motifs liés
+        env, ids, consumed = {}, {}, []
+
+        def extend(k):
+            if k == len(plan):
+                yield dict(env), dict(ids), tuple(consumed)
+                return
+            pattern, candidates, places, checks = plan[k]
+            kind = pattern[0]
+            if kind == "var" and pattern[1] in env:
+                # Variable déjà liée par un n-uplet : une seule couleur possible
+                colour_id = self.colour_ids.get(self._colour_key(env[pattern[1]]))
+                candidates = () if colour_id is None else (colour_id,)
+            for colour_id in candidates:
+                if not all(counts.get(colour_id, 0) >= used.get((p, colour_id), 0) + m
+                           for counts, p, m in places):
+                    continue
+                added = []
+                if kind == "var":
+                    if pattern[1] not in env:
+                        env[pattern[1]] = colours[colour_id]
+                        ids[pattern[1]] = colour_id
+                        added.append(pattern[1])
+                elif kind == "tuple" and not self._match(pattern, colours[colour_id], env, added):
+                    self._unbind(added, env, ids)
+                    continue
+                if checks and not self._guard_holds(checks, env):
+                    self._unbind(added, env, ids)
+                    continue
+                for _, p, m in places:
+                    used[(p, colour_id)] = used.get((p, colour_id), 0) + m
+                consumed.append((places, colour_id))
+                yield from extend(k + 1)
+                consumed.pop()
+                for _, p, m in places:
+                    used[(p, colour_id)] -= m
+                self._unbind(added, env, ids)
+
+        yield from extend(0)
+
+    def _match(self, pattern, value, env, added):
+        """Filtre value par le motif en complétant env ; False si incompatible."""
+        kind, content = pattern
+        if kind == "var":
+            if content in env:
+                return self._colour_key(env[content]) == self._colour_key(value)
+            env[content] = value
+            added.append(content)
+            return True
+        if kind == "const":
+            return self._colour_key(content) == self._colour_key(value)
+        if not isinstance(value, tuple) or len(value) != len(content):
+            return False
+        return all(self._match(sub, item, env, added) for sub, item in zip(content, value))
+
+    @staticmethod
+    def _unbind(added, env, ids):
+        for name in added:
+            del env[name]
+            ids.pop(name, None)
+
+    def _guard_holds(self, checks, env):
+        """Une garde qui échoue à l'évaluation (types incompatibles...) est fausse."""
+        for _, args, fn in checks:
+            try:
+                if not fn(*[env[n] if is_var else n for is_var, n in args]):
+                    return False
+            except Exception:
+                return False
+        return True
+
+    def _produce(self, view, t_idx, binding):
+        """
+        Itère sur les (indice_place, id_couleur, nombre) produits par une liaison.
+        Une inscription qui échoue à l'évaluation (ex: "x + 1" sur une chaîne)
+        lève ValueError avec le nom de la transition.
+        """
+        env, ids, _ = binding
+        for p_idx, constant, terms in view.outputs[t_idx]:
+            for colour_id, count in constant:
+                yield p_idx, colour_id, count
+            for mult, value in terms:
+                try:
+                    if mult is None:
+                        count = 1
+                    else:
+                        args, fn = mult
+                        count = fn(*[env[n] if is_var else n for is_var, n in args])
+                    if value[0] == "var":
+                        colour_id = ids.get(value[1])
+                        if colour_id is None:
+                            colour_id = self.intern_colour(env[value[1]])
+                    else:
+                        args, fn = value
+                        colour_id = self.intern_colour(fn(*[env[n] if is_var else n for is_var, n in args]))
+                except Exception as e:
+                    raise ValueError(f"Inscription de sortie de {view.transition_names[t_idx]} "
+                                     f"impossible à évaluer avec {env} : {type(e).__name__}: {e}") from None
+                if mult is not None:
+                    CompiledNet._check_count(count, view.transition_names[t_idx])
+                    if not count:
+                        continue
+                yield p_idx, colour_id, count
+
+    def _changed_counts(self, marking, consumed, produced):
+        """{indice place: {id_couleur: nombre}} des seules places modifiées."""
+        changed = {}
+        for places, colour_id in consumed:
+            for _, p_idx, multiplicity in places:
+                if p_idx not in changed:
+                    changed[p_idx] = dict(marking[p_idx])
+                changed[p_idx][colour_id] -= multiplicity
+
+        for p_idx, colour_id, count in produced:
+            if p_idx not in changed:
+                changed[p_idx] = dict(marking[p_idx])
+            counts = changed[p_idx]
+            counts[colour_id] = counts.get(colour_id, 0) + count
+        return changed
+
+    def _apply_binding(self, view, t_idx, marking, binding):
+        changed = self._changed_counts(marking, binding[2], self._produce(view, t_idx, binding))
+        new_marking = list(marking)
+        for p_idx, counts in changed.items():
+            new_marking[p_idx] = self._intern_submarking(counts)
+        return tuple(new_marking)
+
+    def successors(self, marking, transitions=None):
+        """
+        Itère sur les (nom_transition, nouveau_marquage) accessibles en un tir,
+        une fois par marquage distinct obtenu avec les liaisons de la transition.
+        transitions : indices à essayer (par défaut toutes, dans l'ordre).
+        """
+        view = self.compiled()
+        names = view.transition_names
+        for t_idx in (range(len(names)) if transitions is None else transitions):
+            seen = set()
+            for binding in self._bindings(view, t_idx, marking):
+                new_marking = self._apply_binding(view, t_idx, marking, binding)
+                if new_marking not in seen:
+                    seen.add(new_marking)
+                    yield names[t_idx], new_marking
+
+    # --- REQUÊTES D'ACCESSIBILITÉ (arrêt au premier témoin) ---
+
+    def find_reachable(self, predicate, max_states=None, max_depth=None, timeout=None,
+                       max_memory=None, progress=None, visible_places=None):
+        """
+        Cherche un marquage accessible qui satisfait predicate, sans construire
+        le graphe : BFS arrêté au premier témoin, trace la plus courte
+        reconstruite depuis des pointeurs parents (voir exploration.QueryResult).
+        predicate reçoit le marquage décodé {nom_place: [jetons]}.
+        visible_places : places lues par le prédicat ; si données, exploration
+        réduite par ensembles têtus (accessibilité préservée, trace non
+        forcément la plus courte).
+        """
+        return self._search(lambda marking: predicate(self.decode_marking(marking)),
+                            ExplorationBudget(max_states, max_depth, timeout, max_memory, progress),
+                            stubborn=visible_places is not None, visible_places=visible_places)
+
+    def find_deadlock(self, max_states=None, max_depth=None, timeout=None, max_memory=None,
+                      progress=None):
+        """Cherche un marquage accessible sans transition tirable (ensembles têtus)."""
+        view = self.compiled()
+        transitions = range(len(view.transition_names))
+        return self._search(lambda marking: not any(self._enabled_on(view, t, marking) for t in transitions),
+                            ExplorationBudget(max_states, max_depth, timeout, max_memory, progress),
+                            stubborn=True)
+
+    def _search(self, test, budget, stubborn=False, visible_places=None):
+        view = self.compiled()
+        parents = ParentPointers()
+        visited = {}
+        witness = None
+        for event in self.iter_state_space(budget, visited, stubborn=stubborn,
+                                           visible_places=visible_places):
+            if event[0] == "state":
+                if test(event[2]):
+                    witness = event[1]
+                    if witness == 0:
+                        break
+            elif event[2] == len(parents):
+                # Première arête vers l'état qui vient d'être découvert : son parent
+                parents.add(event[1], view.transition_index[event[3]])
+                if witness is not None:
+                    break
+        if witness is None:
+            return QueryResult(len(visited), stop_reason=budget.stop_reason)
+
+        # Rejoue la trace pour retrouver les marquages (seuls les ids sont gardés)
+        marking = self.get_marking_tuple()
+        trace, markings = [], [self.decode_marking(marking)]
+        for t_idx, state_id in parents.path(witness):
+            marking = next(m for _, m in self.successors(marking, [t_idx]) if visited.get(m) == state_id)
+            trace.append(view.transition_names[t_idx])
+            markings.append(self.decode_marking(marking))
+        return QueryResult(len(visited), trace, markings)
+
+    # --- RÉDUCTION PAR ORDRE PARTIEL (ensembles têtus) ---
+
+    def _enabled_on(self, view, t_idx, marking):
+        return next(self._bindings(view, t_idx, marking), None) is not None
+
+    def stubborn_set(self, marking, visible=None):
+        """
+        Indices (triés) des transitions tirables d'un ensemble têtu du marquage.
+        Fermeture calculée sur la structure des arcs :
+          - t tirable : on ajoute les transitions qui lisent ou écrivent une
+            place d'entrée de t (conflits, et nouvelles liaisons de t) ;
+          - t bloquée : on choisit une place d'entrée sans assez de jetons et on
+            ajoute les transitions qui peuvent l'alimenter.
+        Préserve les blocages. visible = indices des transitions que voit le
+        prédicat : dès qu'une visible tirable entre, toutes les visibles entrent.
+        Retourne [] si aucune transition n'est tirable.
+        """
+        view = self.compiled()
+        enabled = [t for t in range(len(view.transition_names))
+                   if self._enabled_on(view, t, marking)]
+        if len(enabled) <= 1:
+            return enabled
+
+        best = None
+        for seed in enabled:
+            stubborn = self._stubborn_closure(view, marking, seed, visible)
+            chosen = [t for t in enabled if t in stubborn]
+            if best is None or len(chosen) < len(best):
+                best = chosen
+                if len(best) == 1:
+                    break
+        return best
 
-        # 1) marquage initial
+    def _stubborn_closure(self, view, marking, seed, visible):
+        stubborn = {seed}
+        stack = [seed]
+        visible_added = False
+        while stack:
+            t_idx = stack.pop()
+            if self._enabled_on(view, t_idx, marking):
+                # Les producteurs entrent aussi : ils peuvent rendre tirables
+                # d'autres liaisons de t
+                deps = set()
+                for p_idx in view.needed[t_idx]:
+                    deps |= view.consumers[p_idx]
+                    deps |= view.producers[p_idx]
+                if visible and not visible_added and t_idx in visible:
+                    deps |= visible
+                    visible_added = True
+            else:
+                # Place clé : la place d'entrée manquante la moins alimentée
+                short = [p for p, n in view.needed[t_idx].items()
+                         if sum(c for _, c in marking[p]) < n]
+                if short:
+                    key = min(short, key=lambda p: len(view.producers[p]))
+                    deps = view.producers[key]
+                else:
+                    deps = set()
+                    for p_idx in view.needed[t_idx]:
+                        deps |= view.producers[p_idx]
+            for u in deps:
+                if u not in stubborn:
+                    stubborn.add(u)
+                    stack.append(u)
+        return stubborn
+
+    def _visible_transitions(self, visible_places):
+        view = self.compiled()
+        places = {view.place_index[name] for name in visible_places}
+        return {t for t in range(len(view.transition_names))
+                if places & {p for p, _ in view.pre[t]} or places & {p for p, _ in view.post[t]}}
+
+    def iter_state_space(self, budget=None, visited=None, stubborn=False, visible_places=None,
+                         symmetry=False):
+        """
+        Exploration BFS paresseuse. Produit les événements dès leur découverte :
+            ("state", id, marquage)              pour chaque nouvel état
+            ("edge", id_src, id_dst, transition) pour chaque tir
+        Seul l'ensemble visité (marquage -> id) est conservé ; le consommateur
+        peut filtrer, écrire sur disque ou s'arrêter quand il veut.
+        visited : dict (ou équivalent) à remplir, créé si absent.
+        budget  : exploration.ExplorationBudget ; si une limite est atteinte,
+                  budget.stop_reason et budget.frontier sont renseignés.
+        stubborn : ne tire qu'un ensemble têtu par état (blocages préservés).
+        visible_places : avec stubborn, places lues par un prédicat dont
+                  l'accessibilité doit être préservée ; un état dont un
+                  successeur réduit est déjà connu est alors entièrement
+                  développé (condition de cycle pour le BFS).
+        symmetry : un seul état par orbite (voir add_symmetry_class et
+                  canonical_marking) ; l'état 0 est le représentant du
+                  marquage initial.
+        """
+        if visited is None:
+            visited = {}
+        visible = None
+        if stubborn and visible_places is not None:
+            visible = self._visible_transitions(visible_places)
+        canonical = self.canonical_marking if symmetry else None
         initial_marking = self.get_marking_tuple()
-        self.marking_to_id[initial_marking] = 0
-        self.id_to_marking[0] = initial_marking
+        if canonical is not None:
+            initial_marking = canonical(initial_marking)
+        visited[initial_marking] = 0
+        if budget is not None:
+            budget.start(initial_marking)
+        yield ("state", 0, initial_marking)
 
-        queue = deque([0])
+        queue = deque([(0, initial_marking, 0)])  # (id, marquage, profondeur)
+        n_edges = 0
+        depth = 0
 
         while queue:
-            current_id = queue.popleft()
-            current_marking = self.id_to_marking[current_id]
+            current_id, current_marking, depth = queue[0]
+            if budget is not None:
+                reason = budget.exceeded(len(visited), n_edges)
+                if reason is None and budget.max_depth is not None and depth >= budget.max_depth:
+                    reason = "max_depth"
+                if reason is not None:
+                    budget.stop(reason, [state_id for state_id, _, _ in queue])
+                    break
+            queue.popleft()
 
-            # Remettre le réseau dans ce marquage
-            self._load_marking_tuple(current_marking)
+            if stubborn:
+                successors = list(self.successors(current_marking,
+                                                  self.stubborn_set(current_marking, visible)))
+                if visible is not None and any(m in visited for _, m in successors):
+                    successors = self.successors(current_marking)
+            else:
+                successors = self.successors(current_marking)
 
-            # 2) Tester les transitions
-            # On copie les clés pour itérer tranquillement
-            t_names = list(self.transitions.keys())
-            
-            for t_name in t_names:
-                # IMPORTANT : Recharger l'état avant CHAQUE test
-                self._load_marking_tuple(current_marking)
-                
-                if self.is_enabled(t_name):
-                    self.fire(t_name)
-                    new_marking = self.get_marking_tuple()
-
-                    # 3) Enregistrer
-                    if new_marking not in self.marking_to_id:
-                        new_id = len(self.marking_to_id)
-                        self.marking_to_id[new_marking] = new_id
-                        self.id_to_marking[new_id] = new_marking
-                        queue.append(new_id)
-                    else:
-                        new_id = self.marking_to_id[new_marking]
+            for t_name, new_marking in successors:
+                if canonical is not None:
+                    new_marking = canonical(new_marking)
+                new_id = visited.get(new_marking)
+                if new_id is None:
+                    new_id = len(visited)
+                    visited[new_marking] = new_id
+                    queue.append((new_id, new_marking, depth + 1))
+                    yield ("state", new_id, new_marking)
+                n_edges += 1
+                yield ("edge", current_id, new_id, t_name)
 
-                    self.edges.append((current_id, new_id, t_name))
-        
-        # Restauration finale pour affichage
-        self._load_marking_tuple(self.id_to_marking[0])
+            if budget is not None:
+                budget.report(len(visited), n_edges, len(queue), depth)
+
+        if budget is not None:
+            budget.report(len(visited), n_edges, len(queue), depth, force=True)
+
+    def build_reachability_graph(self, max_states=None, max_depth=None, timeout=None,
+                                 max_memory=None, progress=None, store=None,
+                                 stubborn=False, visible_places=None, symmetry=False, cache=None):
+        """
+        ALGORITHME DE MAHDI (BFS), au-dessus de iter_state_space.
+        Les successeurs sont calculés directement sur les tuples de marquage :
+        le réseau affiché dans l'éditeur n'est jamais modifié.
+        Les limites (voir exploration.ExplorationBudget) sont vérifiées avant
+        de développer chaque état ; si l'une est atteinte, le graphe partiel
+        est conservé avec complete=False et la frontière non explorée.
+        store (storage.SQLiteStateStore) : graphe écrit sur disque au lieu de
+        la RAM ; seuls la file BFS et le cache du magasin restent en mémoire.
+        stubborn / visible_places / symmetry : graphe réduit, voir iter_state_space.
+        cache (cache.ReachabilityCache) : un graphe complet déjà calculé pour
+        un réseau et des options identiques est relu au lieu d'être exploré.
+        """
+        cache_key = None
+        if cache is not None and store is None and max_depth is None:
+            cache_key = self._cache_key(cache, stubborn, visible_places, symmetry)
+            cached = cache.get(cache_key)
+            if cached is not None and (max_states is None or len(cached[0]) < max_states):
+                self._restore_state_space(*cached)
+                return self.complete
+
+        self.init_state_space_structures(store)
+        budget = ExplorationBudget(max_states, max_depth, timeout, max_memory, progress)
+
+        for event in self.iter_state_space(budget, visited=self.marking_to_id, stubborn=stubborn,
+                                           visible_places=visible_places, symmetry=symmetry):
+            if event[0] == "state":
+                self.id_to_marking[event[1]] = event[2]
+            else:
+                self.edges.append(event[1:])
+
+        if budget.stop_reason is not None:
+            self.complete = False
+            self.stop_reason = budget.stop_reason
+            self.frontier = budget.frontier
+        if store is not None:
+            self._save_state_space_meta(store)
+        elif cache_key is not None and self.complete:
+            cache.put(cache_key, self._state_space_payload())
+        return self.complete
+
+    def _cache_key(self, cache, stubborn=False, visible_places=None, symmetry=False):
+        return cache.key(self, stubborn=stubborn, symmetry=symmetry,
+                         visible_places=None if visible_places is None else tuple(sorted(visible_places)))
+
+    def _state_space_payload(self):
+        """
+        Graphe en données simples (cache, processus d'analyse), relu par
+        _restore_state_space : marquages portables et arêtes (EdgeGraph.to_data).
+        """
+        states = [self.export_marking(self.id_to_marking[i]) for i in range(len(self.id_to_marking))]
+        return states, self.edges.to_data()
+
+    def _restore_state_space(self, states, edges):
+        """Graphe relu depuis cache.ReachabilityCache ou worker.AnalysisJob (marquages portables)."""
+        self.init_state_space_structures()
+        for state_id, portable in enumerate(states):
+            marking = self.import_marking(portable)
+            self.marking_to_id[marking] = state_id
+            self.id_to_marking[state_id] = marking
+        self.edges = EdgeGraph.from_data(edges)
+
+    def _save_state_space_meta(self, store):
+        store.flush()
+        store.set_meta("place_names", self.compiled().place_names)
+        store.set_meta("colours", self.colours)
+        store.set_meta("result", (self.complete, self.stop_reason, self.frontier))
+
+    def load_state_space(self, store):
+        """Rattache un graphe déjà calculé (magasin rouvert) sans ré-exploration."""
+        if store.get_meta("place_names") != self.compiled().place_names:
+            raise ValueError("Le graphe stocké ne correspond pas aux places de ce réseau")
+        self.colours = []
+        self.colour_ids = {}
+        self.colour_sort_keys = []
+        self._export_cache = {}
+        self._import_cache = {}
+        self.invalidate()  # la vue compilée contient des ids de couleur
+        for value in store.get_meta("colours", []):
+            self.intern_colour(value)
+        self.marking_to_id = store.index
+        self.id_to_marking = store.states
+        self.edges = store.edges
+        self.complete, self.stop_reason, self.frontier = store.get_meta("result", (True, None, []))
+
+    def build_reachability_graph_parallel(self, workers=None, batch_size=1024, max_states=None,
+                                          timeout=None, max_memory=None, progress=None):
+        """Exploration multi-processus (voir parallel.py), même graphe à la numérotation près."""
+        from parallel import build_reachability_graph_parallel
+        return build_reachability_graph_parallel(self, workers, batch_size, max_states,
+                                                 timeout, max_memory, progress)
+
+    def simulate(self, runs=1000, steps=1000, seed=None, workers=None):
+        """Trajectoires aléatoires depuis le marquage courant (voir simulation.py)."""
+        from simulation import simulate_coloured
+        return simulate_coloured(self, runs, steps, seed, workers)
 
     def get_reachability_as_strings(self):
         """Version 'Multiset' pour un affichage propre des couleurs."""
@@ -182,19 +1311,8 @@ class PetriNet:
         lines.append(f"--- GRAPHE DE REACHABILITY ({len(self.id_to_marking)} états) ---")
         lines.append("")
         
-        place_names = sorted(self.places.keys())
-        
         for node_id, marking in self.id_to_marking.items():
-            state_desc = []
-            for place_name, tokens_tuple in zip(place_names, marking):
-                if not tokens_tuple: continue
-                # Compte les couleurs (ex: 2 Rouge)
-                counts = Counter(tokens_tuple)
-                token_str = ", ".join([f"{cnt} {col}" for col, cnt in counts.items()])
-                state_desc.append(f"{place_name}: [{token_str}]")
-            
-            final_str = " | ".join(state_desc) if state_desc else "Vide"
-            lines.append(f"État {node_id} : {final_str}")
+            lines.append(f"État {node_id} : {self.format_marking(marking)}")
             
         lines.append("")
         lines.append("TRANSITIONS :")
@@ -208,9 +1326,12 @@ class PetriNet:
         elif name in self.transitions: del self.transitions[name]
         else: return False
         self.arcs = [arc for arc in self.arcs if arc.source.name != name and arc.target.name != name]
+        self.invalidate()
         return True
 
     def clear(self):
         self.places.clear()
         self.transitions.clear()
         self.arcs.clear()
+        self.symmetry_classes = []
+        self.invalidate()
@@ -0,0 +1,240 @@
+#parallel.py
+# Exploration de l'espace d'états répartie sur plusieurs processus.
+#
+# Chaque worker possède une partition de l'ensemble visité (hash du marquage
+# modulo le nombre de workers). Le BFS avance niveau par niveau :
+#   1. un worker reçoit des lots (id_source, transition, marquage) qui lui
+#      appartiennent, élimine les doublons et numérote les nouveaux états ;
+#   2. il développe ces nouveaux états et envoie les successeurs, par lots,
+#      directement au worker propriétaire de chacun ;
+#   3. le coordinateur arrête tout quand un niveau n'a produit aucun état,
+#      ou quand une limite (exploration.ExplorationBudget) est atteinte :
+#      le dernier niveau, non développé, forme alors la frontière.
+# Une exception dans un worker, ou sa mort, est relevée dans le processus
+# appelant (jamais d'attente infinie).
+# Les marquages envoyés à un autre worker circulent sous forme portable
+# (PetriNet.export_marking) car les ids de couleur sont propres à chaque
+# processus ; les successeurs qui restent locaux ne sont jamais sérialisés.
+import multiprocessing
+import os
+import pickle
+import queue
+import time
+import zlib
+from collections import defaultdict
+
+from exploration import ExplorationBudget
+
+# Délai (s) entre deux vérifications de l'état des workers par le coordinateur
+POLL_INTERVAL = 0.1
+
+
+def owner(net, marking, n_workers, hash_cache):
+    """
+    Worker propriétaire d'un marquage. Le hash est calculé sur la forme
+    portable (stable entre processus) et mis en cache par sous-marquage.
+    """
+    h = 0
+    for sub in marking:
+        sub_hash = hash_cache.get(sub)
+        if sub_hash is None:
+            sub_hash = hash_cache[sub] = zlib.crc32(repr(net.export_marking((sub,))).encode())
+        h = (h * 1000003 + sub_hash) & 0xFFFFFFFF
+    return h % n_workers
+
+
+def _worker(shard, n_workers, net, batch_size, inboxes, results, control, abort):
+    try:
+        _explore_shard(shard, n_workers, net, batch_size, inboxes, results, control, abort)
+    except Exception as e:
+        try:
+            pickle.dumps(e)
+        except Exception:
+            e = RuntimeError(f"{type(e).__name__}: {e}")
+        results.put(("error", shard, e))
+    # Les lots jamais lus (arrêt sur limite ou erreur) ne bloquent pas la sortie
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+
+
+def _explore_shard(shard, n_workers, net, batch_size, inboxes, results, control, abort):
+    visited = {}   # marquage (encodage local) -> id global
+    states = []    # (id global, marquage, niveau)
+    edges = []     # (id src, id dst, transition)
+    pending = defaultdict(list)  # niveau -> lots reçus en avance
+    hash_cache = {}
+    local = []     # successeurs qui appartiennent à ce worker (pas d'IPC)
+    level = 0
+
+    def record(src, t_name, marking):
+        state_id = visited.get(marking)
+        if state_id is None:
+            state_id = len(visited) * n_workers + shard
+            visited[marking] = state_id
+            states.append((state_id, marking, level))
+            new_states.append((state_id, marking))
+        if src is not None:
+            edges.append((src, state_id, t_name))
+
+    while True:
+        # 1) Réception : un lot "dernier" par autre expéditeur termine le niveau
+        new_states = []
+        for src, t_name, marking in local:
+            record(src, t_name, marking)
+        local = []
+        finished = 0
+        expected = n_workers if level == 0 else n_workers - 1
+        while finished < expected:
+            if pending[level]:
+                batch, last = pending[level].pop()
+            else:
+                msg_level, batch, last = inboxes[shard].get()
+                if msg_level != level:
+                    pending[msg_level].append((batch, last))
+                    continue
+            finished += last
+            for src, t_name, portable in batch:
+                record(src, t_name, net.import_marking(portable))
+        pending.pop(level, None)
+
+        # 2) Développement ; les successeurs distants partent par lots.
+        #    Sur abort (délai dépassé) le niveau est abandonné : il sera la frontière
+        outgoing = [[] for _ in range(n_workers)]
+        for state_id, marking in new_states:
+            if abort.is_set():
+                break
+            for t_name, succ in net.successors(marking):
+                dest = owner(net, succ, n_workers, hash_cache)
+                if dest == shard:
+                    local.append((state_id, t_name, succ))
+                    continue
+                outgoing[dest].append((state_id, t_name, net.export_marking(succ)))
+                if len(outgoing[dest]) >= batch_size:
+                    inboxes[dest].put((level + 1, outgoing[dest], False))
+                    outgoing[dest] = []
+        for dest in range(n_workers):
+            if dest != shard:
+                inboxes[dest].put((level + 1, outgoing[dest], True))
+
+        # 3) Synchronisation de fin de niveau
+        results.put(("level", shard, len(new_states), len(edges)))
+        if control[shard].get() == "stop":
+            break
+        level += 1
+
+    portable_states = [(state_id, net.export_marking(marking), lvl)
+                       for state_id, marking, lvl in states]
+    results.put(("done", shard, portable_states, edges))
+
+
+def _receive(results, procs, budget, abort):
+    """Prochain message des workers ; relève leurs erreurs et leur mort."""
+    while True:
+        try:
+            message = results.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            if budget.deadline is not None and time.monotonic() >= budget.deadline:
+                abort.set()
+            for shard, proc in enumerate(procs):
+                if proc.exitcode not in (None, 0):
+                    raise RuntimeError(f"Processus d'exploration {shard} arrêté (code {proc.exitcode})")
+            continue
+        if message[0] == "error":
+            raise message[2]
+        return message
+
+
+def build_reachability_graph_parallel(net, workers=None, batch_size=1024, max_states=None,
+                                      timeout=None, max_memory=None, progress=None):
+    """
+    Construit le graphe d'états de net (model.PetriNet) avec `workers`
+    processus. Le graphe obtenu est celui de build_reachability_graph à la
+    numérotation près : les ids suivent l'ordre (niveau BFS, id de partition).
+    Limites (voir exploration.ExplorationBudget) : max_states et max_memory
+    sont vérifiés à la fin de chaque niveau, timeout aussi pendant un niveau.
+    Si l'une est atteinte, complete=False et frontier = états du dernier niveau.
+    """
+    n_workers = workers or os.cpu_count() or 1
+    # Marquage initial encodé avant le fork : les workers partent de la même table de couleurs
+    marking = net.get_marking_tuple()
+    budget = ExplorationBudget(max_states, None, timeout, max_memory, progress)
+    budget.start(marking)
+    ctx = multiprocessing.get_context()
+    inboxes = [ctx.Queue() for _ in range(n_workers)]
+    control = [ctx.Queue() for _ in range(n_workers)]
+    results = ctx.Queue()
+    abort = ctx.Event()
+
+    procs = [ctx.Process(target=_worker,
+                         args=(i, n_workers, net, batch_size, inboxes, results, control, abort),
+                         daemon=True)
+             for i in range(n_workers)]
+    for proc in procs:
+        proc.start()
+
+    # Niveau 0 : le coordinateur joue le rôle de tous les expéditeurs
+    initial = net.export_marking(marking)
+    first = owner(net, marking, n_workers, {})
+    for dest in range(n_workers):
+        for sender in range(n_workers):
+            batch = [(None, None, initial)] if dest == first and sender == 0 else []
+            inboxes[dest].put((0, batch, True))
+
+    finished = False
+    reason = None
+    n_states = depth = 0
+    try:
+        while True:
+            discovered = n_edges = 0
+            for _ in range(n_workers):
+                _, _, count, shard_edges = _receive(results, procs, budget, abort)
+                discovered += count
+                n_edges += shard_edges
+            n_states += discovered
+            if discovered and abort.is_set():
+                reason = "timeout"
+            elif discovered:
+                reason = budget.exceeded(n_states, n_edges)
+            order = "stop" if discovered == 0 or reason is not None else "go"
+            for inbox in control:
+                inbox.put(order)
+            if order == "stop":
+                break
+            budget.report(n_states, n_edges, discovered, depth)
+            depth += 1
+
+        all_states, all_edges = [], []
+        for _ in range(n_workers):
+            _, _, states, edges = _receive(results, procs, budget, abort)
+            all_states.extend(states)
+            all_edges.extend(edges)
+        finished = True
+    finally:
+        for proc in procs:
+            if finished:
+                proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+
+    # Renumérotation compacte : niveau BFS puis id global (0 = état initial)
+    all_states.sort(key=lambda s: (s[2], s[0]))
+    new_id = {gid: i for i, (gid, _, _) in enumerate(all_states)}
+
+    net.init_state_space_structures()
+    for gid, portable, _ in all_states:
+        marking = net.import_marking(portable)
+        net.marking_to_id[marking] = new_id[gid]
+        net.id_to_marking[new_id[gid]] = marking
+    # Arêtes groupées par source, dans l'ordre des transitions (comme le BFS)
+    t_index = net.compiled().transition_index
+    renumbered = sorted(((new_id[s], new_id[d], t) for s, d, t in all_edges),
+                        key=lambda e: (e[0], t_index[e[2]], e[1]))
+    for edge in renumbered:
+        net.edges.append(edge)
+    if reason is not None:
+        net.complete = False
+        net.stop_reason = reason
+        net.frontier = [new_id[gid] for gid, _, lvl in all_states if lvl == depth]
+    budget.report(len(net.id_to_marking), len(net.edges), len(net.frontier), depth, force=True)
+    return net.complete
@@ -0,0 +1,164 @@
+#petri_matrix.py
+# Moteur vectorisé (NumPy) pour les réseaux à jetons entiers de petri_model.py
+import numpy as np
+
+# Nombre max de cases (états x transitions x places) comparées en une fois,
+# pour ne pas allouer des tableaux géants sur les grosses frontières
+CHUNK_CELLS = 1 << 22
+# Nombre max d'états de la frontière développés entre deux vérifications du budget
+BLOCK_ROWS = 1 << 12
+
+
+def rows_as_void(array):
+    """Vue 1-D d'un tableau 2-D où chaque ligne est un scalaire opaque (hashable / triable)."""
+    array = np.ascontiguousarray(array)
+    return array.view(np.dtype((np.void, array.dtype.itemsize * array.shape[1]))).ravel()
+
+
+class IncidenceMatrix:
+    """
+    Matrices Pre / Post / C d'un réseau P/T.
+    Convention : une ligne par transition (ordre d'insertion), une colonne par
+    place (ordre alphabétique, comme get_marking_tuple). Ainsi M' = M + C[t].
+    """
+    def __init__(self, net, dtype=np.int64):
+        self.dtype = dtype
+        self.place_names = sorted(net.places.keys())
+        self.transition_names = list(net.transitions.keys())
+        p_index = {name: i for i, name in enumerate(self.place_names)}
+        t_index = {name: i for i, name in enumerate(self.transition_names)}
+
+        shape = (len(self.transition_names), len(self.place_names))
+        self.pre = np.zeros(shape, dtype=dtype)
+        self.post = np.zeros(shape, dtype=dtype)
+        for arc in net.arcs:
+            src, dst = arc.source.name, arc.target.name
+            if src in p_index and dst in t_index:
+                self.pre[t_index[dst], p_index[src]] += arc.weight
+            elif src in t_index and dst in p_index:
+                self.post[t_index[src], p_index[dst]] += arc.weight
+        self.incidence = self.post - self.pre
+
+    def marking_array(self, net):
+        """Marquage courant du réseau sous forme de vecteur."""
+        return np.array([net.places[name].tokens for name in self.place_names], dtype=self.dtype)
+
+    def enabled(self, markings):
+        """
+        Vecteur des transitions tirables.
+        markings : vecteur (P,) -> booléens (T,) ; matrice (F, P) -> booléens (F, T).
+        """
+        markings = np.asarray(markings, dtype=self.dtype)
+        if markings.ndim == 1:
+            return (markings >= self.pre).all(axis=1)
+        return (markings[:, None, :] >= self.pre[None, :, :]).all(axis=2)
+
+    def expand(self, frontier):
+        """
+        Développe toute une frontière (F, P).
+        Retourne (indices_source, indices_transition, successeurs) dans l'ordre
+        état puis transition, c.-à-d. l'ordre du BFS séquentiel.
+        """
+        n_t, n_p = self.pre.shape
+        step = max(1, CHUNK_CELLS // max(1, n_t * n_p))
+        sources, trans, succs = [], [], []
+        for start in range(0, len(frontier), step):
+            block = frontier[start:start + step]
+            src, t = np.nonzero(self.enabled(block))
+            sources.append(src + start)
+            trans.append(t)
+            succs.append(block[src] + self.incidence[t])
+        if not sources:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty, np.zeros((0, n_p), dtype=self.dtype)
+        return np.concatenate(sources), np.concatenate(trans), np.concatenate(succs)
+
+    def build_reachability_graph(self, net, budget=None, store=None, projection=None):
+        """
+        BFS par niveaux : chaque frontière est une matrice de marquages.
+        Remplit net.marking_to_id / id_to_marking / edges avec la même
+        numérotation que PetriNet.build_reachability_graph.
+        budget (exploration.ExplorationBudget) est vérifié avant chaque bloc de BLOCK_ROWS états.
+        store (storage.SQLiteStateStore) : graphe écrit sur disque.
+        projection (invariants.ImpliedPlaces) : colonnes stockées réduites aux places gardées.
+        """
+        net.init_state_space_structures(store)
+        net.place_projection = projection
+        kept = None if projection is None else list(projection.kept)
+        marking_to_id = net.marking_to_id
+        id_to_marking = net.id_to_marking
+        edges = net.edges
+
+        initial = self.marking_array(net)
+        initial_marking = tuple((initial if kept is None else initial[kept]).tolist())
+        marking_to_id[initial_marking] = 0
+        id_to_marking[0] = initial_marking
+
+        frontier = initial[None, :]
+        frontier_ids = np.zeros(1, dtype=np.int64)
+        depth = 0
+        names = self.transition_names
+        n_t = max(1, len(names))
+        if budget is not None:
+            budget.start(initial_marking)
+
+        while len(frontier):
+            # La frontière est développée par blocs : les limites sont vérifiées
+            # avant chaque bloc, un niveau très large ne les dépasse donc pas
+            level_start = len(marking_to_id)
+            new_blocks = []
+            start = 0
+            reason = None
+            while start < len(frontier):
+                if budget is not None:
+                    reason = budget.exceeded(len(marking_to_id), len(edges))
+                    if reason is None and budget.max_depth is not None and depth >= budget.max_depth:
+                        reason = "max_depth"
+                    if reason is not None:
+                        break
+                rows = BLOCK_ROWS
+                if budget is not None and budget.max_states is not None:
+                    rows = max(1, min(rows, (budget.max_states - len(marking_to_id)) // n_t))
+                block_ids = frontier_ids[start:start + rows]
+                src, t, succ = self.expand(frontier[start:start + rows])
+                start += rows
+                if not len(succ):
+                    continue
+
+                # Dédoublonnage du bloc via la vue "ligne = scalaire"
+                _, first, inverse = np.unique(rows_as_void(succ), return_index=True, return_inverse=True)
+                inverse = inverse.ravel()
+                unique_ids = np.empty(len(first), dtype=np.int64)
+                new_rows = []
+                # On parcourt les lignes uniques dans l'ordre de première apparition
+                for k in np.argsort(first, kind="stable"):
+                    row = succ[first[k]]
+                    marking = tuple((row if kept is None else row[kept]).tolist())
+                    state_id = marking_to_id.get(marking)
+                    if state_id is None:
+                        state_id = len(marking_to_id)
+                        marking_to_id[marking] = state_id
+                        id_to_marking[state_id] = marking
+                        new_rows.append(first[k])
+                    unique_ids[k] = state_id
+
+                targets = unique_ids[inverse]
+                for s, d, ti in zip(block_ids[src].tolist(), targets.tolist(), t.tolist()):
+                    edges.append((s, d, names[ti]))
+                new_blocks.append(succ[new_rows])
+                if budget is not None:
+                    budget.report(len(marking_to_id), len(edges), len(frontier) - start, depth)
+
+            new_ids = np.arange(level_start, len(marking_to_id), dtype=np.int64)
+            if reason is not None:
+                # Non développés : reste du niveau courant puis états découverts
+                net.complete = False
+                net.stop_reason = reason
+                net.frontier = frontier_ids[start:].tolist() + new_ids.tolist()
+                break
+            depth += 1
+            frontier = np.concatenate(new_blocks) if new_blocks else frontier[:0]
+            frontier_ids = new_ids
+
+        if budget is not None:
+            budget.report(len(marking_to_id), len(edges), len(frontier), depth, force=True)
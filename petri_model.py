@@ -1,6 +1,13 @@
 # (Ce fichier contient la logique : Classes Place, Transition, Arc, PetriNet)
 from collections import deque
 
+from edge_graph import EdgeGraph
+from exploration import ExplorationBudget, ParentPointers, QueryResult
+
+# Valeur ω des marquages de couverture (place non bornée).
+# float("inf") garde l'arithmétique naturelle : ω - n = ω, ω >= n.
+OMEGA = float("inf")
+
 
 class Place:
     def __init__(self, name, tokens=0):
@@ -17,17 +24,55 @@ class Arc:
         self.target = target
         self.weight = weight
 
+class CompiledNet:
+    """Index des arcs par transition : (indice_place, poids) en entrée et en sortie."""
+    def __init__(self, net):
+        self.place_names = sorted(net.places.keys())
+        self.transition_names = list(net.transitions.keys())
+        p_index = {name: i for i, name in enumerate(self.place_names)}
+        t_index = self.transition_index = {name: i for i, name in enumerate(self.transition_names)}
+
+        pre = [[] for _ in self.transition_names]
+        post = [[] for _ in self.transition_names]
+        for arc in net.arcs:
+            src, dst = arc.source.name, arc.target.name
+            if src in p_index and dst in t_index:
+                pre[t_index[dst]].append((p_index[src], arc.weight))
+            elif src in t_index and dst in p_index:
+                post[t_index[src]].append((p_index[dst], arc.weight))
+        self.pre = [tuple(arcs) for arcs in pre]
+        self.post = [tuple(arcs) for arcs in post]
+
+class _CoverNode:
+    """Nœud de l'arbre de Karp-Miller."""
+    __slots__ = ("marking", "parent", "children", "active")
+
+    def __init__(self, marking, parent):
+        self.marking = marking
+        self.parent = parent
+        self.children = []
+        self.active = True
+
+def _covers(big, small):
+    return all(b >= s for b, s in zip(big, small))
+
 class PetriNet: # C'est ce nom que interface.py cherche
     def __init__(self):
         self.places = {}
         self.transitions = {}
         self.arcs = []
+        self._compiled = None
+        self.unbounded_places = []
+        # Projection des marquages stockés (invariants.ImpliedPlaces) ou None
+        self.place_projection = None
 
     def add_place(self, name, tokens=0):
         self.places[name] = Place(name, tokens)
+        self._compiled = None
 
     def add_transition(self, name):
         self.transitions[name] = Transition(name)
+        self._compiled = None
 
     def add_arc(self, source_name, target_name, weight=1):
         # On cherche l'objet dans les places OU les transitions
@@ -36,6 +81,7 @@ class PetriNet: # C'est ce nom que interface.py cherche
         
         if source and target:
             self.arcs.append(Arc(source, target, weight))
+            self._compiled = None
         else:
             print(f"Erreur: Impossible de créer l'arc {source_name} -> {target_name}")
 
@@ -73,51 +119,385 @@ class PetriNet: # C'est ce nom que interface.py cherche
         place_names = sorted(self.places.keys())
         return tuple(self.places[name].tokens for name in place_names)
 
-    def init_state_space_structures(self):
-        self.marking_to_id = {}  # {marquage_tuple: id_entier}
-        self.id_to_marking = {}  # {id_entier: marquage_tuple}
-        self.edges = []  # [(id_source, id_cible, nom_transition)]
+    def init_state_space_structures(self, store=None):
+        if store is None:
+            self.marking_to_id = {}  # {marquage_tuple: id_entier}
+            self.id_to_marking = {}  # {id_entier: marquage_tuple}
+            self.edges = EdgeGraph()  # arêtes (id_source, id_cible, nom_transition) en CSR
+        else:
+            # Magasin sur disque (storage.SQLiteStateStore), vidé au préalable
+            store.reset()
+            self.marking_to_id = store.index
+            self.id_to_marking = store.states
+            self.edges = store.edges
+        self.place_projection = None
+        # Résultat partiel si une limite d'exploration est atteinte
+        self.complete = True
+        self.stop_reason = None
+        self.frontier = []  # ids découverts mais non développés
 
-    def build_reachability_graph(self):
-        self.init_state_space_structures()
+    def incidence_matrix(self, dtype=None):
+        """Matrices Pre/Post/C pour le moteur vectorisé (nécessite NumPy)."""
+        from petri_matrix import IncidenceMatrix
+        if dtype is None:
+            return IncidenceMatrix(self)
+        return IncidenceMatrix(self, dtype)
+
+    def invariants(self):
+        """P- et T-invariants, bornes des places (voir invariants.py)."""
+        from invariants import InvariantAnalysis
+        return InvariantAnalysis(self)
+
+    def full_marking(self, marking):
+        """Marquage complet d'un état stocké (les places impliquées sont recalculées)."""
+        if self.place_projection is None:
+            return marking
+        return self.place_projection.restore(marking)
+
+    def build_symbolic_state_space(self, max_iterations=None):
+        """Marquages accessibles d'un réseau sauf sous forme de BDD (voir symbolic.py)."""
+        from symbolic import SymbolicStateSpace
+        space = SymbolicStateSpace(self)
+        space.build(max_iterations)
+        return space
+
+    def simulate(self, runs=1000, steps=1000, seed=None):
+        """Trajectoires aléatoires vectorisées (voir simulation.py, nécessite NumPy)."""
+        from simulation import simulate_integer
+        return simulate_integer(self, runs, steps, seed)
+
+    def build_reachability_graph(self, vectorized=False, max_states=None, max_depth=None,
+                                 timeout=None, max_memory=None, progress=None, store=None,
+                                 use_invariants=False, cache=None):
+        """
+        BFS sur les marquages (tuples d'entiers), sans modifier le réseau.
+        Limites optionnelles : voir exploration.ExplorationBudget. Si l'une
+        est atteinte, le graphe partiel reste disponible avec complete=False
+        et self.frontier = états non développés. Retourne self.complete.
+        store (storage.SQLiteStateStore) : graphe écrit sur disque au lieu de la RAM.
+        use_invariants : les places impliquées par un P-invariant ne sont pas
+        stockées (marquages plus courts, voir full_marking) et, en mode
+        vectorisé, les bornes des places choisissent le plus petit dtype.
+        cache (cache.ReachabilityCache) : un graphe complet déjà calculé pour
+        un réseau identique est relu au lieu d'être exploré.
+        """
+        cache_key = None
+        if cache is not None and store is None and max_depth is None:
+            cache_key = self._cache_key(cache, use_invariants)
+            cached = cache.get(cache_key)
+            if cached is not None and (max_states is None or len(cached[0]) < max_states):
+                self._restore_state_space(*cached)
+                return self.complete
+
+        budget = ExplorationBudget(max_states, max_depth, timeout, max_memory, progress)
+        analysis = self.invariants() if use_invariants else None
+        projection = analysis.implied_places() if analysis is not None else None
+        if vectorized:
+            # Moteur NumPy : la frontière est développée par blocs d'états
+            # (les limites sont vérifiées avant chaque bloc)
+            dtype = analysis.marking_dtype() if analysis is not None else None
+            self.incidence_matrix(dtype).build_reachability_graph(self, budget, store, projection)
+            self._save_state_space_meta(store)
+            return self._cache_result(cache, cache_key)
+
+        self.init_state_space_structures(store)
+        self.place_projection = projection
+
+        for event in self.iter_state_space(budget, visited=self.marking_to_id, projection=projection):
+            if event[0] == "state":
+                self.id_to_marking[event[1]] = event[2]
+            else:
+                self.edges.append(event[1:])
+
+        if budget.stop_reason is not None:
+            self.complete = False
+            self.stop_reason = budget.stop_reason
+            self.frontier = budget.frontier
+        self._save_state_space_meta(store)
+        return self._cache_result(cache, cache_key)
+
+    def iter_state_space(self, budget=None, visited=None, projection=None):
+        """
+        Exploration BFS paresseuse, commune au graphe et aux requêtes :
+            ("state", id, marquage)              pour chaque nouvel état
+            ("edge", id_src, id_dst, transition) pour chaque tir
+        Le marquage produit est la clé stockée (projeté si projection est
+        donnée, invariants.ImpliedPlaces) ; la file garde le marquage complet.
+        visited : dict (ou équivalent) clé -> id à remplir, créé si absent.
+        budget  : exploration.ExplorationBudget, vérifié avant de développer
+                  chaque état ; si une limite est atteinte, budget.stop_reason
+                  et budget.frontier sont renseignés.
+        """
+        if visited is None:
+            visited = {}
+        project = projection.project if projection is not None else None
+        view = self.compiled()
+        names = view.transition_names
 
-        # 1) marquage initial
         initial_marking = self.get_marking_tuple()
-        self.marking_to_id[initial_marking] = 0
-        self.id_to_marking[0] = initial_marking
+        initial_key = project(initial_marking) if project else initial_marking
+        visited[initial_key] = 0
+        if budget is not None:
+            budget.start(initial_key)
+        yield ("state", 0, initial_key)
 
-        queue = deque([0])  # ids à explorer
+        queue = deque([(0, initial_marking, 0)])  # (id à explorer, marquage complet, profondeur)
+        n_edges = 0
+        depth = 0
 
         while queue:
-            current_id = queue.popleft()
-            current_marking = self.id_to_marking[current_id]
+            current_id, current_marking, depth = queue[0]
+            if budget is not None:
+                reason = budget.exceeded(len(visited), n_edges)
+                if reason is None and budget.max_depth is not None and depth >= budget.max_depth:
+                    reason = "max_depth"
+                if reason is not None:
+                    budget.stop(reason, [state_id for state_id, _, _ in queue])
+                    break
+            queue.popleft()
+
+            # Pour chaque transition tirable : nœud (si nouveau) puis arête
+            for t_idx in range(len(names)):
+                new_marking = self._fire_marking(view, t_idx, current_marking)
+                if new_marking is None:
+                    continue
+                key = project(new_marking) if project else new_marking
+                new_id = visited.get(key)
+                if new_id is None:
+                    new_id = len(visited)
+                    visited[key] = new_id
+                    queue.append((new_id, new_marking, depth + 1))
+                    yield ("state", new_id, key)
+                n_edges += 1
+                yield ("edge", current_id, new_id, names[t_idx])
 
-            # remettre le réseau dans ce marquage
-            self._load_marking_tuple(current_marking)
+            if budget is not None:
+                budget.report(len(visited), n_edges, len(queue), depth)
 
-            # 2) pour chaque transition, tester is_enabled et tirer
-            for t_name in self.transitions.keys():
-                if self.is_enabled(t_name):
-                    # copier le marquage courant avant tir
-                    saved_marking = self.get_marking_tuple()
+        if budget is not None:
+            budget.report(len(visited), n_edges, len(queue), depth, force=True)
 
-                    # tirer
-                    self.fire(t_name)
-                    new_marking = self.get_marking_tuple()
+    def _cache_key(self, cache, use_invariants=False):
+        return cache.key(self, use_invariants=use_invariants)
 
-                    # remettre l'ancien marquage pour continuer l'exploration
-                    self._load_marking_tuple(saved_marking)
+    def _cache_result(self, cache, key):
+        if key is not None and self.complete:
+            cache.put(key, self._state_space_payload())
+        return self.complete
 
-                    # 3) enregistrer le nœud et l'arête
-                    if new_marking not in self.marking_to_id:
-                        new_id = len(self.marking_to_id)
-                        self.marking_to_id[new_marking] = new_id
-                        self.id_to_marking[new_id] = new_marking
-                        queue.append(new_id)
-                    else:
-                        new_id = self.marking_to_id[new_marking]
+    def _state_space_payload(self):
+        """
+        Graphe en données simples (cache, processus d'analyse), relu par
+        _restore_state_space : marquages, arêtes (EdgeGraph.to_data), projection.
+        """
+        states = [self.id_to_marking[i] for i in range(len(self.id_to_marking))]
+        projection = self.place_projection
+        return (states, self.edges.to_data(),
+                None if projection is None else (projection.n_places, projection.rules))
+
+    def _restore_state_space(self, states, edges, projection):
+        """Graphe relu depuis cache.ReachabilityCache ou worker.AnalysisJob."""
+        self.init_state_space_structures()
+        for state_id, marking in enumerate(states):
+            self.marking_to_id[marking] = state_id
+            self.id_to_marking[state_id] = marking
+        self.edges = EdgeGraph.from_data(edges)
+        if projection is not None:
+            from invariants import ImpliedPlaces
+            projection = ImpliedPlaces(*projection)
+        self.place_projection = projection
+
+    # --- REQUÊTES D'ACCESSIBILITÉ (arrêt au premier témoin) ---
+
+    def find_reachable(self, predicate, max_states=None, max_depth=None, timeout=None,
+                       max_memory=None, progress=None):
+        """
+        BFS arrêté au premier marquage accessible qui satisfait predicate
+        ({nom_place: jetons}) ; la trace la plus courte est reconstruite depuis
+        des pointeurs parents (voir exploration.QueryResult).
+        """
+        names = self.compiled().place_names
+        return self._search(lambda marking: predicate(dict(zip(names, marking))),
+                            ExplorationBudget(max_states, max_depth, timeout, max_memory, progress))
+
+    def find_deadlock(self, max_states=None, max_depth=None, timeout=None, max_memory=None,
+                      progress=None):
+        """Cherche un marquage accessible sans transition tirable."""
+        view = self.compiled()
+        transitions = range(len(view.transition_names))
+        return self._search(lambda marking: all(self._fire_marking(view, t, marking) is None
+                                                for t in transitions),
+                            ExplorationBudget(max_states, max_depth, timeout, max_memory, progress))
+
+    def _search(self, test, budget):
+        view = self.compiled()
+        parents = ParentPointers()
+        visited = {}
+        witness = None
+        for event in self.iter_state_space(budget, visited):
+            if event[0] == "state":
+                if test(event[2]):
+                    witness = event[1]
+                    if witness == 0:
+                        break
+            elif event[2] == len(parents):
+                # Première arête vers l'état qui vient d'être découvert : son parent
+                parents.add(event[1], view.transition_index[event[3]])
+                if witness is not None:
+                    break
+        if witness is None:
+            return QueryResult(len(visited), stop_reason=budget.stop_reason)
+        # Rejoue la trace : seuls les ids parents et les transitions sont gardés
+        marking = self.get_marking_tuple()
+        trace, markings = [], [dict(zip(view.place_names, marking))]
+        for t_idx, _ in parents.path(witness):
+            marking = self._fire_marking(view, t_idx, marking)
+            trace.append(view.transition_names[t_idx])
+            markings.append(dict(zip(view.place_names, marking)))
+        return QueryResult(len(visited), trace, markings)
+
+    def _save_state_space_meta(self, store):
+        if store is None:
+            return
+        store.flush()
+        store.set_meta("place_names", sorted(self.places.keys()))
+        projection = self.place_projection
+        store.set_meta("projection", None if projection is None else (projection.n_places, projection.rules))
+        store.set_meta("result", (self.complete, self.stop_reason, self.frontier))
+
+    def load_state_space(self, store):
+        """Rattache un graphe déjà calculé (magasin rouvert) sans ré-exploration."""
+        if store.get_meta("place_names") != sorted(self.places.keys()):
+            raise ValueError("Le graphe stocké ne correspond pas aux places de ce réseau")
+        self.marking_to_id = store.index
+        self.id_to_marking = store.states
+        self.edges = store.edges
+        projection = store.get_meta("projection")
+        if projection is not None:
+            from invariants import ImpliedPlaces
+            projection = ImpliedPlaces(*projection)
+        self.place_projection = projection
+        self.complete, self.stop_reason, self.frontier = store.get_meta("result", (True, None, []))
+
+    def compiled(self):
+        """Vue compilée des arcs, reconstruite après chaque modification."""
+        if self._compiled is None:
+            self._compiled = CompiledNet(self)
+        return self._compiled
+
+    def _fire_marking(self, view, t_idx, marking):
+        """Tir pur sur un tuple (fonctionne aussi avec des ω). None si non tirable."""
+        pre = view.pre[t_idx]
+        for p_idx, weight in pre:
+            if marking[p_idx] < weight:
+                return None
+        new_marking = list(marking)
+        for p_idx, weight in pre:
+            new_marking[p_idx] -= weight
+        for p_idx, weight in view.post[t_idx]:
+            new_marking[p_idx] += weight
+        return tuple(new_marking)
+
+    def successors(self, marking):
+        """Itère sur les (nom_transition, nouveau_marquage) accessibles en un tir."""
+        view = self.compiled()
+        for t_idx, t_name in enumerate(view.transition_names):
+            new_marking = self._fire_marking(view, t_idx, marking)
+            if new_marking is not None:
+                yield t_name, new_marking
+
+    # --- COUVERTURE (Karp-Miller avec élagage) ---
+
+    def build_coverability_graph(self):
+        """
+        Calcule un ensemble de couverture minimal (Karp-Miller + élagage
+        des nœuds couverts, à la manière de l'algorithme MP de Reynier-Servais).
+        Termine même si le réseau est non borné : les places non bornées
+        prennent la valeur OMEGA.
+        Remplit marking_to_id / id_to_marking / edges avec les marquages de
+        l'ensemble minimal et retourne la liste des places non bornées.
+        """
+        view = self.compiled()
+        n_transitions = len(view.transition_names)
+
+        root = _CoverNode(self.get_marking_tuple(), None)
+        active = [root]
+        waiting = deque([root])
+
+        def deactivate(node):
+            stack = [node]
+            while stack:
+                current = stack.pop()
+                current.active = False
+                stack.extend(current.children)
+
+        while waiting:
+            node = waiting.popleft()
+            t_idx = 0
+            while node.active and t_idx < n_transitions:
+                marking = self._fire_marking(view, t_idx, node.marking)
+                t_idx += 1
+                if marking is None:
+                    continue
+
+                # 1) ω-accélération contre les ancêtres du chemin courant
+                changed = True
+                while changed:
+                    changed = False
+                    ancestor = node
+                    while ancestor is not None:
+                        old = ancestor.marking
+                        if old != marking and _covers(marking, old):
+                            accelerated = tuple(OMEGA if m > o else m for m, o in zip(marking, old))
+                            if accelerated != marking:
+                                marking = accelerated
+                                changed = True
+                        ancestor = ancestor.parent
+
+                # 2) Déjà couvert par un nœud actif : inutile de continuer
+                if any(_covers(other.marking, marking) for other in active):
+                    continue
+
+                # 3) Élagage : le nouveau nœud remplace le plus haut ancêtre couvert
+                parent = node
+                ancestor = node
+                while ancestor is not None:
+                    if _covers(marking, ancestor.marking):
+                        parent = ancestor.parent
+                    ancestor = ancestor.parent
+
+                for other in active:
+                    if _covers(marking, other.marking):
+                        deactivate(other)
+                active = [other for other in active if other.active]
+
+                child = _CoverNode(marking, parent)
+                if parent is not None:
+                    parent.children.append(child)
+                active.append(child)
+                waiting.append(child)
+
+        # 4) Graphe sur l'ensemble minimal : chaque successeur pointe vers
+        #    son propre nœud, ou (marquage élagué) vers un élément qui le couvre
+        self.init_state_space_structures()
+        for node in active:
+            if node.marking not in self.marking_to_id:
+                state_id = len(self.marking_to_id)
+                self.marking_to_id[node.marking] = state_id
+                self.id_to_marking[state_id] = node.marking
+        cover_set = list(self.id_to_marking.items())
+        for state_id, marking in cover_set:
+            for t_name, succ in self.successors(marking):
+                target = self.marking_to_id.get(succ)
+                if target is None:
+                    target = next((other_id for other_id, other in cover_set if _covers(other, succ)), None)
+                if target is None:
+                    raise RuntimeError(f"Marquage {succ} (par {t_name}) couvert par aucun nœud")
+                self.edges.append((state_id, target, t_name))
 
-                    self.edges.append((current_id, new_id, t_name))
+        self.unbounded_places = [name for i, name in enumerate(view.place_names)
+                                 if any(m[i] == OMEGA for m in self.id_to_marking.values())]
+        return self.unbounded_places
 
     def _load_marking_tuple(self, marking_tuple):
         place_names = sorted(self.places.keys())
@@ -128,7 +508,8 @@ class PetriNet: # C'est ce nom que interface.py cherche
         lines = []
         lines.append("États (id : marquage) :")
         for node_id, marking in self.id_to_marking.items():
-            lines.append(f"{node_id} : {marking}")
+            shown = ", ".join("ω" if m == OMEGA else str(m) for m in self.full_marking(marking))
+            lines.append(f"{node_id} : ({shown})")
         lines.append("")
         lines.append("Transitions (source --t--> cible) :")
         for s, t, name in self.edges:
@@ -147,6 +528,7 @@ class PetriNet: # C'est ce nom que interface.py cherche
             # Nettoyage des arcs orphelins
         self.arcs = [arc for arc in self.arcs
                      if arc.source.name != name and arc.target.name != name]
+        self._compiled = None
         return True
 
     def clear(self):
@@ -154,6 +536,7 @@ class PetriNet: # C'est ce nom que interface.py cherche
         self.places.clear()
         self.transitions.clear()
         self.arcs.clear()
+        self._compiled = None
 
     
 
@@ -0,0 +1,180 @@
+#simulation.py
+# Simulation Monte-Carlo du jeu de jetons : N trajectoires indépendantes d'au
+# plus K tirs, pour estimer débits et probabilité de blocage.
+#   - réseaux à jetons entiers (petri_model) : toutes les trajectoires
+#     avancent ensemble, un pas = une opération NumPy sur la matrice (N, P) ;
+#   - réseaux colorés (model) : trajectoires réparties sur un pool de
+#     processus, chacune avec sa propre graine.
+# À chaque pas, une transition tirable est choisie uniformément (puis, pour un
+# réseau coloré, une de ses liaisons). Même graine = mêmes résultats, quel que
+# soit le nombre de processus.
+import multiprocessing
+import os
+import random
+import time
+
+
+def simulate(net, runs=1000, steps=1000, seed=None, workers=None):
+    """
+    Lance `runs` trajectoires de `steps` tirs au plus depuis le marquage courant.
+    Retourne un dict de statistiques :
+        runs, max_steps, steps (tirs effectués), elapsed, steps_per_sec,
+        firing_counts   {transition: nombre de tirs},
+        throughput      {transition: tirs par trajectoire et par pas},
+        deadlocks, deadlock_rate, mean_deadlock_step (None si aucun blocage),
+        place_distribution {place: {nombre de jetons final: trajectoires}},
+        place_mean      {place: nombre moyen de jetons final},
+    et pour un réseau coloré : colour_mean {place: {couleur: nombre moyen final}}.
+    workers ne sert qu'aux réseaux colorés (par défaut : nombre de CPU).
+    """
+    import petri_model
+    if isinstance(net, petri_model.PetriNet):
+        return simulate_integer(net, runs, steps, seed)
+    return simulate_coloured(net, runs, steps, seed, workers)
+
+
+def _summary(runs, steps, counts, dead_steps, place_names, final_tokens, elapsed):
+    """Statistiques communes ; final_tokens : nombre de jetons par place et par trajectoire."""
+    total = sum(counts.values())
+    distribution = {}
+    for p_idx, name in enumerate(place_names):
+        histogram = {}
+        for tokens in final_tokens:
+            histogram[tokens[p_idx]] = histogram.get(tokens[p_idx], 0) + 1
+        distribution[name] = dict(sorted(histogram.items()))
+    return {
+        "runs": runs,
+        "max_steps": steps,
+        "steps": total,
+        "elapsed": elapsed,
+        "steps_per_sec": total / elapsed if elapsed > 0 else 0.0,
+        "firing_counts": counts,
+        "throughput": {t: n / (runs * steps) if runs and steps else 0.0 for t, n in counts.items()},
+        "deadlocks": len(dead_steps),
+        "deadlock_rate": len(dead_steps) / runs if runs else 0.0,
+        "mean_deadlock_step": sum(dead_steps) / len(dead_steps) if dead_steps else None,
+        "place_distribution": distribution,
+        "place_mean": {name: sum(t[p_idx] for t in final_tokens) / runs if runs else 0.0
+                       for p_idx, name in enumerate(place_names)},
+    }
+
+
+# --- Réseaux à jetons entiers : toutes les trajectoires en parallèle (NumPy) ---
+
+def simulate_integer(net, runs=1000, steps=1000, seed=None):
+    """Simulation vectorisée d'un petri_model.PetriNet, voir simulate."""
+    import numpy as np
+    from petri_matrix import IncidenceMatrix
+
+    start = time.perf_counter()
+    matrix = IncidenceMatrix(net)
+    n_t = len(matrix.transition_names)
+    rng = np.random.default_rng(seed)
+
+    markings = np.repeat(matrix.marking_array(net)[None, :], runs, axis=0)
+    alive = np.ones(runs, dtype=bool)
+    dead_at = np.full(runs, -1, dtype=np.int64)
+    counts = np.zeros(n_t, dtype=np.int64)
+
+    for step in range(steps + 1):
+        active = np.flatnonzero(alive)
+        if not len(active):
+            break
+        enabled = matrix.enabled(markings[active])
+        blocked = ~enabled.any(axis=1)
+        dead_at[active[blocked]] = step
+        alive[active[blocked]] = False
+        if step == steps:
+            break
+        active, enabled = active[~blocked], enabled[~blocked]
+        if not len(active):
+            break
+        # Choix uniforme parmi les tirables : plus grand tirage aléatoire
+        scores = rng.random(enabled.shape)
+        scores[~enabled] = -1.0
+        choice = scores.argmax(axis=1)
+        markings[active] += matrix.incidence[choice]
+        counts += np.bincount(choice, minlength=n_t)
+
+    dead_steps = dead_at[dead_at >= 0].tolist()
+    return _summary(runs, steps, dict(zip(matrix.transition_names, counts.tolist())), dead_steps,
+                    matrix.place_names, markings.tolist(), time.perf_counter() - start)
+
+
+# --- Réseaux colorés : trajectoires réparties sur des processus ---
+
+def _run_coloured(args):
+    """Exécute un lot de trajectoires ; les marquages finaux reviennent sous forme portable."""
+    net, seeds, steps = args
+    view = net.compiled()
+    initial = net.get_marking_tuple()
+    n_t = len(view.transition_names)
+    results = []
+    for seed in seeds:
+        rnd = random.Random(seed)
+        marking = list(initial)
+        enabled = {t for t in range(n_t) if net._enabled_on(view, t, marking)}
+        counts = [0] * n_t
+        dead_at = -1
+        for step in range(steps):
+            if not enabled:
+                dead_at = step
+                break
+            t_idx = rnd.choice(sorted(enabled))
+            bindings = list(net._bindings(view, t_idx, marking))
+            binding = bindings[rnd.randrange(len(bindings))]
+            produced = list(net._produce(view, t_idx, binding))
+            affected = set()
+            for p_idx, place_counts in net._changed_counts(marking, binding[2], produced).items():
+                marking[p_idx] = net._intern_submarking(place_counts)
+                affected |= view.consumers[p_idx]
+            for u in affected:
+                if net._enabled_on(view, u, marking):
+                    enabled.add(u)
+                else:
+                    enabled.discard(u)
+            counts[t_idx] += 1
+            net._bound_interning()
+        else:
+            if not enabled:
+                dead_at = steps
+        results.append((counts, dead_at, net.export_marking(tuple(marking))))
+    return results
+
+
+def simulate_coloured(net, runs=1000, steps=1000, seed=None, workers=None):
+    """Simulation d'un model.PetriNet sur `workers` processus, voir simulate."""
+    start = time.perf_counter()
+    master = random.Random(seed)
+    seeds = [master.getrandbits(64) for _ in range(runs)]
+    n_workers = max(1, min(workers or os.cpu_count() or 1, runs))
+
+    if n_workers == 1:
+        batches = [_run_coloured((net, seeds, steps))]
+    else:
+        # Quelques lots par processus pour équilibrer la charge
+        size = max(1, -(-runs // (n_workers * 4)))
+        chunks = [(net, seeds[i:i + size], steps) for i in range(0, runs, size)]
+        with multiprocessing.get_context().Pool(n_workers) as pool:
+            batches = pool.map(_run_coloured, chunks)
+
+    view = net.compiled()
+    counts = dict.fromkeys(view.transition_names, 0)
+    dead_steps, final_tokens = [], []
+    colour_totals = [{} for _ in view.place_names]
+    for batch in batches:
+        for run_counts, dead_at, final in batch:
+            for name, n in zip(view.transition_names, run_counts):
+                counts[name] += n
+            if dead_at >= 0:
+                dead_steps.append(dead_at)
+            final_tokens.append([sum(n for _, n in sub) for sub in final])
+            for totals, sub in zip(colour_totals, final):
+                for value, n in sub:
+                    totals[value] = totals.get(value, 0) + n
+
+    stats = _summary(runs, steps, counts, dead_steps, view.place_names, final_tokens,
+                     time.perf_counter() - start)
+    stats["colour_mean"] = {name: {value: n / runs for value, n in totals.items()}
+                            for name, totals in zip(view.place_names, colour_totals)}
+    return stats
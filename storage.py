@@ -0,0 +1,246 @@
+#storage.py
+# Stockage sur disque (SQLite) des graphes d'états plus gros que la RAM.
+# Le magasin remplace marking_to_id / id_to_marking / edges du PetriNet :
+#   - une table d'états indexée par un hash 64 bits du marquage,
+#   - un journal d'arêtes en ajout seul,
+#   - un petit cache LRU des états "chauds" en mémoire.
+import hashlib
+import marshal
+import sqlite3
+from collections import OrderedDict
+
+# marshal version 2 : sérialisation canonique (pas de références partagées),
+# deux marquages égaux donnent toujours les mêmes octets
+MARSHAL_VERSION = 2
+
+
+def _encode(marking):
+    return marshal.dumps(marking, MARSHAL_VERSION)
+
+
+def _hash(blob):
+    return int.from_bytes(hashlib.blake2b(blob, digest_size=8).digest(), "big", signed=True)
+
+
+class StateIndex:
+    """Vue marquage -> id (remplace marking_to_id)."""
+    def __init__(self, store):
+        self._store = store
+
+    def get(self, marking, default=None):
+        state_id = self._store.lookup(marking)
+        return default if state_id is None else state_id
+
+    def __getitem__(self, marking):
+        state_id = self._store.lookup(marking)
+        if state_id is None:
+            raise KeyError(marking)
+        return state_id
+
+    def __contains__(self, marking):
+        return self._store.lookup(marking) is not None
+
+    def __setitem__(self, marking, state_id):
+        self._store.add_state(marking, state_id)
+
+    def __len__(self):
+        return self._store.num_states
+
+    def __iter__(self):
+        for _, marking in self._store.iter_states():
+            yield marking
+
+
+class StateTable:
+    """Vue id -> marquage (remplace id_to_marking)."""
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, state_id):
+        return self._store.marking(state_id)
+
+    def __setitem__(self, state_id, marking):
+        # L'index est la source de vérité : l'état a déjà été écrit par
+        # StateIndex.__setitem__, l'affectation est acceptée par compatibilité
+        if not 0 <= state_id < self._store.num_states:
+            raise KeyError(state_id)
+
+    def __contains__(self, state_id):
+        return 0 <= state_id < self._store.num_states
+
+    def __len__(self):
+        return self._store.num_states
+
+    def __iter__(self):
+        return iter(range(self._store.num_states))
+
+    def items(self):
+        return self._store.iter_states()
+
+    def values(self):
+        for _, marking in self._store.iter_states():
+            yield marking
+
+
+class EdgeLog:
+    """Journal d'arêtes (src, dst, transition) en ajout seul (remplace edges)."""
+    def __init__(self, store):
+        self._store = store
+
+    def append(self, edge):
+        self._store.add_edge(*edge)
+
+    def __len__(self):
+        return self._store.num_edges
+
+    def __iter__(self):
+        return self._store.iter_edges()
+
+    def __contains__(self, edge):
+        return any(e == tuple(edge) for e in self._store.iter_edges(edge[0]))
+
+    def successors(self, state_id):
+        return self._store.iter_edges(state_id)
+
+
+class SQLiteStateStore:
+    """
+    Graphe d'états persistant dans un fichier SQLite.
+    Un fichier existant est rouvert tel quel : le graphe peut être interrogé
+    sans ré-exploration (voir PetriNet.load_state_space).
+    cache_size : nombre de marquages gardés en mémoire (LRU).
+    batch_size : nombre d'écritures regroupées par transaction.
+    """
+    def __init__(self, path, cache_size=100_000, batch_size=10_000):
+        self.path = path
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS states (
+                id INTEGER PRIMARY KEY, hash INTEGER NOT NULL, marking BLOB NOT NULL);
+            CREATE INDEX IF NOT EXISTS states_hash ON states(hash);
+            CREATE TABLE IF NOT EXISTS edges (src INTEGER, dst INTEGER, transition TEXT);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB);
+        """)
+        self._cache = OrderedDict()   # marquage -> id (états chauds)
+        self._pending_states = []     # (id, hash, blob) pas encore écrits
+        self._pending_index = {}      # marquage -> id pour ces états
+        self._pending_edges = []
+        self.num_states = self._db.execute("SELECT COUNT(*) FROM states").fetchone()[0]
+        self.num_edges = self._db.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+
+        self.index = StateIndex(self)
+        self.states = StateTable(self)
+        self.edges = EdgeLog(self)
+
+    # --- États ---
+
+    def lookup(self, marking):
+        state_id = self._cache.get(marking)
+        if state_id is not None:
+            self._cache.move_to_end(marking)
+            return state_id
+        state_id = self._pending_index.get(marking)
+        if state_id is not None:
+            return state_id
+        blob = _encode(marking)
+        for row_id, row_blob in self._db.execute(
+                "SELECT id, marking FROM states WHERE hash = ?", (_hash(blob),)):
+            if row_blob == blob:
+                self._remember(marking, row_id)
+                return row_id
+        return None
+
+    def add_state(self, marking, state_id):
+        if state_id != self.num_states:
+            raise ValueError(f"Les états doivent être numérotés dans l'ordre ({state_id} != {self.num_states})")
+        blob = _encode(marking)
+        self._pending_states.append((state_id, _hash(blob), blob))
+        self._pending_index[marking] = state_id
+        self.num_states += 1
+        self._remember(marking, state_id)
+        if len(self._pending_states) >= self.batch_size:
+            self.flush()
+
+    def marking(self, state_id):
+        first_pending = self.num_states - len(self._pending_states)
+        if state_id >= first_pending:
+            return marshal.loads(self._pending_states[state_id - first_pending][2])
+        row = self._db.execute("SELECT marking FROM states WHERE id = ?", (state_id,)).fetchone()
+        if row is None:
+            raise KeyError(state_id)
+        return marshal.loads(row[0])
+
+    def iter_states(self):
+        self.flush()
+        for state_id, blob in self._db.execute("SELECT id, marking FROM states ORDER BY id"):
+            yield state_id, marshal.loads(blob)
+
+    def _remember(self, marking, state_id):
+        self._cache[marking] = state_id
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # --- Arêtes ---
+
+    def add_edge(self, src, dst, transition):
+        self._pending_edges.append((src, dst, transition))
+        self.num_edges += 1
+        if len(self._pending_edges) >= self.batch_size:
+            self.flush()
+
+    def iter_edges(self, src=None):
+        self.flush()
+        if src is None:
+            cursor = self._db.execute("SELECT src, dst, transition FROM edges ORDER BY rowid")
+        else:
+            self._db.execute("CREATE INDEX IF NOT EXISTS edges_src ON edges(src)")
+            cursor = self._db.execute(
+                "SELECT src, dst, transition FROM edges WHERE src = ? ORDER BY rowid", (src,))
+        for row in cursor:
+            yield tuple(row)
+
+    # --- Métadonnées (noms des places, table des couleurs...) ---
+    # Valeurs simples (nombres, chaînes, tuples, listes) sérialisées avec
+    # marshal comme les états : rouvrir un fichier n'exécute jamais de code
+
+    def set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                         (key, marshal.dumps(value, MARSHAL_VERSION)))
+        self._db.commit()
+
+    def get_meta(self, key, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        try:
+            return marshal.loads(row[0])
+        except (EOFError, TypeError, ValueError):
+            raise ValueError(f"Métadonnée {key!r} illisible dans le magasin") from None
+
+    # --- Cycle de vie ---
+
+    def flush(self):
+        if self._pending_states:
+            self._db.executemany("INSERT INTO states VALUES (?, ?, ?)", self._pending_states)
+            self._pending_states = []
+            self._pending_index = {}
+        if self._pending_edges:
+            self._db.executemany("INSERT INTO edges VALUES (?, ?, ?)", self._pending_edges)
+            self._pending_edges = []
+        self._db.commit()
+
+    def reset(self):
+        """Vide le magasin avant une nouvelle exploration."""
+        self._pending_states = []
+        self._pending_index = {}
+        self._pending_edges = []
+        self._cache.clear()
+        self._db.executescript("DELETE FROM states; DELETE FROM edges; DELETE FROM meta;")
+        self.num_states = 0
+        self.num_edges = 0
+
+    def close(self):
+        self.flush()
+        self._db.close()
@@ -0,0 +1,148 @@
+#symbolic.py
+# Espace d'états symbolique des réseaux saufs (petri_model, au plus un jeton
+# par place) : un ensemble de marquages est un BDD (voir bdd.py) avec une
+# variable par place, ce qui permet de traiter des espaces de 10^15 états et
+# plus sans les énumérer.
+# Point fixe par chaînage : les images des transitions sont appliquées l'une
+# après l'autre sur l'ensemble courant (déjà agrandi par les précédentes),
+# jusqu'à ce qu'un passage complet n'ajoute plus rien.
+# Image de t (réseau sauf) :
+#   Img_t(S) = (∃ V_t . S ∧ E_t) ∧ N_t
+#   E_t : places d'entrée marquées, places de sortie (hors entrées) vides ;
+#   V_t : places dont la valeur change ; N_t : leurs nouvelles valeurs.
+# Un arc d'entrée de poids > 1 demande deux jetons dans une place : la
+# transition n'est jamais tirable et n'a pas de relation. Un arc de sortie
+# de poids > 1 n'est refusé que si la transition est effectivement tirée.
+
+from bdd import BDD, FALSE, TRUE
+
+
+def _place_order(view):
+    """
+    Ordre des variables : places rencontrées transition par transition, pour
+    rapprocher dans le BDD les places liées par une même transition.
+    """
+    order = []
+    seen = set()
+    for pre, post in zip(view.pre, view.post):
+        for p_idx, _ in pre + post:
+            if p_idx not in seen:
+                seen.add(p_idx)
+                order.append(p_idx)
+    order.extend(p_idx for p_idx in range(len(view.place_names)) if p_idx not in seen)
+    return order
+
+
+class SymbolicStateSpace:
+    """Ensemble des marquages accessibles d'un petri_model.PetriNet sauf, sous forme de BDD."""
+    def __init__(self, net):
+        view = net.compiled()
+        self.place_names = view.place_names
+        self.transition_names = view.transition_names
+        initial = net.get_marking_tuple()
+        if any(tokens > 1 for tokens in initial):
+            raise ValueError("Réseau non sauf : une place contient plus d'un jeton au départ.")
+
+        self.order = _place_order(view)
+        self.level = {p_idx: level for level, p_idx in enumerate(self.order)}
+        self.bdd = BDD(len(self.order))
+        self.initial = self.bdd.cube({self.level[p]: bool(tokens) for p, tokens in enumerate(initial)})
+        self.reachable = None
+        self.iterations = 0
+        self._relations = [self._relation(view, t_idx) for t_idx in range(len(self.transition_names))]
+
+    def _relation(self, view, t_idx):
+        """(E_t, E_t ∧ sorties vides, V_t, N_t, débordement, poids de sortie > 1)."""
+        weights_in, weights_out = {}, {}
+        for arcs, weights in ((view.pre[t_idx], weights_in), (view.post[t_idx], weights_out)):
+            for p_idx, weight in arcs:
+                weights[p_idx] = weights.get(p_idx, 0) + weight
+        if any(weight > 1 for weight in weights_in.values()):
+            return FALSE, FALSE, frozenset(), TRUE, FALSE, False  # jamais tirable
+        inputs, outputs = set(weights_in), set(weights_out)
+        heavy = any(weight > 1 for weight in weights_out.values())
+        level = self.level
+        only_in, only_out = inputs - outputs, outputs - inputs
+        enabled = self.bdd.cube({level[p]: True for p in inputs})
+        condition = self.bdd.apply("and", enabled, self.bdd.cube({level[p]: False for p in only_out}))
+        changed = frozenset(level[p] for p in only_in | only_out)
+        new_values = self.bdd.cube({**{level[p]: False for p in only_in}, **{level[p]: True for p in only_out}})
+        overflow = FALSE  # une place de sortie déjà marquée : deux jetons
+        for p in only_out:
+            overflow = self.bdd.apply("or", overflow, self.bdd.var(level[p]))
+        overflow = self.bdd.apply("and", enabled, overflow)
+        return enabled, condition, changed, new_values, overflow, heavy
+
+    def image(self, states, t_idx):
+        """Marquages atteints en tirant t depuis l'ensemble states."""
+        enabled, condition, changed, new_values, overflow, heavy = self._relations[t_idx]
+        if heavy and self.bdd.apply("and", states, enabled) != FALSE:
+            raise ValueError(f"Arc de sortie de poids > 1 sur {self.transition_names[t_idx]} : "
+                             "poids d'arc > 1 non supportés par l'espace symbolique.")
+        if self.bdd.apply("and", states, overflow) != FALSE:
+            raise ValueError(f"Réseau non sauf : {self.transition_names[t_idx]} dépose un second jeton.")
+        moved = self.bdd.and_exists(states, condition, changed)
+        return self.bdd.apply("and", moved, new_values)
+
+    def build(self, max_iterations=None):
+        """Calcule le point fixe ; retourne le nombre de marquages accessibles."""
+        reachable = self.initial
+        self.iterations = 0
+        while max_iterations is None or self.iterations < max_iterations:
+            self.iterations += 1
+            previous = reachable
+            for t_idx in range(len(self.transition_names)):
+                reachable = self.bdd.apply("or", reachable, self.image(reachable, t_idx))
+            if reachable == previous:
+                break
+            if len(self.bdd._cache) > 1_000_000:
+                self.bdd.clear_cache()
+        self.reachable = reachable
+        return self.count()
+
+    # --- Requêtes ---
+
+    def predicate(self, condition):
+        """
+        BDD d'une condition sur les places : dict {place: 0/1} (conjonction),
+        ou nœud BDD déjà construit (combinaisons via self.bdd.apply).
+        """
+        if isinstance(condition, int):
+            return condition
+        p_index = {name: i for i, name in enumerate(self.place_names)}
+        return self.bdd.cube({self.level[p_index[name]]: bool(value) for name, value in condition.items()})
+
+    def place(self, name):
+        """BDD « la place name est marquée »."""
+        return self.bdd.var(self.level[self.place_names.index(name)])
+
+    def _states(self, condition):
+        if self.reachable is None:
+            self.build()
+        if condition is None:
+            return self.reachable
+        return self.bdd.apply("and", self.reachable, self.predicate(condition))
+
+    def count(self, condition=None):
+        """Nombre de marquages accessibles (qui satisfont condition, si donnée)."""
+        return self.bdd.count(self._states(condition))
+
+    def contains(self, marking):
+        """Le marquage (tuple dans l'ordre de get_marking_tuple) est-il accessible ?"""
+        if any(tokens > 1 for tokens in marking):
+            return False
+        return self.bdd.evaluate(self._states(None), {self.level[p]: bool(t) for p, t in enumerate(marking)})
+
+    def example(self, condition=None):
+        """Un marquage accessible qui satisfait condition (tuple), None s'il n'y en a pas."""
+        values = self.bdd.pick(self._states(condition))
+        if values is None:
+            return None
+        return tuple(int(values[self.level[p]]) for p in range(len(self.place_names)))
+
+    def deadlocks(self):
+        """BDD des marquages accessibles où aucune transition n'est tirable."""
+        dead = TRUE
+        for enabled, *_ in self._relations:
+            dead = self.bdd.apply("diff", dead, enabled)
+        return self._states(dead)
@@ -3,7 +3,7 @@ import unittest
 import os, sys
 sys.path.append(os.path.dirname(__file__))
 
-from petri_model import PetriNet
+from petri_model import PetriNet, OMEGA
 
 class TestReachability(unittest.TestCase):
     def test_simple_net(self):
@@ -30,5 +30,352 @@ class TestReachability(unittest.TestCase):
         self.assertIn((0, 1), net.marking_to_id)
         self.assertIn((0, 1, "t1"), net.edges)
 
+    def test_vectorized_matches_sequential(self):
+        """Le moteur NumPy doit produire exactement le même graphe."""
+        net = PetriNet()
+        net.add_place("p1", 2)
+        net.add_place("p2", 0)
+        net.add_place("p3", 1)
+        net.add_transition("t1")
+        net.add_transition("t2")
+        net.add_transition("t3")
+        net.add_arc("p1", "t1", 1)
+        net.add_arc("t1", "p2", 1)
+        net.add_arc("p2", "t2", 1)
+        net.add_arc("p3", "t2", 1)
+        net.add_arc("t2", "p1", 1)
+        net.add_arc("p3", "t3", 1)
+        net.add_arc("t3", "p2", 2)
+
+        net.build_reachability_graph()
+        expected = (dict(net.id_to_marking), list(net.edges))
+
+        net.build_reachability_graph(vectorized=True)
+        self.assertEqual(dict(net.id_to_marking), expected[0])
+        self.assertEqual(list(net.edges), expected[1])
+
+        matrix = net.incidence_matrix()
+        self.assertEqual(matrix.enabled([2, 0, 1]).tolist(), [True, False, True])
+
+    def test_coverability_unbounded(self):
+        """Une transition sans entrée rend sa place de sortie non bornée : ω."""
+        net = PetriNet()
+        net.add_place("p1", 0)
+        net.add_place("p2", 1)
+        net.add_transition("gen")
+        net.add_transition("t2")
+        net.add_arc("gen", "p1", 1)
+        net.add_arc("p1", "t2", 1)
+        net.add_arc("p2", "t2", 1)
+
+        unbounded = net.build_coverability_graph()
+
+        self.assertEqual(unbounded, ["p1"])
+        # (ω, 1) couvre (ω, 0) : l'ensemble minimal n'a qu'un élément
+        self.assertEqual(list(net.marking_to_id), [(OMEGA, 1)])
+        self.assertEqual(sorted(net.edges), [(0, 0, "gen"), (0, 0, "t2")])
+
+    def test_coverability_edges_exact_target(self):
+        """Un successeur présent dans l'ensemble pointe vers son nœud, pas vers un nœud ω plus grand."""
+        net = PetriNet()
+        net.add_place("p1", 0)
+        net.add_place("p2", 1)
+        net.add_place("p3", 0)
+        net.add_place("p4", 0)
+        for name in ("gen", "t", "u"):
+            net.add_transition(name)
+        net.add_arc("p2", "gen", 1)
+        net.add_arc("gen", "p2", 1)
+        net.add_arc("gen", "p1", 1)
+        net.add_arc("p2", "t", 1)
+        net.add_arc("t", "p3", 1)
+        net.add_arc("p3", "u", 1)
+        net.add_arc("u", "p4", 1)
+        net.build_coverability_graph()
+
+        enabled = 0
+        for state_id, marking in net.id_to_marking.items():
+            for t_name, succ in net.successors(marking):
+                enabled += 1
+                if succ in net.marking_to_id:
+                    self.assertIn((state_id, net.marking_to_id[succ], t_name), net.edges)
+        # aucun arc perdu : un arc par transition franchissable
+        self.assertEqual(len(net.edges), enabled)
+        self.assertIn((OMEGA, 0, 0, 1), net.marking_to_id)
+
+    def test_budget_partial_graph(self):
+        """Un réseau non borné s'arrête sur max_states avec une frontière."""
+        net = PetriNet()
+        net.add_place("p1", 0)
+        net.add_transition("gen")
+        net.add_arc("gen", "p1", 1)
+
+        for vectorized in (False, True):
+            reports = []
+            complete = net.build_reachability_graph(vectorized=vectorized, max_states=50,
+                                                    progress=reports.append)
+            self.assertFalse(complete)
+            self.assertEqual(net.stop_reason, "max_states")
+            self.assertEqual(len(net.id_to_marking), 50)
+            self.assertEqual(net.frontier, [49])
+            self.assertEqual(reports[-1]["states"], 50)
+
+        self.assertFalse(net.build_reachability_graph(max_depth=3))
+        self.assertEqual(net.stop_reason, "max_depth")
+        self.assertEqual(net.frontier, [3])
+
+    def test_vectorized_budget_wide_level(self):
+        """Un niveau BFS très large s'arrête sur max_states comme le BFS séquentiel."""
+        net = PetriNet()
+        for i in range(12):
+            net.add_place(f"p{i:02}", 1)
+            net.add_transition(f"t{i}")
+            net.add_arc(f"p{i:02}", f"t{i}", 1)
+
+        results = []
+        for vectorized in (False, True):
+            self.assertFalse(net.build_reachability_graph(vectorized=vectorized, max_states=100))
+            results.append((dict(net.id_to_marking), list(net.edges), net.frontier))
+        self.assertEqual(results[0], results[1])
+        self.assertLess(len(net.id_to_marking), 100 + 12)
+        expanded = {src for src, _, _ in net.edges}
+        self.assertTrue(expanded.isdisjoint(net.frontier))
+        self.assertEqual(sorted(expanded | set(net.frontier)), list(range(len(net.id_to_marking))))
+
+    def test_simulation_reproducible(self):
+        """Monte-Carlo vectorisé : même graine = mêmes statistiques, blocage certain ici."""
+        net = PetriNet()
+        net.add_place("p", 3)
+        net.add_place("q", 0)
+        net.add_place("r", 0)
+        for t in ("t", "u", "k"):
+            net.add_transition(t)
+        net.add_arc("p", "t", 1)
+        net.add_arc("t", "q", 1)
+        net.add_arc("q", "u", 1)
+        net.add_arc("u", "p", 1)
+        net.add_arc("q", "k", 1)
+        net.add_arc("k", "r", 1)
+
+        stats = net.simulate(runs=500, steps=100, seed=7)
+        again = net.simulate(runs=500, steps=100, seed=7)
+        for key in ("firing_counts", "deadlocks", "mean_deadlock_step", "place_distribution"):
+            self.assertEqual(stats[key], again[key])
+        # Les 3 jetons finissent toujours dans r : blocage dans chaque trajectoire
+        self.assertEqual(stats["deadlock_rate"], 1.0)
+        self.assertEqual(stats["place_distribution"]["r"], {3: 500})
+        self.assertEqual(stats["firing_counts"]["k"], 3 * 500)
+        self.assertEqual(stats["steps"], sum(stats["firing_counts"].values()))
+
+    def test_invariants_mutex(self):
+        """Farkas : invariants minimaux du mutex, bornes, places impliquées non stockées."""
+        net = PetriNet()
+        net.add_place("mutex", 1)
+        for i in (1, 2):
+            net.add_place(f"idle{i}", 1)
+            net.add_place(f"crit{i}", 0)
+            net.add_transition(f"enter{i}")
+            net.add_transition(f"leave{i}")
+            net.add_arc(f"idle{i}", f"enter{i}", 1)
+            net.add_arc("mutex", f"enter{i}", 1)
+            net.add_arc(f"enter{i}", f"crit{i}", 1)
+            net.add_arc(f"crit{i}", f"leave{i}", 1)
+            net.add_arc(f"leave{i}", f"idle{i}", 1)
+            net.add_arc(f"leave{i}", "mutex", 1)
+
+        analysis = net.invariants()
+        # Places : crit1, crit2, idle1, idle2, mutex
+        self.assertEqual(analysis.p_invariants, [(1, 1, 0, 0, 1), (1, 0, 1, 0, 0), (0, 1, 0, 1, 0)])
+        self.assertEqual(analysis.t_invariants, [(1, 1, 0, 0), (0, 0, 1, 1)])
+        self.assertTrue(analysis.is_bounded())
+        self.assertEqual(set(analysis.place_bounds().values()), {1})
+
+        net.build_reachability_graph()
+        expected = set(net.id_to_marking.values())
+        expected_edges = sorted(net.edges)
+        for vectorized in (False, True):
+            net.build_reachability_graph(vectorized=vectorized, use_invariants=True)
+            self.assertEqual(len(net.id_to_marking[0]), 2)  # 3 places sur 5 recalculées
+            self.assertEqual({net.full_marking(m) for m in net.id_to_marking.values()}, expected)
+            self.assertEqual(sorted(net.edges), expected_edges)
+
+        # Graphe projeté mis en cache (marshal) puis relu
+        from cache import ReachabilityCache
+        cache = ReachabilityCache()
+        for vectorized in (True, False):
+            net.build_reachability_graph(vectorized=vectorized, use_invariants=True, cache=cache)
+            self.assertEqual({net.full_marking(m) for m in net.id_to_marking.values()}, expected)
+            self.assertEqual(sorted(net.edges), expected_edges)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_symbolic_state_space(self):
+        """BDD : même ensemble que l'exploration explicite, puis 2^40 états sans énumération."""
+        def cycles(n):
+            net = PetriNet()
+            for i in range(n):
+                net.add_place(f"a{i:02}", 1)
+                net.add_place(f"b{i:02}", 0)
+                net.add_transition(f"go{i:02}")
+                net.add_transition(f"back{i:02}")
+                net.add_arc(f"a{i:02}", f"go{i:02}", 1)
+                net.add_arc(f"go{i:02}", f"b{i:02}", 1)
+                net.add_arc(f"b{i:02}", f"back{i:02}", 1)
+                net.add_arc(f"back{i:02}", f"a{i:02}", 1)
+            return net
+
+        net = cycles(4)
+        net.add_place("stop", 0)
+        net.add_transition("halt")
+        for i in range(4):
+            net.add_arc(f"b{i:02}", "halt", 1)
+        net.add_arc("halt", "stop", 1)
+        net.build_reachability_graph()
+        space = net.build_symbolic_state_space()
+        self.assertEqual(space.count(), len(net.id_to_marking))
+        self.assertTrue(all(space.contains(m) for m in net.id_to_marking.values()))
+        self.assertEqual(space.count({"a00": 0, "b01": 1}), 4)
+        dead = space.deadlocks()
+        self.assertEqual(space.count(dead), 1)
+        self.assertEqual(space.example(dead)[net.compiled().place_names.index("stop")], 1)
+
+        big = cycles(40).build_symbolic_state_space()
+        self.assertEqual(big.count(), 2 ** 40)
+        self.assertEqual(big.count(big.place("b07")), 2 ** 39)
+
+        unsafe = cycles(1)
+        unsafe.add_arc("go00", "a00", 1)
+        unsafe.add_place("extra", 1)
+        unsafe.add_transition("dup")
+        unsafe.add_arc("extra", "dup", 1)
+        unsafe.add_arc("dup", "b00", 1)
+        with self.assertRaises(ValueError):
+            unsafe.build_symbolic_state_space()
+
+        # Poids > 1 : entrée = jamais tirable (réseau accepté), sortie = refusée si tirée
+        heavy = cycles(2)
+        heavy.add_place("empty", 0)
+        heavy.add_transition("need2")
+        heavy.add_arc("a00", "need2", 2)
+        heavy.add_arc("need2", "b00", 1)
+        heavy.add_transition("idle")
+        heavy.add_arc("empty", "idle", 1)
+        heavy.add_arc("idle", "b01", 2)
+        self.assertEqual(heavy.build_symbolic_state_space().count(), cycles(2).build_symbolic_state_space().count())
+        heavy.add_transition("emit")
+        heavy.add_arc("a01", "emit", 1)
+        heavy.add_arc("emit", "b01", 2)
+        with self.assertRaisesRegex(ValueError, "poids d'arc > 1"):
+            heavy.build_symbolic_state_space()
+
+        # Opérations itératives : bien plus de variables que la limite de récursion
+        from bdd import BDD
+        limit = sys.getrecursionlimit()
+        deep = BDD(3 * limit)
+        everything = deep.cube(dict.fromkeys(range(deep.n_vars), True))
+        shifted = deep.cube(dict.fromkeys(range(1, deep.n_vars), True))
+        self.assertEqual(deep.apply("and", everything, shifted), everything)
+        self.assertEqual(deep.count(deep.exists(shifted, frozenset(range(deep.n_vars // 2)))),
+                         2 ** (deep.n_vars // 2))
+        self.assertEqual(sys.getrecursionlimit(), limit)
+
+    def test_find_deadlock_trace(self):
+        """Requête sur réseau entier : témoin et trace sans construire le graphe."""
+        net = PetriNet()
+        net.add_place("p", 3)
+        net.add_place("q", 0)
+        net.add_place("r", 0)
+        for t in ("t", "u", "k"):
+            net.add_transition(t)
+        net.add_arc("p", "t", 1)
+        net.add_arc("t", "q", 1)
+        net.add_arc("q", "u", 1)
+        net.add_arc("u", "p", 1)
+        net.add_arc("q", "k", 1)
+        net.add_arc("k", "r", 1)
+
+        result = net.find_reachable(lambda m: m["r"] == 2)
+        self.assertEqual(result.trace, ["t", "t", "k", "k"])  # BFS : trace la plus courte
+        self.assertEqual(result.markings[-1], {"p": 1, "q": 0, "r": 2})
+        dead = net.find_deadlock()
+        self.assertEqual(dead.marking, {"p": 0, "q": 0, "r": 3})
+        self.assertEqual(len(dead.trace), 6)
+        self.assertFalse(net.find_reachable(lambda m: m["r"] > 3))
+        self.assertEqual(net.get_marking_tuple(), (3, 0, 0))
+
+    def test_edge_graph_csr(self):
+        """Arêtes en CSR : mêmes arêtes qu'une liste, accès direct par état, mémoire réduite."""
+        net = PetriNet()
+        net.add_place("p1", 2)
+        net.add_place("p2", 0)
+        net.add_place("p3", 1)
+        for t in ("t1", "t2", "t3"):
+            net.add_transition(t)
+        net.add_arc("p1", "t1", 1)
+        net.add_arc("t1", "p2", 1)
+        net.add_arc("p2", "t2", 1)
+        net.add_arc("p3", "t2", 1)
+        net.add_arc("t2", "p1", 1)
+        net.add_arc("p3", "t3", 1)
+        net.add_arc("t3", "p2", 2)
+        net.build_reachability_graph()
+        edges = list(net.edges)
+
+        self.assertEqual(len(net.edges), len(edges))
+        for state_id in net.id_to_marking:
+            self.assertEqual(net.edges.successors(state_id), [e for e in edges if e[0] == state_id])
+            self.assertEqual(sorted(net.edges.predecessors(state_id)),
+                             sorted(e for e in edges if e[1] == state_id))
+        self.assertIn(edges[-1], net.edges)
+        self.assertNotIn((0, 0, "t1"), net.edges)
+
+        # Sources dans le désordre : rangées à la lecture, ordre d'ajout conservé par source
+        net.edges.append((0, 3, "t9"))
+        self.assertEqual(net.edges.successors(0)[-1], (0, 3, "t9"))
+        self.assertEqual(sorted(net.edges), sorted(edges + [(0, 3, "t9")]))
+        # Bloc hors ordre séparé : le CSR principal n'est pas reconstruit
+        main = net.edges.targets
+        net.edges.append((1, 0, "t9"))
+        net.edges.append((0, 2, "t8"))
+        late = edges + [(0, 3, "t9"), (1, 0, "t9"), (0, 2, "t8")]
+        self.assertEqual(list(net.edges), sorted(late, key=lambda e: e[0]))
+        self.assertIs(net.edges.targets, main)
+        self.assertEqual(net.edges.out_degree(0), len([e for e in late if e[0] == 0]))
+        self.assertIn((1, 0, "t9"), net.edges.predecessors(0))
+        offsets, targets, _ = net.edges.as_numpy()
+        self.assertEqual(len(targets), len(late))
+        self.assertEqual(list(net.edges), sorted(late, key=lambda e: e[0]))
+        with self.assertRaises(OverflowError):
+            net.edges.append((len(net.id_to_marking), 2 ** 32, "t1"))
+
+        big = PetriNet()
+        big.add_place("p", 0)
+        big.add_transition("gen")
+        big.add_arc("gen", "p", 1)
+        big.build_reachability_graph(max_states=5000)
+        as_list = list(big.edges)
+        list_bytes = sys.getsizeof(as_list) + sum(sys.getsizeof(e) for e in as_list)
+        self.assertLess(big.edges.memory_bytes() * 4, list_bytes)
+
+    def test_binary_export_omega(self):
+        """Graphe de couverture exporté en binaire puis relu, ω compris."""
+        import io
+        import export
+        net = PetriNet()
+        net.add_place("p1", 0)
+        net.add_place("p2", 1)
+        net.add_transition("gen")
+        net.add_transition("t2")
+        net.add_arc("gen", "p1", 1)
+        net.add_arc("p1", "t2", 1)
+        net.add_arc("p2", "t2", 1)
+        net.build_coverability_graph()
+
+        out = io.BytesIO()
+        export.export_graph(net, out, "binary")
+        graph = export.BinaryGraph(out)
+        self.assertEqual(dict(graph.states()), dict(net.id_to_marking))
+        self.assertEqual(list(graph.edges()), list(net.edges))
+        self.assertEqual(export.format_for("graphe.GraphML"), "graphml")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,160 @@
+#worker.py
+# Analyse d'accessibilité et export dans un processus séparé, pour que
+# l'interface Tk reste réactive et que l'exploration puisse être annulée.
+# Le processus reçoit une copie du réseau (pickle) ; il renvoie par une file :
+#   ("progress", stats)  statistiques d'exploration.ExplorationBudget, périodiques ;
+#   ("done", résultat)   propre à chaque tâche (graphe portable, raison d'arrêt...) ;
+#   ("error", message)   exception levée pendant l'exploration.
+# L'interface appelle poll() depuis root.after : jamais d'attente bloquante.
+import multiprocessing
+import os
+import queue
+
+from cache import fingerprint
+
+# Options qui changent le graphe (donc la clé du cache), voir _cache_key des réseaux
+CACHE_OPTIONS = ("stubborn", "visible_places", "symmetry", "use_invariants")
+
+
+def _explore(net, options, events):
+    def progress(stats):
+        events.put(("progress", stats))
+
+    try:
+        net.build_reachability_graph(progress=progress, **options)
+        events.put(("done", (net._state_space_payload(), net.complete, net.stop_reason, net.frontier)))
+    except Exception as e:
+        events.put(("error", f"{type(e).__name__}: {e}"))
+
+
+def _export(net, filename, fmt, limits, events):
+    import export
+
+    def progress(stats):
+        events.put(("progress", stats))
+
+    try:
+        with open(filename, "wb") if fmt == "binary" else open(filename, "w", encoding="utf-8") as f:
+            budget = export.export_exploration(net, f, fmt, progress=progress, **limits)
+        events.put(("done", (budget.stop_reason,)))
+    except Exception as e:
+        events.put(("error", f"{type(e).__name__}: {e}"))
+
+
+class BackgroundJob:
+    """
+    Tâche exécutée par target(*args, events) dans un processus. poll() traite
+    les messages reçus, cancel() arrête le processus. Les sous-classes
+    reçoivent le résultat dans _apply.
+    """
+    def __init__(self):
+        self.stats = None        # dernières statistiques reçues
+        self.finished = False
+        self.cancelled = False
+        self.error = None
+        self._process = None
+
+    def _start(self, target, *args):
+        context = multiprocessing.get_context()
+        self._events = context.Queue()
+        self._process = context.Process(target=target, args=args + (self._events,), daemon=True)
+        self._process.start()
+
+    def poll(self):
+        """Traite les messages en attente ; retourne True quand la tâche est terminée."""
+        while not self.finished:
+            try:
+                kind, data = self._events.get_nowait()
+            except queue.Empty:
+                if not self._process.is_alive() and self._events.empty():
+                    self._finish(f"Processus d'analyse arrêté (code {self._process.exitcode})")
+                break
+            if kind == "progress":
+                self.stats = data
+            elif kind == "error":
+                self._finish(data)
+            else:
+                self._apply(*data)
+        return self.finished
+
+    def _apply(self, *result):
+        self._finish(None)
+
+    def _finish(self, error):
+        self.error = error
+        self.finished = True
+        self._process.join()
+        self._events.close()
+
+    def cancel(self):
+        """Arrête le processus."""
+        if self.finished:
+            return
+        self.cancelled = True
+        self.finished = True
+        self._process.terminate()
+        self._process.join()
+        self._events.close()
+        self._events.join_thread()
+
+
+class AnalysisJob(BackgroundJob):
+    """
+    build_reachability_graph(**options) sur une copie de net, dans un processus.
+    Le graphe est chargé dans net quand poll() reçoit le résultat, sauf si le
+    réseau a été modifié entre-temps (error renseigné). Avec cache, un graphe
+    déjà connu est chargé tout de suite (finished vrai dès la création) et un
+    graphe complet calculé y est ajouté. cancel() ne touche pas au graphe du réseau.
+    """
+    def __init__(self, net, cache=None, **options):
+        super().__init__()
+        self.net = net
+        self.cache = cache
+        self.options = options
+        self._fingerprint = fingerprint(net)
+
+        self._cache_key = None
+        if cache is not None and options.get("max_depth") is None and options.get("store") is None:
+            self._cache_key = net._cache_key(cache, **{k: v for k, v in options.items() if k in CACHE_OPTIONS})
+            cached = cache.get(self._cache_key)
+            max_states = options.get("max_states")
+            if cached is not None and (max_states is None or len(cached[0]) < max_states):
+                net._restore_state_space(*cached)
+                self.finished = True
+                return
+
+        self._start(_explore, net, options)
+
+    def _apply(self, payload, complete, stop_reason, frontier):
+        if fingerprint(self.net) != self._fingerprint:
+            self._finish("Le réseau a été modifié pendant l'analyse : résultat ignoré")
+            return
+        self.net._restore_state_space(*payload)
+        self.net.complete, self.net.stop_reason, self.net.frontier = complete, stop_reason, frontier
+        if self._cache_key is not None and complete:
+            self.cache.put(self._cache_key, payload)
+        self._finish(None)
+
+
+class ExportJob(BackgroundJob):
+    """
+    export.export_exploration de net vers filename (format fmt), dans un
+    processus. limits : max_states, max_depth, timeout, max_memory (voir
+    exploration.ExplorationBudget). stop_reason est renseigné si l'export
+    est partiel ; un export annulé ne laisse pas de fichier.
+    """
+    def __init__(self, net, filename, fmt, **limits):
+        super().__init__()
+        self.filename = filename
+        self.stop_reason = None
+        self._start(_export, net, filename, fmt, limits)
+
+    def _apply(self, stop_reason):
+        self.stop_reason = stop_reason
+        self._finish(None)
+
+    def cancel(self):
+        cancelled = not self.finished
+        super().cancel()
+        if cancelled and os.path.exists(self.filename):
+            os.remove(self.filename)